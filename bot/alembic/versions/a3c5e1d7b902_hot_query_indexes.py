@@ -0,0 +1,86 @@
+"""hot query indexes for orders, sessions, product_sizes, images
+
+Revision ID: a3c5e1d7b902
+Revises: fb1f7efcb9e0
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e1d7b902'
+down_revision: Union[str, Sequence[str], None] = 'fb1f7efcb9e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции —
+# каждый индекс строится в autocommit_block и не блокирует запись в таблицы.
+# Условие частичного индекса пишется так же, как его выдаёт запрос: планировщик не
+# выводит "x IS TRUE" из "x" (и "x IS FALSE" из "NOT x"), а .is_(True) даёт именно IS.
+INDEXES = [
+    # лента заказов менеджера: фильтр по статусу + keyset по (created_at, id)
+    dict(index_name="ix_orders_status_created_id", table_name="orders",
+         columns=["status_id", "created_at", "id"]),
+    # get_last_order: tg_user_id + is_active, последний по created_at, статус читается из индекса
+    dict(index_name="ix_orders_user_created_active", table_name="orders",
+         columns=["tg_user_id", sa.text("created_at DESC")],
+         postgresql_include=["status_id"],
+         postgresql_where=sa.text("is_active")),
+    # активные черновики (check_expired_orders): status_id = 8
+    dict(index_name="ix_orders_active_drafts", table_name="orders",
+         columns=["updated_at"],
+         postgresql_where=sa.text("status_id = 8 AND is_active")),
+    # join orders → product_sizes и статистика по товарам
+    dict(index_name="ix_orders_product_size_status", table_name="orders",
+         columns=["product_size_id", "status_id"]),
+    # фильтр товаров продавца (products.created_by)
+    dict(index_name="ix_products_created_by", table_name="products",
+         columns=["created_by"]),
+    # батч-загрузка размеров каталога (ProductSize.is_active.is_(True))
+    dict(index_name="ix_product_sizes_product_active", table_name="product_sizes",
+         columns=["product_id", "price"],
+         postgresql_where=sa.text("is_active IS TRUE")),
+    # первое активное фото товара (Image.is_active.is_(True))
+    dict(index_name="ix_images_product_active_created", table_name="images",
+         columns=["product_id", "created_at"],
+         postgresql_where=sa.text("is_active IS TRUE")),
+    # get_actual_session_by_tg_id, рассылка приглашений и счётчик записавшихся на дегустацию
+    # (Session.sent_message.is_(False))
+    dict(index_name="ix_sessions_role_user_unsent", table_name="sessions",
+         columns=["role_id", "tg_user_id"],
+         postgresql_where=sa.text("sent_message IS FALSE")),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for spec in INDEXES:
+            spec = dict(spec)
+            op.create_index(
+                spec.pop("index_name"),
+                spec.pop("table_name"),
+                spec.pop("columns"),
+                schema="public",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **spec
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for spec in reversed(INDEXES):
+            op.drop_index(
+                spec["index_name"],
+                table_name=spec["table_name"],
+                schema="public",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
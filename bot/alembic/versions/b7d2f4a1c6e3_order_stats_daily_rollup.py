@@ -0,0 +1,126 @@
+"""order_stats_daily rollup maintained by trigger on orders
+
+Revision ID: b7d2f4a1c6e3
+Revises: a3c5e1d7b902
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2f4a1c6e3'
+down_revision: Union[str, Sequence[str], None] = 'a3c5e1d7b902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Применяет к ячейке (день, товар, статус) вклад одного заказа со знаком +1/-1
+APPLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION public.order_stats_daily_apply(
+    p_day date,
+    p_product_size_id integer,
+    p_status_id integer,
+    p_count integer,
+    p_total numeric,
+    p_sign integer
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO public.order_stats_daily AS s
+        (day, product_id, seller_id, status_id, orders_count, total_kg, total_sum)
+    SELECT p_day, ps.product_id, p.created_by, p_status_id,
+           p_sign, p_sign * p_count * sz.name, p_sign * p_total
+    FROM public.product_sizes ps
+    JOIN public.products p ON p.id = ps.product_id
+    JOIN public.sizes sz ON sz.id = ps.size_id
+    WHERE ps.id = p_product_size_id
+    ON CONFLICT (day, product_id, status_id) DO UPDATE
+        SET orders_count = s.orders_count + EXCLUDED.orders_count,
+            total_kg = s.total_kg + EXCLUDED.total_kg,
+            total_sum = s.total_sum + EXCLUDED.total_sum;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION public.order_stats_daily_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND (OLD.status_id, OLD.product_count, OLD.total_price, OLD.product_size_id, OLD.created_at)
+           IS NOT DISTINCT FROM
+           (NEW.status_id, NEW.product_count, NEW.total_price, NEW.product_size_id, NEW.created_at) THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.order_stats_daily_apply(
+            coalesce(OLD.created_at, now())::date, OLD.product_size_id, OLD.status_id,
+            OLD.product_count, OLD.total_price, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.order_stats_daily_apply(
+            coalesce(NEW.created_at, now())::date, NEW.product_size_id, NEW.status_id,
+            NEW.product_count, NEW.total_price, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGER = """
+CREATE TRIGGER trg_orders_stats_daily
+AFTER INSERT OR DELETE OR UPDATE OF status_id, product_count, total_price, product_size_id, created_at
+ON public.orders
+FOR EACH ROW EXECUTE FUNCTION public.order_stats_daily_trigger();
+"""
+
+BACKFILL = """
+INSERT INTO public.order_stats_daily
+    (day, product_id, seller_id, status_id, orders_count, total_kg, total_sum)
+SELECT coalesce(o.created_at, now())::date, ps.product_id, p.created_by, o.status_id,
+       count(o.id), sum(o.product_count * sz.name), sum(o.total_price)
+FROM public.orders o
+JOIN public.product_sizes ps ON ps.id = o.product_size_id
+JOIN public.products p ON p.id = ps.product_id
+JOIN public.sizes sz ON sz.id = ps.size_id
+GROUP BY 1, 2, 3, 4;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "order_stats_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_id", sa.Integer(),
+                  sa.ForeignKey("public.products.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("seller_id", sa.BIGINT(), nullable=False),
+        sa.Column("status_id", sa.Integer(), nullable=False),
+        sa.Column("orders_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("total_kg", sa.Numeric(12, 1), nullable=False, server_default=sa.text("0")),
+        sa.Column("total_sum", sa.Numeric(14, 1), nullable=False, server_default=sa.text("0")),
+        sa.PrimaryKeyConstraint("day", "product_id", "status_id"),
+        schema="public",
+    )
+    op.create_index("ix_order_stats_daily_seller", "order_stats_daily",
+                    ["seller_id", "status_id"], schema="public")
+
+    op.execute(text(APPLY_FUNCTION))
+    op.execute(text(TRIGGER_FUNCTION))
+    # заполняем по уже существующим заказам до включения триггера — в одной транзакции
+    op.execute(text("LOCK TABLE public.orders IN SHARE ROW EXCLUSIVE MODE"))
+    op.execute(text(BACKFILL))
+    op.execute(text(TRIGGER))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(text("DROP TRIGGER IF EXISTS trg_orders_stats_daily ON public.orders"))
+    op.execute(text("DROP FUNCTION IF EXISTS public.order_stats_daily_trigger()"))
+    op.execute(text("DROP FUNCTION IF EXISTS public.order_stats_daily_apply(date, integer, integer, integer, numeric, integer)"))
+    op.drop_index("ix_order_stats_daily_seller", table_name="order_stats_daily", schema="public")
+    op.drop_table("order_stats_daily", schema="public")
@@ -0,0 +1,65 @@
+"""broadcast_campaigns and broadcast_recipients for resumable invitations
+
+Revision ID: c4e8a2f6d1b9
+Revises: b7d2f4a1c6e3
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f6d1b9'
+down_revision: Union[str, Sequence[str], None] = 'b7d2f4a1c6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "broadcast_campaigns",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("message_text", sa.Text(), nullable=False),
+        sa.Column("parse_mode", sa.String(20), nullable=True),
+        sa.Column("params", postgresql.JSONB(), nullable=True),
+        sa.Column("created_by", sa.BIGINT(), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default=sa.text("'running'")),
+        sa.Column("total", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("sent", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        schema="public",
+    )
+    op.create_index("ix_broadcast_campaigns_running", "broadcast_campaigns", ["id"],
+                    schema="public", postgresql_where=sa.text("status = 'running'"))
+
+    op.create_table(
+        "broadcast_recipients",
+        sa.Column("campaign_id", sa.Integer(),
+                  sa.ForeignKey("public.broadcast_campaigns.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("tg_user_id", sa.BIGINT(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=True),
+        sa.Column("attempts", sa.SmallInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("campaign_id", "tg_user_id"),
+        schema="public",
+    )
+    op.create_index("ix_broadcast_recipients_pending", "broadcast_recipients",
+                    ["campaign_id", "tg_user_id"], schema="public",
+                    postgresql_where=sa.text("status IS NULL"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_broadcast_recipients_pending", table_name="broadcast_recipients", schema="public")
+    op.drop_table("broadcast_recipients", schema="public")
+    op.drop_index("ix_broadcast_campaigns_running", table_name="broadcast_campaigns", schema="public")
+    op.drop_table("broadcast_campaigns", schema="public")
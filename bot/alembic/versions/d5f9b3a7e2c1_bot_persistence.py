@@ -0,0 +1,45 @@
+"""bot_user_data and bot_conversations for Application persistence
+
+Revision ID: d5f9b3a7e2c1
+Revises: c4e8a2f6d1b9
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f9b3a7e2c1'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a2f6d1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "bot_user_data",
+        sa.Column("user_id", sa.BIGINT(), primary_key=True),
+        sa.Column("data", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        schema="public",
+    )
+    op.create_table(
+        "bot_conversations",
+        sa.Column("name", sa.String(64), nullable=False),
+        sa.Column("key", sa.String(64), nullable=False),
+        sa.Column("state", postgresql.JSONB(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name", "key"),
+        schema="public",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("bot_conversations", schema="public")
+    op.drop_table("bot_user_data", schema="public")
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from api.routes import geocoding
 from api.routes import static_data
@@ -6,18 +8,22 @@ from api.routes import static_data
 
 # Import logging components
 from utils.logging_config import LoggingMiddleware, setup_logging, structured_logger
+from utils.gazetteer import get_gazetteer
+from utils.geocoding import start_http_client, close_http_client, metrics as geocoding_metrics
 
-app = FastAPI(title="Geo API")
 
-# Setup logging on startup
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     setup_logging(
         log_dir="/app/logs",
         log_level="INFO",
         enable_console=True
     )
-    
+    # Один HTTP-клиент Mapbox на всё приложение: пул keep-alive соединений
+    await start_http_client()
+    # локальный справочник адресов грузится заранее, а не на первом запросе
+    get_gazetteer()
+
     structured_logger.info(
         "FastAPI application starting up",
         action="app_startup",
@@ -27,13 +33,18 @@ async def startup_event():
         }
     )
 
-@app.on_event("shutdown") 
-async def shutdown_event():
+    yield
+
+    await close_http_client()
     structured_logger.info(
         "FastAPI application shutting down",
-        action="app_shutdown"
+        action="app_shutdown",
+        context={'geocoding': geocoding_metrics()}
     )
 
+
+app = FastAPI(title="Geo API", lifespan=lifespan)
+
 # Add logging middleware FIRST (before routes)
 app.add_middleware(LoggingMiddleware)
 
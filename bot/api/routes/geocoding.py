@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Query, HTTPException
-from utils.geocoding import geocode_address, autocomplete_address
+from utils.geocoding import geocode_address, autocomplete_address, metrics
 
 router = APIRouter(prefix="/geocoding", tags=["Geocoding"])
 
@@ -14,3 +14,9 @@ async def get_coordinates(address: str = Query(..., description="Full address"))
 async def get_suggestions(query: str = Query(..., description="Address part")):
     suggestions = await autocomplete_address(query)
     return {"suggestions": suggestions}
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Кэш, single-flight, переиспользование префиксов и квота Mapbox"""
+    return metrics()
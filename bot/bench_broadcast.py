@@ -0,0 +1,103 @@
+"""
+Бенчмарк рассылки (utils/broadcast_sender.py) на имитации Telegram — без БД и сети.
+
+    cd bot && python bench_broadcast.py [получателей] [задержка ответа, мс]
+
+Имитация: ответ через заданную задержку, 2% получателей заблокировали бота,
+1% запросов падает с сетевой ошибкой, больше 30 сообщений за секунду — RetryAfter.
+Сравнивается прежний цикл (по одному сообщению) и Broadcaster с лимитом
+BROADCAST_RATE и без лимита (тогда Telegram отвечает RetryAfter).
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+from collections import deque
+
+from telegram.error import Forbidden, NetworkError, RetryAfter
+
+from utils.broadcast_sender import SENT, Broadcaster
+
+RECIPIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+LATENCY = (int(sys.argv[2]) if len(sys.argv) > 2 else 80) / 1000
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", 8))
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", 25))
+TELEGRAM_LIMIT = 30  # сообщений в секунду от одного бота
+
+
+class FakeTelegram:
+    def __init__(self, seed: int = 1):
+        self.rnd = random.Random(seed)
+        self.blocked = set(self.rnd.sample(range(RECIPIENTS), RECIPIENTS // 50))
+        self.recent = deque()
+        self.delivered = {}
+        self.flood_errors = 0
+
+    async def send_message(self, chat_id: int, **kwargs):
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > 1:
+            self.recent.popleft()
+        if len(self.recent) >= TELEGRAM_LIMIT:
+            self.flood_errors += 1
+            raise RetryAfter(1)
+        self.recent.append(now)
+        await asyncio.sleep(LATENCY * self.rnd.uniform(0.5, 1.5))
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if self.rnd.random() < 0.01:
+            raise NetworkError("Connection reset")
+        self.delivered[chat_id] = self.delivered.get(chat_id, 0) + 1
+
+
+async def chat_ids():
+    for chat_id in range(RECIPIENTS):
+        yield chat_id
+
+
+async def old_loop(bot: FakeTelegram) -> int:
+    """Как было: по одному, ошибка — просто пропуск (RetryAfter тоже)"""
+    sent = 0
+    for chat_id in range(RECIPIENTS):
+        try:
+            await bot.send_message(chat_id=chat_id, text="...")
+            sent += 1
+        except Exception:
+            pass
+    return sent
+
+
+async def bench():
+    print(f"👥 {RECIPIENTS} получателей, ответ Telegram ~{LATENCY * 1000:.0f} мс, "
+          f"воркеров {BROADCAST_CONCURRENCY}\n")
+
+    bot = FakeTelegram()
+    start = time.perf_counter()
+    sent = await old_loop(bot)
+    elapsed = time.perf_counter() - start
+    print(f"  {'прежний цикл':<26} {elapsed:6.1f} с  {RECIPIENTS / elapsed:5.1f} сообщ./с  "
+          f"доставлено {sent}, RetryAfter {bot.flood_errors}")
+
+    for title, rate in ((f"Broadcaster, {BROADCAST_RATE:g}/с", BROADCAST_RATE), ("Broadcaster, без лимита", 0)):
+        bot = FakeTelegram()
+        broadcaster = Broadcaster(BROADCAST_CONCURRENCY, rate, max_attempts=3)
+        results = []
+
+        async def on_result(result):
+            results.append(result)
+
+        async def send(chat_id):
+            await bot.send_message(chat_id=chat_id, text="...")
+
+        start = time.perf_counter()
+        stats = await broadcaster.run(chat_ids(), send, on_result, total=RECIPIENTS)
+        elapsed = time.perf_counter() - start
+        duplicates = sum(n > 1 for n in bot.delivered.values())
+        assert stats.sent == sum(r.status == SENT for r in results) == len(bot.delivered)
+        print(f"  {title:<26} {elapsed:6.1f} с  {RECIPIENTS / elapsed:5.1f} сообщ./с  "
+              f"доставлено {stats.sent}, заблокировано {stats.blocked}, ошибок {stats.failed}, "
+              f"повторов {stats.retries}, RetryAfter {bot.flood_errors}, дублей {duplicates}")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench())
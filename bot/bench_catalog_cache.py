@@ -0,0 +1,142 @@
+"""
+Бенчмарк кэша каталога (utils/catalog_cache.py): задержка шага просмотра каталога
+с CATALOG_CACHE_ENABLED=true и false.
+
+    cd bot && python bench_catalog_cache.py [сортов] [товаров в сорте] [шагов]
+
+Нужна база из DATABASE_URL с применёнными миграциями. В неё добавляется тестовый
+каталог (сорта bench_*, у каждого товара три размера и фото), в конце он удаляется.
+Шаг просмотра — то, что делает show_filtered_products: get_catalog(), товары сорта
+и клавиатуры размеров. Меряется последовательно (один покупатель) и при
+одновременных покупателях — тогда без кэша шаги делят пул соединений.
+"""
+import sys
+import time
+import random
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import delete, select
+
+from db.db_async import get_async_session
+from db.models import Image, Package, Product, ProductSize, ProductType, Size, User
+from utils import catalog_cache
+from utils.keyboard_builder import build_product_sizes_keyboard
+
+TYPES = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+PRODUCTS_PER_TYPE = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+STEPS = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+CUSTOMERS = 20
+BENCH_USER_ID = 9_000_000_000_001  # такого id у пользователей Telegram нет
+SIZE_NAMES = (Decimal("0.5"), Decimal("1.0"), Decimal("1.5"))
+
+
+async def seed() -> dict:
+    """Тестовый каталог; возвращает, что удалить в конце"""
+    created = {"sizes": [], "package": None}
+    async with get_async_session() as session:
+        session.add(User(tg_user_id=BENCH_USER_ID, username="bench_catalog"))
+        sizes = {s.name: s for s in (await session.execute(
+            select(Size).where(Size.name.in_(SIZE_NAMES))
+        )).scalars()}
+        missing = [name for name in SIZE_NAMES if name not in sizes]
+        if missing:
+            package = Package(name="bench_catalog", price=Decimal("1.0"))
+            session.add(package)
+            await session.flush()
+            created["package"] = package.id
+            for name in missing:
+                sizes[name] = Size(name=name, package_id=package.id)
+                session.add(sizes[name])
+        await session.flush()
+        created["sizes"] = [sizes[name].id for name in missing]
+
+        rnd = random.Random(1)
+        for t in range(TYPES):
+            product_type = ProductType(name=f"bench_{t}")
+            session.add(product_type)
+            await session.flush()
+            for p in range(PRODUCTS_PER_TYPE):
+                product = Product(
+                    name=f"bench_{t}_{p}", type_id=product_type.id, description="Тестовый мёд",
+                    created_by=BENCH_USER_ID, is_active=True, is_draft=False
+                )
+                session.add(product)
+                await session.flush()
+                for name in SIZE_NAMES:
+                    session.add(ProductSize(product_id=product.id, size_id=sizes[name].id,
+                                            price=Decimal(rnd.randint(300, 2500))))
+                session.add(Image(product_id=product.id, tg_file_id=f"bench_file_{t}_{p}"))
+        await session.commit()
+    return created
+
+
+async def cleanup(created: dict):
+    async with get_async_session() as session:
+        await session.execute(delete(Product).where(Product.created_by == BENCH_USER_ID))
+        await session.execute(delete(ProductType).where(ProductType.name.like("bench\\_%")))
+        await session.execute(delete(User).where(User.tg_user_id == BENCH_USER_ID))
+        if created["sizes"]:
+            await session.execute(delete(Size).where(Size.id.in_(created["sizes"])))
+        if created["package"]:
+            await session.execute(delete(Package).where(Package.id == created["package"]))
+        await session.commit()
+
+
+async def browse_step(type_id: int) -> float:
+    """Один показ товаров сорта, как в show_filtered_products"""
+    start = time.perf_counter()
+    catalog = await catalog_cache.get_catalog()
+    for product in catalog.products_of_type(type_id):
+        build_product_sizes_keyboard(product.sizes)
+    return time.perf_counter() - start
+
+
+async def run(type_ids: list, customers: int) -> tuple:
+    rnd = random.Random(7)
+    plan = [rnd.choice(type_ids) for _ in range(STEPS)]
+    latencies = []
+    next_step = [0]
+
+    async def customer():
+        while next_step[0] < len(plan):
+            type_id = plan[next_step[0]]
+            next_step[0] += 1
+            latencies.append(await browse_step(type_id))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(customer() for _ in range(customers)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(title: str, elapsed: float, lat: list):
+    p50 = lat[len(lat) // 2] * 1000
+    p95 = lat[int(len(lat) * 0.95)] * 1000
+    p99 = lat[int(len(lat) * 0.99)] * 1000
+    print(f"  {title:<36} p50 {p50:8.3f} мс  p95 {p95:8.3f} мс  p99 {p99:8.3f} мс"
+          f"  {len(lat) / elapsed:9.0f} шагов/с")
+
+
+async def bench():
+    created = await seed()
+    try:
+        catalog_cache.invalidate_catalog("bench")
+        catalog = await catalog_cache.get_catalog()
+        type_ids = [t.id for t in catalog.types if t.name.startswith("bench_")]
+        print(f"🍯 {len(catalog.types)} сортов, {len(catalog.products_by_id)} товаров в каталоге; "
+              f"{STEPS} шагов просмотра\n")
+
+        for enabled in (False, True):
+            catalog_cache.CATALOG_CACHE_ENABLED = enabled
+            catalog_cache.invalidate_catalog("bench")
+            await browse_step(type_ids[0])  # прогрев
+            label = "кэш включён" if enabled else "кэш выключен"
+            report(f"{label}, 1 покупатель", *await run(type_ids, 1))
+            report(f"{label}, {CUSTOMERS} одновременно", *await run(type_ids, CUSTOMERS))
+        print(f"\n📊 {catalog_cache.catalog_cache_stats()}")
+    finally:
+        await cleanup(created)
+
+
+if __name__ == "__main__":
+    asyncio.run(bench())
@@ -0,0 +1,98 @@
+"""
+Микро‑бенчмарк накладных расходов отладочного вывода в горячем хендлере.
+
+    cd bot && python bench_console_logger.py [итераций]
+
+Сравнивает тело хендлера без вывода, с прежним print(f"DEBUG..."), с logging.getLogger
+(уровень выключен / включён, как после setup_logging) и со structured_logger.debug
+(выключен / включён).
+stdout перенаправляется в /dev/null, структурный лог пишется во временный каталог.
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import contextlib
+from types import SimpleNamespace
+
+from utils.logging_config import StructuredLogger
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+query = SimpleNamespace(data="quantity_12_3")
+user_data = {"product_messages": [101, 102, 103], "last_menu_message_id": 104}
+
+
+def handler_body():
+    """То, что хендлер делает кроме вывода: разбор callback_data"""
+    _, product_size_id, count = query.data.split("_")
+    return int(product_size_id) * int(count)
+
+
+def with_print():
+    print(f"DEBUG_quantity_data: {query.data.split('_')}")
+    print(f"DEBUG_delete_MESSAGE_list: {user_data['product_messages']}")
+    return handler_body()
+
+
+def make_console_handler(console):
+    def with_console():
+        console.debug("quantity_data: %s", query.data)
+        console.debug("delete_MESSAGE_list: %s", user_data["product_messages"])
+        return handler_body()
+    return with_console
+
+
+def make_console(level: str) -> logging.Logger:
+    """Логгер модуля, настроенный как в setup_logging"""
+    console = logging.getLogger(f"bench.{level.lower()}")
+    console.setLevel(level)
+    console.propagate = False
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(levelname)s %(name)s: %(message)s'))
+    console.addHandler(handler)
+    return console
+
+
+def make_structured_handler(logger):
+    def with_structured():
+        logger.debug("quantity_data", context={"data": query.data})
+        logger.debug("delete_MESSAGE_list", context={"ids": user_data["product_messages"]})
+        return handler_body()
+    return with_structured
+
+
+def timed(title: str, func, baseline: float = None) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    per_call = (time.perf_counter() - start) / ITERATIONS * 1e9
+    overhead = f" (+{per_call - baseline:.0f} нс)" if baseline is not None else ""
+    print(f"  {title:<40} {per_call:8.0f} нс/вызов{overhead}", file=sys.__stdout__)
+    return per_call
+
+
+def bench():
+    print(f"⏱  {ITERATIONS} вызовов хендлера\n", file=sys.__stdout__)
+    log_dir = tempfile.mkdtemp(prefix="bench_console_")
+    structured_on = StructuredLogger(log_dir)
+    structured_off = StructuredLogger(log_dir)
+    structured_off.set_level("INFO")
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        baseline = timed("без вывода", handler_body)
+        timed('print(f"DEBUG...")', with_print, baseline)
+        timed("logging, DEBUG выключен", make_console_handler(make_console("INFO")), baseline)
+        timed("logging, DEBUG включён", make_console_handler(make_console("DEBUG")), baseline)
+        timed("structured_logger.debug, выключен", make_structured_handler(structured_off), baseline)
+        timed("structured_logger.debug, включён", make_structured_handler(structured_on), baseline)
+
+    structured_on.close()
+    structured_off.close()
+    stats = structured_on.stats()
+    print(f"\n  structured: записано {stats['written']}, отброшено {stats['dropped']}", file=sys.__stdout__)
+
+
+if __name__ == "__main__":
+    bench()
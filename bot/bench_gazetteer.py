@@ -0,0 +1,84 @@
+"""
+Бенчмарк локального справочника адресов на синтетических данных.
+
+    cd bot && python bench_gazetteer.py [улиц] [домов_на_улице]
+
+Генерирует CSV (по умолчанию 2000 улиц × 40 домов ≈ размер адресного реестра Сочи),
+замеряет загрузку и время autocomplete/geocode на типичных запросах: префикс улицы,
+улица + начало номера, точный адрес, опечатка (триграммы), промах.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+os.environ.setdefault("GAZETTEER_ENABLED", "false")
+
+from utils.gazetteer import Gazetteer  # noqa: E402
+
+STREETS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+HOUSES = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+REPEAT = 20_000
+
+CITIES = ["Сочи", "Адлер", "Хоста", "Красная Поляна", "Эсто-Садок"]
+KINDS = ["улица", "улица", "улица", "переулок", "проспект", "проезд", "тупик"]
+SYLLABLES = ["ка", "ра", "со", "ло", "ви", "на", "гра", "дов", "ан", "ти", "ле", "мо", "ре", "ку", "пла", "та"]
+
+
+def generate(path: str):
+    rnd = random.Random(17)
+    names = set()
+    while len(names) < STREETS:
+        names.add("".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))).capitalize() + "ская")
+    names = sorted(names)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("city,street,house,lat,lon\n")
+        for name in names:
+            city, kind = rnd.choice(CITIES), rnd.choice(KINDS)
+            lat, lon = 43.4 + rnd.random() * 0.3, 39.6 + rnd.random() * 0.6
+            for house in range(1, HOUSES + 1):
+                suffix = rnd.choice(["", "", "", "а", "/2"])
+                f.write(f"{city},{kind} {name},{house}{suffix},{lat + house * 1e-4:.6f},{lon:.6f}\n")
+    return names
+
+
+def timed(title: str, func, repeat: int = REPEAT):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    per_call = (time.perf_counter() - start) / repeat * 1e6
+    print(f"  {title:<44} {per_call:8.1f} мкс   -> {len(result) if isinstance(result, list) else result}")
+
+
+def bench():
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_gazetteer_"), "gazetteer.csv")
+    names = generate(path)
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer.load(path)
+    print(f"📚 {len(gazetteer.streets)} улиц, {len(gazetteer)} домов, "
+          f"загрузка {(time.perf_counter() - start) * 1000:.0f} мс\n")
+
+    name = names[len(names) // 2]
+    street = next(s for s in gazetteer.streets if s.name.endswith(name))
+    house = street.house_keys[len(street.house_keys) // 2]
+    typo = name[:2] + name[3] + name[2] + name[4:]
+
+    print("⚡ autocomplete:")
+    timed("префикс улицы (3 буквы)", lambda: gazetteer.autocomplete(name[:3]))
+    timed("префикс улицы (6 букв)", lambda: gazetteer.autocomplete(name[:6]))
+    timed("улица + начало номера", lambda: gazetteer.autocomplete(f"{name} {house[0]}"))
+    timed("город, тип, улица, дом", lambda: gazetteer.autocomplete(f"{street.city}, {street.name} {house}"))
+    timed("опечатка (триграммы)", lambda: gazetteer.autocomplete(typo))
+    timed("промах", lambda: gazetteer.autocomplete("Несуществующая 5"))
+
+    print("\n📍 geocode:")
+    timed("точный адрес", lambda: gazetteer.geocode(f"{street.name} {house}"))
+    timed("точный адрес с городом", lambda: gazetteer.geocode(f"{street.city}, {street.name}, {house}"))
+    timed("нет такого дома", lambda: gazetteer.geocode(f"{street.name} 999"))
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,293 @@
+"""
+Стенд для utils/geocoding: локальный заменитель Mapbox + проверки и замеры.
+
+    cd bot && python bench_geocoding.py [пользователей] [задержка_соединения_мс]
+
+Поднимает HTTP-сервер на 127.0.0.1, который отвечает в формате Mapbox places API
+по небольшому справочнику адресов, считает соединения и запросы и добавляет задержку
+на каждое новое соединение (имитация TCP+TLS рукопожатия). Сначала проверяет поведение
+кэша (нормализация ключа, язык, TTL, ошибки не кэшируются), single-flight,
+переиспользование по префиксу и токен-бакет, затем сравнивает набор адреса «по буквам»
+несколькими пользователями: новый AsyncClient на запрос (как было), общий клиент
+с single-flight без кэша и общий клиент с кэшем и префиксами.
+"""
+import os
+import sys
+import re
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, unquote, parse_qs
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+CONNECT_DELAY = (float(sys.argv[2]) if len(sys.argv) > 2 else 30.0) / 1000
+RESPONSE_DELAY = 0.005
+
+ADDRESSES = ["Сочи, Курортный проспект 75", "Сочи, улица Навагинская 9", "Адлер, улица Ленина 219"]
+
+# Справочник стенда: ответ — адреса, где каждое слово запроса начинает какое-то слово адреса
+GAZETTEER = ADDRESSES + [
+    "Сочи, Курортный проспект 18", "Сочи, Курортный проспект 103", "Сочи, улица Навагинская 16",
+    "Сочи, улица Несебрская 6", "Адлер, улица Ленина 50", "Адлер, улица Кирова 28",
+    "Сочи, улица Виноградная 22", "Хоста, улица Платановая 1", "Сочи, Курортный переулок 3",
+]
+WORD_RE = re.compile(r"\w+")
+
+
+def stub_search(query: str, limit: int) -> list:
+    tokens = WORD_RE.findall(query.lower())
+    found = []
+    for n, address in enumerate(GAZETTEER):
+        words = WORD_RE.findall(address.lower())
+        if tokens and all(any(w.startswith(t) for w in words) for t in tokens):
+            found.append((n, address))
+    return found[:limit]
+
+
+class StubMapboxHandler(BaseHTTPRequestHandler):
+    """GET /<query>.json -> features; запрос «fail» отвечает 500"""
+    protocol_version = "HTTP/1.1"
+    counters = {"connections": 0, "requests": 0}
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            self.counters["connections"] += 1
+        time.sleep(CONNECT_DELAY)
+
+    def do_GET(self):
+        with self.lock:
+            self.counters["requests"] += 1
+        time.sleep(RESPONSE_DELAY)
+        parsed = urlparse(self.path)
+        query = unquote(parsed.path.rsplit("/", 1)[-1])[:-len(".json")]
+        params = parse_qs(parsed.query)
+        if query == "fail":
+            body, status = b'{"message": "stub error"}', 500
+        else:
+            limit = int(params.get("limit", ["3"])[0])
+            language = params.get("language", ["ru"])[0]
+            country = "Россия" if language == "ru" else "Russia"
+            features = [
+                {"place_name": f"{country}, {address}", "center": [39.7 + n / 100, 43.6 + n / 100]}
+                for n, address in stub_search(query, limit)
+            ]
+            body, status = json.dumps({"features": features}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubMapboxHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+server = start_stub_server()
+os.environ["MAPBOX_URL"] = f"http://127.0.0.1:{server.server_port}"
+os.environ.setdefault("MAPBOX_TOKEN", "pk.stub")
+# по http:// HTTP/2 без TLS не согласуется — стенд меряет keep-alive HTTP/1.1
+os.environ["MAPBOX_HTTP2"] = "false"
+# токен-бакет проверяется отдельно, замеры идут без него
+os.environ["MAPBOX_RATE_LIMIT"] = "0"
+# локальный справочник выключен: стенд меряет путь через Mapbox
+os.environ["GAZETTEER_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+from utils import geocoding  # noqa: E402
+
+
+def reset_counters():
+    with StubMapboxHandler.lock:
+        StubMapboxHandler.counters.update(connections=0, requests=0)
+
+
+async def query_mapbox_new_client(query: str, limit: int = 3, autocomplete: bool = True, language: str = "ru"):
+    """Прежняя реализация: новый AsyncClient (и соединение) на каждый вызов"""
+    params = {"access_token": geocoding.MAPBOX_TOKEN, "autocomplete": str(autocomplete).lower(),
+              "limit": limit, "language": language}
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{geocoding.MAPBOX_URL}/{query}.json", params=params)
+        if response.status_code == 200:
+            return response.json().get("features", [])
+        return []
+
+
+async def check_cache():
+    geocoding._cache = geocoding.TTLCache(100, 60)
+    reset_counters()
+
+    first = await geocoding.autocomplete_address("Сочи Курортный")
+    second = await geocoding.autocomplete_address("  сочи   КУРОРТНЫЙ ")
+    assert first == second and first, "нормализованный запрос должен браться из кэша"
+    second[0]["label"] = "mutated"
+    assert (await geocoding.autocomplete_address("сочи курортный"))[0]["label"] != "mutated", \
+        "вызывающий не должен портить закэшированный ответ"
+    assert StubMapboxHandler.counters["requests"] == 1
+
+    english = await geocoding.autocomplete_address("Сочи Курортный", language="en")
+    assert english == [], "язык входит в ключ кэша (en-ответ стенда не начинается с «Россия»)"
+    assert StubMapboxHandler.counters["requests"] == 2
+
+    coords = await geocoding.geocode_address("Сочи, Навагинская 9")
+    assert coords == await geocoding.geocode_address("сочи, навагинская 9")
+    assert StubMapboxHandler.counters["requests"] == 3
+
+    assert await geocoding.autocomplete_address("fail") == []
+    assert await geocoding.autocomplete_address("fail") == []
+    assert StubMapboxHandler.counters["requests"] == 5, "ошибки Mapbox не кэшируются"
+
+    geocoding._cache = geocoding.TTLCache(100, 0.05)
+    await geocoding.geocode_address("Адлер")
+    await asyncio.sleep(0.1)
+    await geocoding.geocode_address("Адлер")
+    assert StubMapboxHandler.counters["requests"] == 7, "запись должна истечь по TTL"
+
+    geocoding._cache = geocoding.TTLCache(2, 60)
+    for address in ("a", "b", "a", "c"):
+        await geocoding.geocode_address(address)
+    reset_counters()
+    await geocoding.geocode_address("a")
+    await geocoding.geocode_address("b")
+    assert StubMapboxHandler.counters["requests"] == 1, "LRU вытесняет давно не использованный ключ"
+    print("✅ кэш: нормализация, язык, ошибки, TTL, LRU")
+
+
+async def check_single_flight():
+    geocoding._cache = geocoding.TTLCache(100, 60)
+    reset_counters()
+    results = await asyncio.gather(*(geocoding.autocomplete_address("Сочи Нес") for _ in range(10)))
+    assert all(r == results[0] for r in results) and results[0]
+    assert StubMapboxHandler.counters["requests"] == 1, "10 одинаковых запросов — один вызов Mapbox"
+
+    # отмена первого клиента не отменяет запрос для остальных
+    first = asyncio.ensure_future(geocoding.geocode_address("Хоста"))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(geocoding.geocode_address("Хоста"))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second is not None
+    assert not geocoding._inflight
+    print("✅ single-flight: одинаковые запросы объединяются, отмена клиента не мешает остальным")
+
+
+async def check_prefix_reuse():
+    geocoding._cache = geocoding.TTLCache(100, 60)
+    reset_counters()
+    broad = await geocoding.autocomplete_address("Адлер")
+    assert len(broad) == 3 and StubMapboxHandler.counters["requests"] == 1
+    # ответ на «Адлер» полный (3 = лимит) — уточнение идёт в Mapbox
+    await geocoding.autocomplete_address("Адлер ул")
+    assert StubMapboxHandler.counters["requests"] == 2
+
+    exhaustive = await geocoding.autocomplete_address("Сочи Нав")
+    assert len(exhaustive) == 2
+    narrowed = await geocoding.autocomplete_address("Сочи Навагинская 1")
+    assert [s["label"] for s in narrowed] == ["Россия, Сочи, улица Навагинская 16"]
+    assert StubMapboxHandler.counters["requests"] == 3, "уточнение исчерпывающего ответа — без Mapbox"
+    assert narrowed == await query_autocomplete_uncached("Сочи Навагинская 1")
+
+    # пустой ответ на префикс не исчерпывающий — уточнение снова идёт в Mapbox
+    reset_counters()
+    assert await geocoding.autocomplete_address("Ялта") == []
+    await geocoding.autocomplete_address("Ялта ул")
+    assert StubMapboxHandler.counters["requests"] == 2, "пустой префикс не переиспользуется"
+    print("✅ префикс: уточнение исчерпывающего ответа обслуживается из кэша и совпадает с Mapbox, "
+          "пустой ответ не переиспользуется")
+
+
+async def query_autocomplete_uncached(query: str):
+    saved = geocoding._cache
+    geocoding._cache = geocoding.TTLCache(0, 0)
+    try:
+        return await geocoding.autocomplete_address(query)
+    finally:
+        geocoding._cache = saved
+
+
+async def check_rate_limit():
+    geocoding._cache = geocoding.TTLCache(0, 0)
+    saved_bucket, saved_wait = geocoding._bucket, geocoding.MAPBOX_RATE_WAIT
+    reset_counters()
+    limited_before = geocoding.metrics()["rate_limited"]
+
+    # запас 2 токена, пополнение 1/с, ждать нельзя: третий запрос к Mapbox не уходит
+    geocoding._bucket = geocoding.TokenBucket(rate=1, capacity=2)
+    geocoding.MAPBOX_RATE_WAIT = 0
+    for n in range(3):
+        await geocoding.geocode_address(f"Сочи {n}")
+    assert StubMapboxHandler.counters["requests"] == 2, StubMapboxHandler.counters
+    assert geocoding.metrics()["rate_limited"] - limited_before == 1
+
+    # 20 токенов/с без запаса: второй запрос дожидается токена (~50 мс)
+    geocoding._bucket = geocoding.TokenBucket(rate=20, capacity=1)
+    geocoding.MAPBOX_RATE_WAIT = 1.0
+    start = time.perf_counter()
+    await geocoding.geocode_address("Сочи 3")
+    await geocoding.geocode_address("Сочи 4")
+    assert time.perf_counter() - start >= 0.04
+    assert StubMapboxHandler.counters["requests"] == 4
+
+    geocoding._bucket, geocoding.MAPBOX_RATE_WAIT = saved_bucket, saved_wait
+    print("✅ токен-бакет: запас, ожидание токена, пропуск при исчерпании квоты")
+
+
+async def typing_session(autocomplete):
+    """Каждый пользователь набирает все адреса по буквам (от 3 символов), как в web app"""
+    async def user():
+        for address in ADDRESSES:
+            for end in range(3, len(address) + 1):
+                await autocomplete(address[:end])
+    await asyncio.gather(*(user() for _ in range(USERS)))
+
+
+async def timed(title: str, autocomplete):
+    reset_counters()
+    start = time.perf_counter()
+    await typing_session(autocomplete)
+    elapsed = time.perf_counter() - start
+    counters = StubMapboxHandler.counters
+    print(f"  {title:<32} {elapsed * 1000:8.0f} мс  запросов к Mapbox: {counters['requests']:5d}"
+          f"  соединений: {counters['connections']:5d}")
+
+
+async def bench():
+    await check_cache()
+    await check_single_flight()
+    await check_prefix_reuse()
+    await check_rate_limit()
+
+    keystrokes = USERS * sum(len(a) - 2 for a in ADDRESSES)
+    print(f"\n⏱  {USERS} пользователей, {keystrokes} нажатий, рукопожатие {CONNECT_DELAY * 1000:.0f} мс\n")
+
+    async def old_autocomplete(query):
+        return await query_mapbox_new_client(query)
+
+    await timed("новый клиент на запрос", old_autocomplete)
+
+    await geocoding.start_http_client()
+    geocoding._cache = geocoding.TTLCache(0, 0)
+    await timed("общий клиент + single-flight", geocoding.autocomplete_address)
+
+    geocoding._cache = geocoding.TTLCache(geocoding.GEOCODE_CACHE_SIZE, geocoding.GEOCODE_CACHE_TTL)
+    geocoding._metrics.update(dict.fromkeys(geocoding._metrics, 0))
+    await timed("общий клиент + кэш + префиксы", geocoding.autocomplete_address)
+    print(f"  метрики: {geocoding.metrics()}")
+    await geocoding.close_http_client()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(bench())
+    finally:
+        server.shutdown()
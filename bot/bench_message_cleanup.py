@@ -0,0 +1,102 @@
+"""
+Бенчмарк удаления сообщений (utils/message_tricks.py) на имитации Telegram.
+
+    cd bot && python bench_message_cleanup.py [сообщений] [задержка ответа, мс]
+
+Как после показа каталога: N карточек в чате, часть id уже удалена (BadRequest).
+Сравнивается прежний цикл delete_message, параллельное удаление, deleteMessages
+(бот PTB >= 20.8) и время, на которое cleanup_messages задерживает обработчик.
+"""
+import sys
+import time
+import random
+import asyncio
+from types import SimpleNamespace
+
+from telegram.error import BadRequest
+
+from utils.message_tricks import add_message_to_cleanup, cleanup_messages, delete_messages
+
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+LATENCY = (int(sys.argv[2]) if len(sys.argv) > 2 else 80) / 1000
+CHAT_ID = 42
+
+
+class FakeBot:
+    def __init__(self):
+        self.rnd = random.Random(2)
+        self.messages = set(range(1, MESSAGES + 1))
+        self.messages -= set(self.rnd.sample(sorted(self.messages), max(MESSAGES // 10, 1)))
+        self.calls = 0
+
+    async def delete_message(self, chat_id, message_id):
+        self.calls += 1
+        await asyncio.sleep(LATENCY * self.rnd.uniform(0.7, 1.3))
+        if message_id not in self.messages:
+            raise BadRequest("Message to delete not found")
+        self.messages.discard(message_id)
+        return True
+
+
+class FakeBulkBot(FakeBot):
+    async def delete_messages(self, chat_id, message_ids):
+        self.calls += 1
+        await asyncio.sleep(LATENCY * self.rnd.uniform(0.7, 1.3))
+        self.messages -= set(message_ids)
+        return True
+
+
+class FakeApplication:
+    def __init__(self):
+        self.tasks = []
+
+    def create_task(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.append(task)
+        return task
+
+
+async def old_cleanup(bot):
+    for msg_id in range(1, MESSAGES + 1):
+        try:
+            await bot.delete_message(CHAT_ID, msg_id)
+        except BadRequest:
+            pass
+
+
+def report(title: str, elapsed: float, bot: FakeBot):
+    print(f"  {title:<34} {elapsed * 1000:8.1f} мс   запросов {bot.calls:3d}   осталось {len(bot.messages)}")
+
+
+async def bench():
+    ids = list(range(1, MESSAGES + 1))
+    print(f"🧹 {MESSAGES} сообщений, ответ Telegram ~{LATENCY * 1000:.0f} мс\n")
+
+    bot = FakeBot()
+    start = time.perf_counter()
+    await old_cleanup(bot)
+    report("прежний цикл", time.perf_counter() - start, bot)
+
+    bot = FakeBot()
+    start = time.perf_counter()
+    await delete_messages(bot, CHAT_ID, ids)
+    report("delete_messages, параллельно", time.perf_counter() - start, bot)
+
+    bot = FakeBulkBot()
+    start = time.perf_counter()
+    await delete_messages(bot, CHAT_ID, ids)
+    report("delete_messages, deleteMessages", time.perf_counter() - start, bot)
+
+    bot = FakeBot()
+    context = SimpleNamespace(bot=bot, application=FakeApplication(), user_data={})
+    for msg_id in ids:
+        await add_message_to_cleanup(context, CHAT_ID, msg_id)
+    start = time.perf_counter()
+    await cleanup_messages(context)
+    report("cleanup_messages: ждёт обработчик", time.perf_counter() - start, bot)
+    await asyncio.gather(*context.application.tasks)
+    report("cleanup_messages: фон до конца", time.perf_counter() - start, bot)
+
+
+if __name__ == "__main__":
+    asyncio.run(bench())
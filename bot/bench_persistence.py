@@ -0,0 +1,115 @@
+"""
+Бенчмарк PostgresPersistence (utils/db_persistence.py) на N активных пользователях.
+
+    cd bot && python bench_persistence.py [пользователей]
+
+Нужна база из DATABASE_URL с применёнными миграциями; тестовые user_id берутся
+из диапазона, которого нет в Telegram, и удаляются в конце. Меряется:
+  * кодирование user_data (на event loop при каждом проходе Application);
+  * flush всех пользователей пачками: первая запись, повтор без изменений, 10% изменений;
+  * для сравнения — запись по одному пользователю с commit (как write-through);
+  * ленивая загрузка user_data после «рестарта».
+Если база недоступна, выполняется только часть без БД.
+"""
+import sys
+import time
+import random
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from db.db_async import get_async_session
+from db.models import BotUserData
+from utils.db_persistence import PostgresPersistence, encode_user_data
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+WRITE_THROUGH_USERS = min(USERS, 1000)
+LAZY_LOAD_USERS = min(USERS, 1000)
+BASE_ID = 9_000_000_000_000  # таких id у пользователей Telegram нет
+
+
+def user_data(rnd: random.Random) -> dict:
+    """Типичный user_data посреди оформления заказа"""
+    return {
+        "session_id": rnd.randint(1, 10**6),
+        "product_type_id": rnd.randint(1, 20),
+        "selected_size_id": rnd.randint(1, 200),
+        "product_messages": [rnd.randint(1, 10**6) for _ in range(rnd.randint(0, 15))],
+        "last_menu_message_id": rnd.randint(1, 10**6),
+        "messages_to_delete": [(rnd.randint(1, 10**9), rnd.randint(1, 10**6)) for _ in range(3)],
+        "event_date": date(2026, 10, rnd.randint(1, 28)),
+        "pending_comment_order_id": rnd.randint(1, 10**6),
+        "orders_cursor": f"{int(datetime(2026, 10, 1).timestamp() * 1e6)}_{rnd.randint(1, 10**6)}",
+    }
+
+
+def timed(title: str, elapsed: float, count: int):
+    print(f"  {title:<44} {elapsed * 1000:9.1f} мс  ({elapsed / count * 1e6:7.1f} мкс/польз.)")
+
+
+async def flush_round(persistence: PostgresPersistence, datas: dict) -> float:
+    for user_id, data in datas.items():
+        await persistence.update_user_data(user_id, data)
+    start = time.perf_counter()
+    await persistence.flush()
+    return time.perf_counter() - start
+
+
+async def bench():
+    rnd = random.Random(4)
+    ids = [BASE_ID + n for n in range(USERS)]
+    datas = {user_id: user_data(rnd) for user_id in ids}
+    print(f"👥 {USERS} активных пользователей\n")
+
+    start = time.perf_counter()
+    for user_id, data in datas.items():
+        encode_user_data(user_id, data)
+    timed("кодирование user_data", time.perf_counter() - start, USERS)
+
+    persistence = PostgresPersistence()
+    persistence._merged.update(ids)  # как будто все уже прошли refresh_user_data
+    try:
+        elapsed = await flush_round(persistence, datas)
+    except (OSError, ConnectionError) as e:
+        print(f"\n⚠️ база недоступна ({e}) — замеры с БД пропущены")
+        return
+
+    try:
+        timed(f"flush: первая запись (пачки по {persistence.batch_size})", elapsed, USERS)
+        timed("flush: без изменений", await flush_round(persistence, datas), USERS)
+
+        for user_id in rnd.sample(ids, USERS // 10):
+            datas[user_id]["selected_size_id"] += 1
+        timed("flush: изменилось 10%", await flush_round(persistence, datas), USERS)
+
+        start = time.perf_counter()
+        for user_id in ids[:WRITE_THROUGH_USERS]:
+            async with get_async_session() as session:
+                stmt = pg_insert(BotUserData).values(
+                    user_id=user_id, data=encode_user_data(user_id, datas[user_id]), updated_at=datetime.utcnow()
+                )
+                await session.execute(stmt.on_conflict_do_update(
+                    index_elements=[BotUserData.user_id], set_={"data": stmt.excluded.data}
+                ))
+                await session.commit()
+        timed(f"по одному с commit ({WRITE_THROUGH_USERS} польз.)", time.perf_counter() - start, WRITE_THROUGH_USERS)
+
+        restarted = PostgresPersistence()
+        start = time.perf_counter()
+        for user_id in ids[:LAZY_LOAD_USERS]:
+            loaded = {}
+            await restarted.refresh_user_data(user_id, loaded)
+            assert loaded["event_date"] == datas[user_id]["event_date"]
+            assert loaded["messages_to_delete"] == datas[user_id]["messages_to_delete"]
+        timed(f"ленивая загрузка ({LAZY_LOAD_USERS} польз.)", time.perf_counter() - start, LAZY_LOAD_USERS)
+        print(f"\n📊 {persistence.metrics}")
+    finally:
+        async with get_async_session() as session:
+            await session.execute(delete(BotUserData).where(BotUserData.user_id >= BASE_ID))
+            await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench())
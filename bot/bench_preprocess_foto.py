@@ -0,0 +1,130 @@
+"""
+Бенчмарк обработки фото товаров (utils/preprocess_foto.py).
+
+    cd bot && python bench_preprocess_foto.py [папка с фото] [число синтетических фото]
+
+Без папки генерируются синтетические JPEG 4032x3024 (как с камеры телефона).
+Сравнивается:
+  * прежний вариант: полное декодирование, crop + resize, прямо в event loop;
+  * crop_center_square с Image.draft — в event loop и в пуле процессов
+    (PHOTO_WORKERS, PHOTO_MAX_IN_FLIGHT, PHOTO_JPEG_QUALITY из окружения).
+Для каждого варианта — фото/с и максимальная задержка event loop
+(насколько «замирает» бот, пока обрабатываются фото).
+"""
+import asyncio
+import sys
+import time
+import random
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image as PILImage
+
+from utils.preprocess_foto import (
+    PHOTO_JPEG_QUALITY, PHOTO_MAX_IN_FLIGHT, PHOTO_WORKERS, TARGET_SIZE,
+    crop_center_square, process_photo_bytes, shutdown_photo_pool, _in_flight_limit
+)
+
+PHOTO_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+SYNTHETIC_SIZE = (4032, 3024)
+TICK = 0.005
+
+
+def crop_center_square_old(data: bytes, size: int = TARGET_SIZE, quality: int = PHOTO_JPEG_QUALITY) -> bytes:
+    """Прежняя обработка: без draft, кроп и ресайз отдельными шагами"""
+    img = PILImage.open(BytesIO(data)).convert("RGB")
+    width, height = img.size
+    min_dim = min(width, height)
+    left = (width - min_dim) // 2
+    top = (height - min_dim) // 2
+    img = img.crop((left, top, left + min_dim, top + min_dim)).resize((size, size), PILImage.LANCZOS)
+    output = BytesIO()
+    img.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+def load_photos(folder: str) -> list:
+    files = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in PHOTO_EXTENSIONS)
+    return [p.read_bytes() for p in files]
+
+
+def synthetic_photos(count: int) -> list:
+    """Градиент + шум: JPEG похож по размеру на фото с камеры"""
+    rnd = random.Random(5)
+    photos = []
+    base = PILImage.linear_gradient("L").resize(SYNTHETIC_SIZE)
+    for n in range(count):
+        noise = PILImage.effect_noise(SYNTHETIC_SIZE, rnd.uniform(20, 60))
+        img = PILImage.merge("RGB", (base, noise, base.rotate(90 * n, expand=False)))
+        if n % 2:
+            img = img.transpose(PILImage.Transpose.ROTATE_90)  # портретные тоже
+        output = BytesIO()
+        img.save(output, format="JPEG", quality=92)
+        photos.append(output.getvalue())
+    return photos
+
+
+async def measure(title: str, photos: list, run) -> list:
+    """Запускает run(), параллельно меряет задержку тиков event loop"""
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            expected = loop.time() + TICK
+            await asyncio.sleep(TICK)
+            max_lag = max(max_lag, loop.time() - expected)
+
+    ticks = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await run()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticks
+
+    avg_kb = sum(len(r) for r in results) / len(results) / 1024
+    print(f"  {title:<34} {len(photos) / elapsed:7.1f} фото/с   "
+          f"задержка loop до {max_lag * 1000:7.1f} мс   ~{avg_kb:.0f} КБ")
+    return results
+
+
+async def bench():
+    folder = sys.argv[1] if len(sys.argv) > 1 and Path(sys.argv[1]).is_dir() else None
+    count = int(sys.argv[-1]) if len(sys.argv) > 1 and sys.argv[-1].isdigit() else 24
+    photos = load_photos(folder) if folder else synthetic_photos(count)
+    if not photos:
+        print(f"В {folder} нет фото")
+        return
+    source_mb = sum(len(p) for p in photos) / 1024 / 1024
+    print(f"📷 {len(photos)} фото ({source_mb:.1f} МБ) из {folder or 'синтетики'}, "
+          f"выход {TARGET_SIZE}px q={PHOTO_JPEG_QUALITY}, воркеров {PHOTO_WORKERS}, в работе до {PHOTO_MAX_IN_FLIGHT}\n")
+
+    async def inline(func):
+        results = []
+        for data in photos:
+            results.append(func(data))
+            await asyncio.sleep(0)
+        return results
+
+    async def pooled():
+        async def one(data):
+            async with _in_flight_limit():
+                return await process_photo_bytes(data)
+        return await asyncio.gather(*(one(data) for data in photos))
+
+    await measure("прежний (без draft, в loop)", photos, lambda: inline(crop_center_square_old))
+    await measure("draft, в loop", photos, lambda: inline(crop_center_square))
+    # первый прогон пула включает запуск forkserver и воркеров
+    await measure("draft, пул (холодный)", photos, pooled)
+    results = await measure("draft, пул", photos, pooled)
+
+    sizes = {PILImage.open(BytesIO(r)).size for r in results}
+    print(f"\n✅ размеры результата: {sizes}")
+    shutdown_photo_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench())
@@ -0,0 +1,79 @@
+"""
+Бенчмарк планировщика маршрутов (utils/route_planner.py) на синтетических точках.
+
+    cd bot && python bench_route_planner.py [остановок ...]
+
+Точки равномерно в Большом Сочи, выезд с пасеки. Для каждого размера: время
+ближайшего соседа и 2-opt, длина маршрута до/после 2-opt; для сравнения —
+тот же 2-opt на чистом Python (только до 500 остановок).
+"""
+import sys
+import time
+import random
+
+import numpy as np
+
+from utils.route_planner import haversine_matrix, nearest_neighbour, two_opt, TWO_OPT_EPS
+
+# пасека, как DELIVERY_DEPOT_LAT/LON по умолчанию (без импорта БД-модулей)
+DELIVERY_DEPOT_LAT, DELIVERY_DEPOT_LON = 43.672805, 40.200094
+
+SIZES = [int(a) for a in sys.argv[1:]] or [50, 100, 300, 500, 1000]
+PURE_PYTHON_LIMIT = 500
+
+
+def two_opt_python(route, dist):
+    """Та же логика без векторизации — базовая линия"""
+    route = list(route)
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 2):
+            best, best_j = -TWO_OPT_EPS, None
+            a, b = route[i - 1], route[i]
+            for j in range(i + 1, n - 1):
+                c, d = route[j], route[j + 1]
+                delta = dist[a][c] + dist[b][d] - dist[a][b] - dist[c][d]
+                if delta < best:
+                    best, best_j = delta, j
+            if best_j is not None:
+                route[i:best_j + 1] = reversed(route[i:best_j + 1])
+                improved = True
+    return route
+
+
+def length(route, dist) -> float:
+    return float(sum(dist[route[k], route[k + 1]] for k in range(len(route) - 1)))
+
+
+def bench():
+    rnd = random.Random(3)
+    print(f"{'остановок':>9} {'матрица':>9} {'сосед':>9} {'2-opt':>9} {'py 2-opt':>9}   км: сосед -> 2-opt")
+    for n in SIZES:
+        lats = [DELIVERY_DEPOT_LAT] + [rnd.uniform(43.40, 43.70) for _ in range(n)]
+        lons = [DELIVERY_DEPOT_LON] + [rnd.uniform(39.70, 40.30) for _ in range(n)]
+
+        t0 = time.perf_counter()
+        dist = np.zeros((n + 2, n + 2))
+        dist[:n + 1, :n + 1] = haversine_matrix(lats, lons)
+        t1 = time.perf_counter()
+        route = nearest_neighbour(dist[:n + 1, :n + 1], start=0) + [n + 1]
+        t2 = time.perf_counter()
+        improved = two_opt(route, dist)
+        t3 = time.perf_counter()
+
+        py_ms = "—"
+        if n <= PURE_PYTHON_LIMIT:
+            dist_list = dist.tolist()
+            t4 = time.perf_counter()
+            two_opt_python(route, dist_list)
+            py_ms = f"{(time.perf_counter() - t4) * 1000:.0f} мс"
+
+        ms = lambda seconds: f"{seconds * 1000:.1f} мс"
+        print(f"{n:>9} {ms(t1 - t0):>9} {ms(t2 - t1):>9} {ms(t3 - t2):>9} {py_ms:>9}   "
+              f"{length(route, dist):.0f} -> {length(improved, dist):.0f}")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,145 @@
+"""
+Проверка и бенчмарк ChatOrderedUpdateProcessor (utils/update_processor.py).
+
+    cd bot && python bench_update_processor.py [апдейтов] [апдейтов/с]
+
+Апдейты подаются в обработчик так же, как это делает Application (задача на апдейт
+в порядке поступления). Нагрузка: покупатели в личных чатах жмут кнопки (запрос в БД
+2–8 мс, часть нажатий — подряд в том же чате), два менеджера открывают статистику
+(300 мс), часть покупателей пишет ещё и в админ-чат — у таких апдейтов общий
+пользователь с личным чатом.
+Для каждого варианта: время, задержка покупателя (поступил -> обработан) и нарушения
+порядка — апдейт чата/пользователя начался раньше, чем закончился предыдущий.
+Для ChatOrderedUpdateProcessor нарушений быть не должно (иначе код выхода 1),
+в том числе при всплеске, когда апдейтов больше max_pending.
+"""
+import sys
+import time
+import random
+import asyncio
+from collections import defaultdict
+
+from telegram import Update
+from telegram.ext import SimpleUpdateProcessor
+
+from utils.update_processor import ChatOrderedUpdateProcessor, lane_keys
+
+UPDATES = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+RATE = float(sys.argv[2]) if len(sys.argv) > 2 else 500
+CUSTOMERS = 300
+MANAGERS = (900001, 900002)
+ADMIN_CHAT_ID = -1001
+MANAGER_SHARE = 0.002
+ADMIN_SHARE = 0.05
+REPEAT_SHARE = 0.2  # следующее нажатие в том же чате (двойной тап, быстрый «➕»)
+
+
+def make_updates(rnd: random.Random) -> list:
+    updates = []
+    user_id = chat_id = 1
+    for update_id in range(1, UPDATES + 1):
+        roll = rnd.random()
+        if roll < REPEAT_SHARE and chat_id > 0 and user_id not in MANAGERS:
+            work = rnd.uniform(0.002, 0.008)
+        elif roll < REPEAT_SHARE + MANAGER_SHARE:
+            user_id = chat_id = rnd.choice(MANAGERS)
+            work = 0.3
+        elif roll < REPEAT_SHARE + MANAGER_SHARE + ADMIN_SHARE:
+            user_id, chat_id = rnd.randint(1, CUSTOMERS), ADMIN_CHAT_ID
+            work = rnd.uniform(0.002, 0.008)
+        else:
+            user_id = chat_id = rnd.randint(1, CUSTOMERS)
+            work = rnd.uniform(0.002, 0.008)
+        update = Update.de_json({"update_id": update_id, "callback_query": {
+            "id": str(update_id), "chat_instance": "bench", "data": "➕",
+            "from": {"id": user_id, "is_bot": False, "first_name": "bench"},
+            "message": {"message_id": update_id, "date": 0,
+                        "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"}}
+        }}, None)
+        updates.append((update, work))
+    return updates
+
+
+class Checker:
+    """Следит за порядком внутри очередей и собирает задержки"""
+
+    def __init__(self):
+        self.active = defaultdict(int)
+        self.last_started = {}
+        self.violations = 0
+        self.running = 0
+        self.max_running = 0
+        self.arrived = {}
+        self.latencies = []
+
+    async def handle(self, update: Update, work: float):
+        keys = lane_keys(update)
+        for key in keys:
+            if self.active[key] or self.last_started.get(key, 0) > update.update_id:
+                self.violations += 1
+            self.active[key] += 1
+            self.last_started[key] = update.update_id
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(work)
+        self.running -= 1
+        for key in keys:
+            self.active[key] -= 1
+        if update.effective_user.id not in MANAGERS:
+            self.latencies.append(time.perf_counter() - self.arrived[update.update_id])
+
+
+async def run(processor, updates: list, rate: float = RATE) -> Checker:
+    checker = Checker()
+    tasks = []
+    start = time.perf_counter()
+    async with processor:
+        for i, (update, work) in enumerate(updates):
+            # задержка считается от момента, когда апдейт пришёл бы, а не когда до него дошли
+            arrival = start + i / rate if rate else start
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            checker.arrived[update.update_id] = arrival
+            coroutine = checker.handle(update, work)
+            if processor.max_concurrent_updates > 1:
+                tasks.append(asyncio.create_task(processor.process_update(update, coroutine)))
+            else:
+                await processor.process_update(update, coroutine)
+        await asyncio.gather(*tasks)
+    checker.elapsed = time.perf_counter() - start
+    return checker
+
+
+def report(title: str, checker: Checker):
+    lat = sorted(checker.latencies)
+    p50 = lat[len(lat) // 2] * 1000
+    p95 = lat[int(len(lat) * 0.95)] * 1000
+    print(f"  {title:<36} {checker.elapsed:6.2f} с  покупатель p50 {p50:8.1f} мс, p95 {p95:8.1f} мс"
+          f"  одновременно {checker.max_running:3}  нарушений порядка {checker.violations}")
+
+
+async def bench():
+    updates = make_updates(random.Random(25))
+    print(f"📨 {UPDATES} апдейтов, {RATE:.0f}/с\n")
+    report("последовательно (по умолчанию)", await run(SimpleUpdateProcessor(1), updates))
+    report("concurrent_updates=True", await run(SimpleUpdateProcessor(256), updates))
+
+    failed = False
+    for title, processor, rate in (
+        ("по чатам, 16 слотов", ChatOrderedUpdateProcessor(16, 1000), RATE),
+        ("по чатам, всплеск, max_pending=64", ChatOrderedUpdateProcessor(16, 64), 0),
+    ):
+        checker = await run(processor, updates, rate)
+        report(title, checker)
+        failed |= checker.violations > 0 or checker.max_running > processor.concurrency
+        print(f"    {processor.metrics}")
+
+    if failed:
+        print("\n❌ порядок внутри чата/пользователя нарушен")
+        sys.exit(1)
+    print("\n✅ порядок внутри чатов и пользователей сохранён")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench())
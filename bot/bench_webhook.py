@@ -0,0 +1,276 @@
+"""
+Нагрузочный тест приёма апдейтов: run_polling против вебхука (utils/webhook.py).
+
+    cd bot && python bench_webhook.py [апдейтов] [соединений к вебхуку] [апдейтов/с в потоке]
+
+В отдельном процессе поднимается имитация Bot API (getMe, getUpdates с long polling,
+sendMessage); в режиме вебхука апдейты шлёт ещё один процесс — параллельными
+POST-запросами с секретным заголовком, повторяя их при 503, как Telegram.
+Бот отвечает на каждое сообщение через sendMessage. Сценарии: всплеск (все апдейты
+сразу) и ровный поток. Для каждого: апдейтов/с от первого до последнего обработанного и задержка
+«апдейт появился у Telegram -> обработчик».
+"""
+import sys
+import json
+import time
+import asyncio
+import socket
+import subprocess
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import uvicorn
+import uvloop
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+from utils.webhook import _DrainingServer, build_webhook_app
+
+UPDATES = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 3000
+CONNECTIONS = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else 40
+RATE = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3].isdigit() else 200
+# всплеск (накопленные апдейты, например после простоя) и ровный поток
+SCENARIOS = [("всплеск", 0), (f"поток {RATE}/с", RATE)]
+TOKEN = "123456:bench"
+SECRET = "bench-secret"
+CHATS = 200
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---------- имитация Bot API и отправитель вебхуков (отдельные процессы) ----------
+
+def make_update(update_id: int) -> dict:
+    """Апдейт с моментом появления в тексте"""
+    chat = {"id": 1000 + update_id % CHATS, "type": "private"}
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "chat": chat,
+        "from": {"id": chat["id"], "is_bot": False, "first_name": "bench"},
+        "text": repr(time.time())
+    }}
+
+
+async def paced(n: int, rate: float):
+    """Номера 0..n-1 в темпе rate в секунду (0 — все сразу)"""
+    start = time.perf_counter()
+    for i in range(n):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield i
+
+
+def stand_in_app() -> Starlette:
+    pending = []
+    next_id = [1]
+    arrived = asyncio.Event()
+
+    async def bot_api(request: Request) -> JSONResponse:
+        method = request.path_params["method"]
+        params = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getUpdates":
+            offset = int(params.get("offset", 0))
+            pending[:] = [u for u in pending if u["update_id"] >= offset]
+            if not pending:
+                arrived.clear()
+                try:
+                    await asyncio.wait_for(arrived.wait(), float(params.get("timeout", 0)) or 0.01)
+                except asyncio.TimeoutError:
+                    pass
+            result = pending[:int(params.get("limit", 100))]
+        elif method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            result = {"message_id": 1, "date": int(time.time()),
+                      "chat": {"id": chat_id, "type": "private"}, "text": params.get("text", "")}
+        else:
+            result = True
+        return JSONResponse({"ok": True, "result": result})
+
+    async def enqueue(request: Request) -> JSONResponse:
+        n, rate = int(request.query_params["n"]), float(request.query_params["rate"])
+
+        async def produce():
+            async for _ in paced(n, rate):
+                pending.append(make_update(next_id[0]))
+                next_id[0] += 1
+                arrived.set()
+
+        asyncio.get_running_loop().create_task(produce())
+        return JSONResponse({"ok": True})
+
+    return Starlette(routes=[
+        Route("/bot{token}/{method}", bot_api, methods=["POST", "GET"]),
+        Route("/control/enqueue", enqueue, methods=["POST"]),
+    ])
+
+
+def run_stand_in(port: int):
+    uvicorn.run(stand_in_app(), host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+async def push_updates(url: str, n: int, connections: int, rate: float):
+    """
+    Как Telegram: до connections keep-alive соединений, по одному запросу на каждом,
+    повтор при 503. HTTP вручную — httpx сам упирается в ~250 запросов/с.
+    """
+    parsed = urlsplit(url)
+    start = time.perf_counter()
+    next_id = [0]
+
+    async def worker():
+        reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port)
+        try:
+            while next_id[0] < n:
+                i = next_id[0]
+                next_id[0] += 1
+                if rate:
+                    delay = start + i / rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                body = json.dumps(make_update(i + 1)).encode()
+                while True:
+                    writer.write(
+                        f"POST {parsed.path} HTTP/1.1\r\nHost: {parsed.netloc}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                        f"X-Telegram-Bot-Api-Secret-Token: {SECRET}\r\n\r\n".encode() + body
+                    )
+                    head = (await reader.readuntil(b"\r\n\r\n")).decode().lower()
+                    length = int(head.split("content-length:", 1)[1].split("\r\n", 1)[0])
+                    await reader.readexactly(length)
+                    if head.split(" ", 2)[1] != "503":
+                        break
+                    await asyncio.sleep(0.05)
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(worker() for _ in range(connections)))
+
+
+# ---------- бот ----------
+
+class Counter:
+    def __init__(self):
+        self.latencies = []
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    def reset(self, expected: int):
+        self.latencies = []
+        self.expected = expected
+        self.first = self.last = 0.0
+        self.done.clear()
+
+    async def handle(self, update, context):
+        now = time.time()
+        self.first = self.first or now
+        self.latencies.append(now - float(update.message.text))
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="ok")
+        if len(self.latencies) >= self.expected:
+            self.last = time.time()
+            self.done.set()
+
+
+def report(title: str, counter: Counter):
+    # темп — от первого апдейта до конца последнего: запуск отправителя не в счёт
+    elapsed = counter.last - counter.first
+    lat = sorted(counter.latencies)
+    p50 = lat[len(lat) // 2] * 1000
+    p95 = lat[int(len(lat) * 0.95)] * 1000
+    print(f"  {title:<34} {len(lat) / elapsed:8.0f} апд./с   задержка p50 {p50:8.1f} мс, p95 {p95:8.1f} мс")
+
+
+def build_application(api_port: int, counter: Counter):
+    application = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .base_url(f"http://127.0.0.1:{api_port}/bot")
+        .update_queue(asyncio.Queue(maxsize=1000))
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.TEXT, counter.handle))
+    return application
+
+
+async def measure(title: str, counter: Counter, deliver):
+    counter.reset(UPDATES)
+    await deliver()
+    await counter.done.wait()
+    report(title, counter)
+
+
+async def bench_polling(api: httpx.AsyncClient, api_port: int):
+    counter = Counter()
+    application = build_application(api_port, counter)
+    async with application:
+        await application.updater.start_polling(poll_interval=0, timeout=10)
+        await application.start()
+        for name, rate in SCENARIOS:
+            await measure(f"polling, {name}", counter, lambda: api.post(
+                "/control/enqueue", params={"n": UPDATES, "rate": rate}
+            ))
+        await application.updater.stop()
+        await application.stop()
+
+
+async def bench_webhook(api_port: int):
+    counter = Counter()
+    application = build_application(api_port, counter)
+    port = free_port()
+    webhook_app = build_webhook_app(application, "/telegram", SECRET, ["message", "callback_query"])
+    server = _DrainingServer(uvicorn.Config(
+        webhook_app, host="127.0.0.1", port=port, lifespan="off", access_log=False, log_level="warning"
+    ))
+    async with application:
+        await application.start()
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        for name, rate in SCENARIOS:
+            async def deliver():
+                await asyncio.create_subprocess_exec(
+                    sys.executable, __file__, "--push", f"http://127.0.0.1:{port}/telegram",
+                    str(UPDATES), str(CONNECTIONS), str(rate)
+                )
+            await measure(f"webhook x{CONNECTIONS}, {name}", counter, deliver)
+        server.should_exit = True
+        await serving
+        await application.stop()
+    print(f"\n📊 вебхук: {webhook_app.state.metrics}")
+
+
+async def bench():
+    api_port = free_port()
+    stand_in = subprocess.Popen([sys.executable, __file__, "--stand-in", str(api_port)])
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{api_port}") as api:
+            for _ in range(100):
+                try:
+                    await api.post(f"/bot{TOKEN}/getMe")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            print(f"📨 {UPDATES} апдейтов на сценарий, ответ sendMessage на каждый\n")
+            await bench_polling(api, api_port)
+            await bench_webhook(api_port)
+    finally:
+        stand_in.terminate()
+        stand_in.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--stand-in":
+        run_stand_in(int(sys.argv[2]))
+    elif len(sys.argv) > 5 and sys.argv[1] == "--push":
+        uvloop.run(push_updates(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), float(sys.argv[5])))
+    else:
+        uvloop.run(bench())
@@ -0,0 +1,61 @@
+"""
+Сборка локального справочника адресов (utils/gazetteer.py) из выгрузки OpenStreetMap.
+
+    cd bot && python build_gazetteer.py export.json [data/gazetteer.csv]
+
+export.json — ответ Overpass API (https://overpass-turbo.eu, «Экспорт → данные»), например:
+
+    [out:json][timeout:120];
+    area["name"="городской округ Сочи"]->.a;
+    nwr(area.a)["addr:street"]["addr:housenumber"];
+    out center;
+
+Город берётся из addr:city (или addr:place / addr:suburb), без него — «Сочи».
+Для ways/relations координаты — центр из `out center`. Повторы (один дом несколькими
+объектами) схлопываются. Справочник читается ботом при старте API, сеть не нужна.
+"""
+import sys
+import csv
+import json
+from pathlib import Path
+
+DEFAULT_CITY = "Сочи"
+SOURCE = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+TARGET = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(__file__).resolve().parent / "data" / "gazetteer.csv"
+
+
+def iter_addresses(elements):
+    for element in elements:
+        tags = element.get("tags", {})
+        street, house = tags.get("addr:street"), tags.get("addr:housenumber")
+        if not street or not house:
+            continue
+        point = element if "lat" in element else element.get("center")
+        if not point:
+            continue
+        city = tags.get("addr:city") or tags.get("addr:place") or tags.get("addr:suburb") or DEFAULT_CITY
+        yield city.strip(), street.strip(), house.strip(), round(point["lat"], 6), round(point["lon"], 6)
+
+
+def build():
+    if SOURCE is None:
+        print(__doc__)
+        sys.exit(1)
+    elements = json.loads(SOURCE.read_text(encoding="utf-8")).get("elements", [])
+
+    rows = {}
+    for city, street, house, lat, lon in iter_addresses(elements):
+        rows.setdefault((city, street, house.lower()), (city, street, house, lat, lon))
+
+    TARGET.parent.mkdir(parents=True, exist_ok=True)
+    with open(TARGET, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["city", "street", "house", "lat", "lon"])
+        writer.writerows(sorted(rows.values()))
+
+    streets = {(city, street) for city, street, _ in rows}
+    print(f"✅ {TARGET}: {len(rows)} домов, {len(streets)} улиц (объектов в выгрузке: {len(elements)})")
+
+
+if __name__ == "__main__":
+    build()
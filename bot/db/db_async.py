@@ -1,7 +1,8 @@
-
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
+import time
 
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -11,11 +12,96 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not (DATABASE_URL):
     raise RuntimeError("DATABASE_URL are not set in environment variables")
 
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_echo(name: str = "DB_ECHO"):
+    """DB_ECHO: off (по умолчанию) | true — SQL‑логгинг | debug — ещё и строки результатов"""
+    value = (os.getenv(name) or "").strip().lower()
+    if value == "debug":
+        return "debug"
+    return value in ("1", "true", "yes", "on", "info")
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который считает время ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.checkout_count += 1
+            self.wait_time_total += waited
+            if waited > self.wait_time_max:
+                self.wait_time_max = waited
+
+
+def create_engine_from_env(url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Создаёт async‑движок, настроенный переменными окружения:
+      DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (сек), DB_POOL_RECYCLE (сек),
+      DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE (кэш подготовленных выражений asyncpg),
+      DB_ECHO (off | true | debug).
+    """
+    connect_args = {}
+    statement_cache_size = os.getenv("DB_STATEMENT_CACHE_SIZE")
+    if statement_cache_size not in (None, "") and "asyncpg" in url:
+        # 0 — отключить кэш (нужно за pgbouncer в transaction‑режиме)
+        connect_args["statement_cache_size"] = int(statement_cache_size)
+        connect_args["prepared_statement_cache_size"] = int(statement_cache_size)
+
+    return create_async_engine(
+        url,
+        echo=_env_echo(),
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=_env_int("DB_POOL_SIZE", 5),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+        pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+        pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+        pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+        connect_args=connect_args,
+    )
+
+
 # Двигаем SQLAlchemy в async‑режим
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True                # включить SQL‑логгинг
-)
+engine = create_engine_from_env()
+
+
+def get_pool_stats() -> dict:
+    """Состояние пула соединений: занято, переполнение, время ожидания соединения"""
+    pool = engine.pool
+    stats = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, TimedAsyncAdaptedQueuePool):
+        count = pool.checkout_count
+        stats.update({
+            "checkouts": count,
+            "wait_avg_ms": round(pool.wait_time_total / count * 1000, 2) if count else 0.0,
+            "wait_max_ms": round(pool.wait_time_max * 1000, 2),
+        })
+    return stats
 
 
 # factory для сессий
@@ -14,17 +14,23 @@ from .product_sizes import ProductSize
 from .order_statuses import OrderStatus
 from .orders import Order
 from .order_packages import OrderPackage
+from .order_stats_daily import OrderStatsDaily
 
 from .delivery_intervals import DeliveryInterval
 from .delivery_zones import DeliveryZone
 from .delivery_statuses import DeliveryStatus
 from .order_delivery import OrderDelivery
 
+from .broadcasts import BroadcastCampaign, BroadcastRecipient
+from .bot_persistence import BotUserData, BotConversation
+
 
 __all__ = ["Source","User", "Role", "Session",
      "ProductType","Product", "Size",
     "Package", 
     "ProductSize", "Image","ProductsizeImage","OrderPackage",
-    "OrderStatus", "Order",
-    "DeliveryInterval","DeliveryZone","OrderDelivery","DeliveryStatus"
+    "OrderStatus", "Order", "OrderStatsDaily",
+    "DeliveryInterval","DeliveryZone","OrderDelivery","DeliveryStatus",
+    "BroadcastCampaign","BroadcastRecipient",
+    "BotUserData","BotConversation"
 ]
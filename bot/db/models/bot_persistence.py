@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, BIGINT, text
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from db.db import Base
+
+
+class BotUserData(Base):
+    """context.user_data пользователя бота (utils/db_persistence.py)"""
+    __tablename__ = "bot_user_data"
+    __table_args__ = {"schema": "public"}
+
+    user_id = Column(BIGINT, primary_key=True)
+    data = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class BotConversation(Base):
+    """Состояние ConversationHandler: name — имя диалога, key — JSON ключа (chat_id, user_id)"""
+    __tablename__ = "bot_conversations"
+    __table_args__ = {"schema": "public"}
+
+    name = Column(String(64), primary_key=True)
+    key = Column(String(64), primary_key=True)
+    state = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,63 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    SmallInteger,
+    Index,
+    text,
+    BIGINT
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from db.db import Base
+
+
+class BroadcastCampaign(Base):
+    """Рассылка: текст и снимок получателей на момент запуска; status running -> done"""
+    __tablename__ = "broadcast_campaigns"
+    __table_args__ = (
+        Index("ix_broadcast_campaigns_running", "id", postgresql_where=text("status = 'running'")),
+        {"schema": "public"},
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    message_text = Column(Text, nullable=False)
+    parse_mode = Column(String(20), nullable=True)
+    params = Column(JSONB, nullable=True)
+    created_by = Column(BIGINT, nullable=True)  # кому слать отчёт о ходе рассылки
+    status = Column(String(20), nullable=False, server_default=text("'running'"))
+    total = Column(Integer, nullable=False, server_default=text("0"))
+    sent = Column(Integer, nullable=False, server_default=text("0"))
+    failed = Column(Integer, nullable=False, server_default=text("0"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    recipients = relationship("BroadcastRecipient", back_populates="campaign")
+
+    def __repr__(self):
+        return f"<BroadcastCampaign(id={self.id}, kind='{self.kind}', status='{self.status}')>"
+
+
+class BroadcastRecipient(Base):
+    """Получатель рассылки; status NULL — ещё не отправлено (возобновление после падения)"""
+    __tablename__ = "broadcast_recipients"
+    __table_args__ = (
+        Index("ix_broadcast_recipients_pending", "campaign_id", "tg_user_id",
+              postgresql_where=text("status IS NULL")),
+        {"schema": "public"},
+    )
+
+    campaign_id = Column(Integer, ForeignKey("public.broadcast_campaigns.id", ondelete="CASCADE"),
+                         primary_key=True)
+    tg_user_id = Column(BIGINT, primary_key=True)
+    status = Column(String(20), nullable=True)  # sent | failed | blocked
+    attempts = Column(SmallInteger, nullable=False, server_default=text("0"))
+    error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    campaign = relationship("BroadcastCampaign", back_populates="recipients")
@@ -5,6 +5,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     String,
+    Index,
     text
 )
 from db.db import Base
@@ -14,7 +15,11 @@ from datetime import datetime
 
 class Image(Base):
     __tablename__ = "images"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        Index("ix_images_product_active_created", "product_id", "created_at",
+              postgresql_where=text("is_active IS TRUE")),
+        {"schema": "public"},
+    )
 
     id = Column(Integer, primary_key=True)
 
@@ -0,0 +1,28 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    Date,
+    ForeignKey,
+    Numeric,
+    text,
+    BIGINT,
+    Index
+)
+from db.db import Base
+
+
+class OrderStatsDaily(Base):
+    """Дневной агрегат заказов по товару и статусу — ведётся триггером на orders"""
+    __tablename__ = "order_stats_daily"
+    __table_args__ = (
+        Index("ix_order_stats_daily_seller", "seller_id", "status_id"),
+        {"schema": "public"},
+    )
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("public.products.id", ondelete="CASCADE"), primary_key=True)
+    status_id = Column(Integer, primary_key=True)
+    seller_id = Column(BIGINT, nullable=False)
+    orders_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    total_kg = Column(Numeric(12, 1), nullable=False, default=0, server_default=text("0"))
+    total_sum = Column(Numeric(14, 1), nullable=False, default=0, server_default=text("0"))
@@ -19,6 +19,13 @@ class Order(Base):
     __table_args__ = (
         CheckConstraint("drink_count > 0", name="check_drink_count_positive"),
         CheckConstraint("total_price >= 0", name="check_total_price_non_negative"),
+        # индексы горячих запросов (миграция a3c5e1d7b902)
+        Index("ix_orders_status_created_id", "status_id", "created_at", "id"),
+        Index("ix_orders_user_created_active", "tg_user_id", text("created_at DESC"),
+              postgresql_include=["status_id"], postgresql_where=text("is_active")),
+        Index("ix_orders_active_drafts", "updated_at",
+              postgresql_where=text("status_id = 8 AND is_active")),
+        Index("ix_orders_product_size_status", "product_size_id", "status_id"),
         {"schema": "public"}
     )
 
@@ -9,7 +9,8 @@ from sqlalchemy import (
     Numeric,
     CheckConstraint,
     text,
-    BIGINT
+    BIGINT,
+    Index
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -20,7 +21,11 @@ from decimal import Decimal
 
 class ProductSize(Base):
     __tablename__ = "product_sizes"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        Index("ix_product_sizes_product_active", "product_id", "price",
+              postgresql_where=text("is_active IS TRUE")),
+        {"schema": "public"},
+    )
 
     id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey("public.products.id", ondelete="CASCADE"), nullable=False)
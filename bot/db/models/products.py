@@ -9,7 +9,8 @@ from sqlalchemy import (
     Numeric,
     CheckConstraint,
     text,
-    BIGINT
+    BIGINT,
+    Index
 )
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
@@ -23,6 +24,7 @@ class Product(Base):
     __tablename__ = "products"
     __table_args__ = (
         CheckConstraint("quantity >= 0", name="check_quantity_nonnegative"),
+        Index("ix_products_created_by", "created_by"),
         {"schema": "public"}
         )
     id = Column(Integer, primary_key=True)
@@ -1,7 +1,7 @@
 import os
 from sqlalchemy import text
 import asyncio
-from db.db_async import get_async_session
+from db.db_async import get_async_session, get_pool_stats
 
 
 
@@ -22,6 +22,7 @@ async def check_db(context):
     except Exception as e:
         status_ok = False
 
+    pool = get_pool_stats()
 
     # ВСЕГДА отправляем статус, без проверки на изменение
     text_msg = (
@@ -29,9 +30,14 @@ async def check_db(context):
         if status_ok
         else "❄️ <b>База данных honeybot недоступна!</b>"
     )
-    
+    text_msg += (
+        f"\nПул: занято {pool['checked_out']}/{pool['pool_size']}"
+        f" (+{max(pool['overflow'], 0)} overflow)"
+    )
+    if "wait_avg_ms" in pool:
+        text_msg += f", ожидание avg {pool['wait_avg_ms']}мс / max {pool['wait_max_ms']}мс"
+
     try:
         await bot.send_message(chat_id=CHAT_ID, text=text_msg, parse_mode="HTML")
     except Exception as send_error:
         pass
-
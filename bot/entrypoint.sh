@@ -27,7 +27,7 @@ echo "[entrypoint] Postgres is ready"
 case "${1:-}" in
   bot)
     # Запускаем из рабочей директории /bot
-    exec python main.py
+    exec python run_bot.py
     ;;
   alembic)
     shift
@@ -1,6 +1,8 @@
 from handlers.AdminReplayUserProblemConversation import *
 
 admin_replay_handler = ConversationHandler(
+    name="admin_reply_problem",
+    persistent=True,
     entry_points=[CallbackQueryHandler(reply_callback, pattern="^reply_")],
     states={
         REPLY_WAITING: [
@@ -1,3 +1,4 @@
+import logging
 from telegram import (
     Update,
     InlineKeyboardButton,
@@ -37,6 +38,8 @@ from utils.logging_config import (
 
 import os 
 
+console = logging.getLogger(__name__)
+
 ADMIN_CHAT_ID = os.getenv("ADMIN_CHAT_ID")
 if not (ADMIN_CHAT_ID):
     raise RuntimeError("Admin chat id did not set in environment variables")
@@ -105,7 +108,7 @@ async def booking_decline_reason(update: Update, context: ContextTypes.DEFAULT_T
             .where(Order.id == order_id)
         )
         order = result.scalar_one_or_none()
-        print(f"DEBUG_cancel: booking_id = {order.id}, status = {order.status.name}, status_id = {order.status_id}")
+        console.debug("cancel: booking_id = %s, status = %s, status_id = %s", order.id, order.status.name, order.status_id)
         if not order:
             await update.message.reply_text("❌ Бронирование не найдено.", reply_markup=ReplyKeyboardRemove())
             return ConversationHandler.END
@@ -1,6 +1,8 @@
 from handlers.DeclineCancelOrderConversation import *
 
 conv_decline_cancel = ConversationHandler(
+    name="decline_cancel_order",
+    persistent=True,
     entry_points=[CallbackQueryHandler(booking_decline_callback, pattern=r"^decline_order_\d+$")],
     states={
         DECLINE_REASON: [MessageHandler(filters.TEXT & ~filters.COMMAND, booking_decline_reason)]
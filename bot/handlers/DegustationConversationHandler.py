@@ -1,3 +1,4 @@
+import logging
 from telegram import (
     ReplyKeyboardMarkup, 
     KeyboardButton, 
@@ -19,6 +20,8 @@ from utils.logging_config import structured_logger, LoggingContext
 from utils.user_session_lastorder import get_user_by_tg_id, create_session
 from utils.message_tricks import add_message_to_cleanup, cleanup_messages, send_message
 
+console = logging.getLogger(__name__)
+
 
 DEG_PHOTO = "/bot/static/images/paseka.jpg"
 
@@ -91,7 +94,7 @@ async def show_degustation_info(update: Update, context: ContextTypes.DEFAULT_TY
 
 async def handle_show_map(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    print("DEBUG: handle_show_map triggered")
+    console.debug("handle_show_map triggered")
     await query.answer()
 
     # Отправляем встроенную карту
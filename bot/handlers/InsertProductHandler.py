@@ -1,6 +1,8 @@
 from handlers.InsertProductConversation import *
 
 insert_product_conv = ConversationHandler(
+    name="insert_product",
+    persistent=True,
     entry_points=[
         CommandHandler("honey_add", start_add_object),
         CallbackQueryHandler(start_add_object, pattern="^honey_add$")
@@ -1,6 +1,8 @@
 from handlers.InvitationConversation import *
 
 invitation = ConversationHandler(
+    name="invitation",
+    persistent=True,
     entry_points=[CallbackQueryHandler(honey_invite_start, pattern="^honey_invite$")],
     states={
             ASK_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, honey_invite_ask_date)],
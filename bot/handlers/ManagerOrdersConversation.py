@@ -1,3 +1,4 @@
+import logging
 from telegram import (
     ReplyKeyboardMarkup, 
     KeyboardButton, 
@@ -20,7 +21,7 @@ from sqlalchemy.orm import selectinload
 from datetime import timedelta, datetime
 from handlers.RegistrationConversation import route_after_login
 
-from utils.manager_lk_collection import fetch_seller_orders, prepare_owner_orders_cards, fetch_seller_products, get_manager_product_sizes_keyboard
+from utils.manager_lk_collection import fetch_seller_orders_page, prepare_owner_orders_cards, fetch_seller_products
 from utils.message_tricks import send_message, add_message_to_cleanup, cleanup_messages
 
 from utils.logging_config import structured_logger, LoggingContext
@@ -29,6 +30,8 @@ from db.models import ProductSize,Product,Session
 
 import os
 
+console = logging.getLogger(__name__)
+
 ORDER_STATUS_CREATED = 1
 ORDER_STATUS_PROCESSING = 3
 ORDER_STATUS_READY = 4
@@ -55,7 +58,7 @@ async def handle_seller_orders(update: Update, context: ContextTypes.DEFAULT_TYP
     user_tg_id = update.effective_user.id if update.effective_user else None
     is_admin = str(user_tg_id) == str(OWNER_ID)
     context.user_data["from_orders_list"] = True
-    print(f"DEBUG_sellers_ORDERS_callback: {data}, is_ADMIN = {is_admin}, OWNER_ID = {OWNER_ID}, tg_user = {user_tg_id}")
+    console.debug("sellers_ORDERS_callback: %s, is_ADMIN = %s, OWNER_ID = %s, tg_user = %s", data, is_admin, OWNER_ID, user_tg_id)
     # --- фильтры статусов ---
     status_filters = {
         "Создан": ORDER_STATUS_CREATED,
@@ -69,48 +72,42 @@ async def handle_seller_orders(update: Update, context: ContextTypes.DEFAULT_TYP
         ORDER_STATUS_EXPIRED,
         ORDER_STATUS_RECEIVED
     ]
-    # --- определяем текущий фильтр ---
-    current_filter = context.user_data.get("current_filter", ORDER_STATUS_CREATED)
-
     # --- определяем действие ---
     if data.startswith("honey_orders_") or not query:
         # ✅ Первичный вызов — из меню или напрямую (без query)
-        orders = await fetch_seller_orders(user_tg_id, is_admin, [ORDER_STATUS_CREATED])
-        if not orders:
-            orders = await fetch_seller_orders(user_tg_id, is_admin, [ORDER_STATUS_PROCESSING]) 
-        elif not orders:
-            orders = await fetch_seller_orders(user_tg_id, is_admin, archive_statuses) 
-        context.user_data["seller_orders"] = orders
-        context.user_data["current_index"] = 0
-        context.user_data["current_filter"] = ORDER_STATUS_CREATED
+        statuses = [ORDER_STATUS_CREATED]
+        page = await fetch_seller_orders_page(user_tg_id, is_admin, statuses)
+        if not page:
+            statuses = [ORDER_STATUS_PROCESSING]
+            page = await fetch_seller_orders_page(user_tg_id, is_admin, statuses)
+        index = 0
 
     elif data.startswith("owner_order_next_") or data.startswith("owner_order_prev_"):
-        # ✅ Навигация по заказам
+        # ✅ Навигация: callback несёт позицию и keyset‑курсор карточки
+        statuses = context.user_data.get("orders_statuses", [ORDER_STATUS_CREATED])
         try:
-            index = int(data.split("_")[-1])
-            context.user_data["current_index"] = index
-        except Exception:
-            context.user_data["current_index"] = 0
+            _, _, _, index_str, cursor = data.split("_", 4)
+            index = int(index_str)
+        except ValueError:
+            index, cursor = 0, None
+        page = await fetch_seller_orders_page(user_tg_id, is_admin, statuses, cursor)
 
     elif data.startswith("owner_order_filter_"):
         # ✅ Фильтрация
         filter_value = data.split("_")[-1]
         if filter_value in ("all", "None"):
-            filter_value = None
-        else:
-            filter_value = int(filter_value)
-
-        current_filter = filter_value
-        context.user_data["current_filter"] = current_filter
-
-        if filter_value:
-            orders = await fetch_seller_orders(user_tg_id, is_admin, [filter_value])
+            statuses = archive_statuses
         else:
+            statuses = [int(filter_value)]
+        page = await fetch_seller_orders_page(user_tg_id, is_admin, statuses)
+        index = 0
 
-            orders = await fetch_seller_orders(user_tg_id, is_admin, archive_statuses)
-
-        context.user_data["seller_orders"] = orders
-        context.user_data["current_index"] = 0
+    elif "orders_cursor" in context.user_data:
+        # ✅ Возврат к ленте после действия с заказом (подтверждение, выдача и т.п.)
+        statuses = context.user_data.get("orders_statuses", [ORDER_STATUS_CREATED])
+        cursor = context.user_data["orders_cursor"]
+        index = context.user_data.get("orders_index", 0)
+        page = await fetch_seller_orders_page(user_tg_id, is_admin, statuses, cursor)
 
     else:
         # ⚠️ Неизвестный колбэк
@@ -121,9 +118,11 @@ async def handle_seller_orders(update: Update, context: ContextTypes.DEFAULT_TYP
             await context.bot.send_message(chat_id, "⚠️ Неизвестное действие.")
         return ConversationHandler.END
 
+    context.user_data["orders_statuses"] = statuses
+
     # --- показываем карточку ---
-    orders = context.user_data.get("seller_orders", [])
-    if not orders:
+    if not page:
+        context.user_data.pop("orders_cursor", None)
         text = "❌ Заказы не найдены."
         if query:
             await query.edit_message_text(text)
@@ -131,12 +130,20 @@ async def handle_seller_orders(update: Update, context: ContextTypes.DEFAULT_TYP
             await context.bot.send_message(update.effective_chat.id, text)
         return VIEW_ORDERS
 
-    current_index = context.user_data.get("current_index", 0)
-    total = len(orders)
-    current_index = max(0, min(current_index, total - 1))
-    current_order = orders[current_index]
-
-    text, markup = prepare_owner_orders_cards(current_order, current_index, total, status_filters)
+    total = page["total"]
+    if page["prev_cursor"] is None:
+        index = 0
+    elif page["next_cursor"] is None:
+        index = total - 1
+    current_index = max(0, min(index, total - 1))
+    context.user_data["orders_cursor"] = page["cursor"]
+    context.user_data["orders_index"] = current_index
+
+    text, markup = prepare_owner_orders_cards(
+        page["order"], current_index, total, status_filters,
+        prev_cursor=page["prev_cursor"],
+        next_cursor=page["next_cursor"]
+    )
 
     # ✅ Унифицированный вывод (через edit_message_text или send_message)
     if query:
@@ -1,9 +1,11 @@
 from handlers.ManagerOrdersConversation import *
 
 manager_orders = ConversationHandler(
+    name="manager_orders",
+    persistent=True,
     entry_points=[CallbackQueryHandler(handle_seller_orders, pattern=r"^honey_orders_\d+$")],
     states={
-            VIEW_ORDERS: [CallbackQueryHandler(handle_seller_orders, pattern=r"^owner_order_(next|prev|filter)_(\d+|all)$"),
+            VIEW_ORDERS: [CallbackQueryHandler(handle_seller_orders, pattern=r"^owner_order_((next|prev)_\d+_\d+_\d+|filter_(\d+|all))$"),
                           ],
 
     },
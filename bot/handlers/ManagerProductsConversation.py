@@ -20,10 +20,11 @@ from sqlalchemy.orm import selectinload
 from datetime import timedelta, datetime
 from handlers.RegistrationConversation import route_after_login
 
-from utils.manager_lk_collection import fetch_seller_products, get_manager_product_sizes_keyboard
+from utils.manager_lk_collection import fetch_seller_products, get_manager_products_sizes_keyboards
 from utils.message_tricks import send_message, add_message_to_cleanup, cleanup_messages
 
 from utils.logging_config import structured_logger, LoggingContext
+from utils.catalog_cache import invalidate_catalog
 
 from db.models import ProductSize,Product,Session
 
@@ -58,9 +59,11 @@ async def handle_manager_products(update: Update, context: ContextTypes.DEFAULT_
             await update.effective_message.reply_text("❌ Ваших товаров не найдено в базе.")
             return ConversationHandler.END
 
+        # Размеры, клавиатуры и фото для всех товаров — одним батчем
+        keyboards = await get_manager_products_sizes_keyboards([p.id for p in products])
+
         for product in products:
-            # Получаем размеры и клавиатуру
-            sizes, keyboard_markup, image_file_id = await get_manager_product_sizes_keyboard(product.id)
+            sizes, keyboard_markup, image_file_id = keyboards[product.id]
 
             caption = f"<b>{product.name}</b> ||сорт: {product.product_type.name}\n{product.description or 'Без описания'}"
 
@@ -203,6 +206,7 @@ async def handle_new_price_input(update: Update, context: ContextTypes.DEFAULT_T
             productsize.price = new_price
             productsize.updated_at = datetime.utcnow()
             await session.commit()
+            invalidate_catalog("price_updated", user_id=tg_user_id)
 
             structured_logger.info(
                 f"Product price updated from {old_price} to {new_price}",
@@ -344,6 +348,7 @@ async def delete_product_confirmed(update: Update, context: ContextTypes.DEFAULT
             await update.callback_query.message.edit_text("❌ Товар успешно удалён.",
                                                             reply_markup=None)
             await session.commit()
+            invalidate_catalog("product_deleted", user_id=tg_user_id)
             return VIEW_PRODUCTS
         
 #=======Приглашение на дегустацию============
@@ -381,7 +386,7 @@ async def honey_invite_ask_time(update: Update, context: ContextTypes.DEFAULT_TY
         result = await session.execute(
             select(Session.id,Session.tg_user_id).where(
                 Session.role_id == 3,
-                Session.sent_message == False
+                Session.sent_message.is_(False)
             )
         )
         rows = result.fetchall()
@@ -1,6 +1,8 @@
 from handlers.ManagerProductsConversation import *
 
 manager_products = ConversationHandler(
+    name="manager_products",
+    persistent=True,
     entry_points=[
                   CallbackQueryHandler(handle_manager_products, pattern="^honey_get$")
 ],
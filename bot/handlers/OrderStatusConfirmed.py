@@ -1,3 +1,4 @@
+import logging
 from telegram import (
     Update,
     InlineKeyboardButton,
@@ -37,6 +38,8 @@ from utils.logging_config import (
 
 import os 
 
+console = logging.getLogger(__name__)
+
 ADMIN_CHAT_ID = os.getenv("ADMIN_CHAT_ID")
 if not (ADMIN_CHAT_ID):
     raise RuntimeError("Admin chat id did not set in environment variables")
@@ -132,7 +135,7 @@ async def order_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await session.commit()
 
             from_orders = context.user_data.get("from_orders_list")
-            print(f"DEBUG_FROM_orders_LIST = {from_orders}")
+            console.debug("FROM_orders_LIST = %s", from_orders)
 
             if from_orders:
                 await query.answer(f"Заказ №{order.id} подтвержден 🤝", show_alert=True)
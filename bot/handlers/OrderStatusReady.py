@@ -1,3 +1,4 @@
+import logging
 from telegram import (
     Update,
     InlineKeyboardButton,
@@ -37,6 +38,8 @@ from utils.logging_config import (
 
 import os 
 
+console = logging.getLogger(__name__)
+
 ADMIN_CHAT_ID = os.getenv("ADMIN_CHAT_ID")
 if not (ADMIN_CHAT_ID):
     raise RuntimeError("Admin chat id did not set in environment variables")
@@ -51,7 +54,7 @@ async def order_ready_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     try:
         _, _, order_id_str = query.data.split("_")
         order_id = int(order_id_str)
-        print(f"DEBUG_ORDER_READY: {query.data}")
+        console.debug("ORDER_READY: %s", query.data)
         await cleanup_messages(context)
 
         async with get_async_session() as session:
@@ -95,7 +98,7 @@ async def order_ready_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
             #manager_notification
             # 2) Убираем inline-кнопки из того сообщения, где была нажата кнопка (owner message)
             from_orders = context.user_data.get("from_orders_list")
-            print(f"DEBUG_FROM_orders_LIST = {from_orders}")
+            console.debug("FROM_orders_LIST = %s", from_orders)
             keyboard_customer = [
                 [InlineKeyboardButton("🧭 Показать на карте", callback_data=f"show_map")],
                 [InlineKeyboardButton(str("Планирую получить:"), callback_data=f"noop")],
@@ -1,3 +1,4 @@
+import logging
 from db.db_async import get_async_session
 from db.models.products import Product
 from telegram.ext import ContextTypes, CallbackQueryHandler, ConversationHandler
@@ -9,6 +10,9 @@ from telegram import (
     )
 from utils.message_tricks import add_message_to_cleanup, send_message
 from utils.logging_config import log_db_update, structured_logger, LoggingContext
+from utils.catalog_cache import invalidate_catalog
+
+console = logging.getLogger(__name__)
 
 
 @log_db_update
@@ -23,7 +27,7 @@ async def confirm_product_callback(update: Update, context: ContextTypes.DEFAULT
         async with get_async_session() as session:
             result = await session.execute(select(Product).where(Product.id == product_id))
             product = result.scalar_one_or_none()
-            print(f"DEBUG_COMMIT: {product.name}")
+            console.debug("COMMIT: %s", product.name)
 
             product.is_draft = False
             structured_logger.info(
@@ -33,8 +37,8 @@ async def confirm_product_callback(update: Update, context: ContextTypes.DEFAULT
                 context={'tg_id': product.created_by}
             )
             await session.commit()
+        invalidate_catalog("product_confirmed", user_id=update.effective_user.id)
 
-            
         confirmation_text = "🏆 Карточка товара сохранена. Желаю хороших продаж!"
 
         keyboard = [[
@@ -66,7 +70,7 @@ async def confirm_product_callback(update: Update, context: ContextTypes.DEFAULT
                 'error_type': type(e).__name__
             }
         )
-        print(e)
+        console.error("%s", e)
         await send_message(update, text = "не удалось сохранение. Попробуйте позже или обратитесь в поддержку."
         )
         return ConversationHandler.END
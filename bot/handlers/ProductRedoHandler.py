@@ -4,6 +4,7 @@ from telegram.ext import ContextTypes, CallbackQueryHandler, ConversationHandler
 from sqlalchemy import update as sa_update
 from telegram import Update
 from utils.logging_config import log_db_update
+from utils.catalog_cache import invalidate_catalog
 
 
 @log_db_update
@@ -29,6 +30,7 @@ async def redo_product_callback(update: Update, context: ContextTypes.DEFAULT_TY
             )
 
             await session.commit()
+        invalidate_catalog("product_redo", user_id=update.effective_user.id)
 
         # Определяем тип сообщения (текст или фото)
         if message.text:
@@ -1,3 +1,4 @@
+import logging
 from telegram import (
     Update, KeyboardButton, ReplyKeyboardMarkup, ReplyKeyboardRemove,
     InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
@@ -43,6 +44,8 @@ from utils.logging_config import (
 
 import os
 
+console = logging.getLogger(__name__)
+
 
 MANAGER_LIST = [
     int(m.strip(" []")) for m in os.getenv("MANAGER_LIST", "").split(",") if m.strip(" []")
@@ -82,7 +85,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
         try:
             tg_user = update.effective_user
-            print(f"DEBUG-initial-user: {tg_user}")
+            console.debug("initial-user: %s", tg_user)
 
 
                        # Log user interaction details
@@ -98,10 +101,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 }
             )
             user_id = tg_user.id
-            print(user_id)
+            console.debug("user_id: %s", user_id)
             # Check if user already exists
             user = await get_user_by_tg_id(user_id)
-            print(f"DEBUG_User:{user}")
+            console.debug("User:%s", user)
             if user is None:
 
                 # New user - start registration
@@ -138,7 +141,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         'error_type': type(e).__name__
                     }
                 )
-                print(e)
+                console.error("%s", e)
                 await update.message.reply_text(
                     "Произошла ошибка. Попробуйте позже или обратитесь в поддержку."
                 )
@@ -369,7 +372,7 @@ async def route_after_login(update: Update, context: ContextTypes.DEFAULT_TYPE,
         user_id = update.effective_user.id
         user = await get_user_by_tg_id(user_id)
 
-    print(f"DEBUG: user_id = {user.tg_user_id}\nMANAGER_LIST = {MANAGER_LIST}")
+    console.debug("user_id = %s\nMANAGER_LIST = %s", user.tg_user_id, MANAGER_LIST)
     try:
         if user.tg_user_id in MANAGER_LIST:
             role_id = 4
@@ -451,7 +454,7 @@ async def handle_show_map(update: Update, context: ContextTypes.DEFAULT_TYPE):
     LAT = '43.672805'
     LON = '40.200094'
     query = update.callback_query
-    print("DEBUG: handle_show_map triggered")
+    console.debug("handle_show_map triggered")
     await query.answer()
 
     # Отправляем встроенную карту
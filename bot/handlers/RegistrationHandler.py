@@ -3,6 +3,8 @@
 from handlers.RegistrationConversation import *
 
 registration_conversation = ConversationHandler(
+    name="registration",
+    persistent=True,
     entry_points=[
         CommandHandler("start", start)
     ],
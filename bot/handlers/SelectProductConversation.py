@@ -1,3 +1,4 @@
+import logging
 from telegram import (
     InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto,
     Update, ReplyKeyboardRemove
@@ -9,16 +10,19 @@ from telegram.ext import (
 from sqlalchemy.orm import selectinload
 from utils.logging_config import LoggingContext, structured_logger, log_db_select
 from db.db_async import get_async_session
-from db.models import Product, ProductType, ProductSize, Size, Order, OrderPackage, Package, Session
+from db.models import ProductSize, Size, Order, Session
 from sqlalchemy import select
 from datetime import datetime
-from utils.message_tricks import add_message_to_cleanup, cleanup_messages,send_message
-from utils.keyboard_builder import get_product_sizes_keyboard, build_order_keyboard
+from utils.message_tricks import add_message_to_cleanup, cleanup_messages, send_message, schedule_delete_messages
+from utils.keyboard_builder import build_product_sizes_keyboard, build_order_keyboard
+from utils.catalog_cache import get_catalog
 from utils.user_session_lastorder import get_actual_session_by_tg_id
 from datetime import timedelta
 
 import os
 
+console = logging.getLogger(__name__)
+
 ADMIN_CHAT_ID = os.getenv("ADMIN_CHAT_ID")
 if not (ADMIN_CHAT_ID):
     raise RuntimeError("Admin chat id did not set in environment variables")
@@ -58,31 +62,17 @@ async def start_select_product(update: Update, context: ContextTypes.DEFAULT_TYP
     else:
         msg_target = update.message
     #удаляет предыдущий вариант показа карточек выбранного типа, если гость нажал на Вернуться.
+    # и сообщение с текстом "Отличный выбор! ..." — одной фоновой пачкой
     chat_id = update.effective_chat.id
     msg_ids = context.user_data.get("product_messages", [])
-    print(f"DEBUG_delete_MESSAGE_list: {msg_ids}")
-    if msg_ids:
-        for msg_id in msg_ids:
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-            except Exception as e:
-                print(f"Не удалось удалить сообщение {msg_id}: {e}")
-    context.user_data["product_messages"] = []
-        # удаляем сообщение с текстом "Отличный выбор! ..."
     last_menu_msg_id = context.user_data.get("last_menu_message_id")
-    print(f"DEBUG_delete_GREETINGS: {last_menu_msg_id}")
-    if last_menu_msg_id:
-        try:
-            await context.bot.delete_message(chat_id=chat_id, message_id=last_menu_msg_id)
-        except Exception as e:
-            print(f"Не удалось удалить сообщение {last_menu_msg_id}: {e}")
-        context.user_data["last_menu_message_id"] = None
-    # Получаем все активные типы напитков
-    async with get_async_session() as session:
-        result = await session.execute(
-            select(ProductType)
-        )
-        types = result.scalars().all()
+    console.debug("delete_MESSAGE_list: %s, delete_GREETINGS: %s", msg_ids, last_menu_msg_id)
+    schedule_delete_messages(context, chat_id, [*msg_ids, last_menu_msg_id])
+    context.user_data["product_messages"] = []
+    context.user_data["last_menu_message_id"] = None
+    # Получаем все типы меда из кэша каталога
+    catalog = await get_catalog()
+    types = catalog.types
 
     if not types:
         await msg_target.reply_text("❌ В данный момент нет доступных сортов меда.")
@@ -106,15 +96,10 @@ async def handle_product_type_selection(update: Update, context: ContextTypes.DE
 
     type_id = int(query.data.split("_")[-1])
     context.user_data["product_type_id"] = type_id
-    print(f"DEBUG_СОРТ: {type_id}")
+    console.debug("СОРТ: %s", type_id)
 
-    async with get_async_session() as session:
-        result = await session.execute(
-            select(ProductType).where(ProductType.id == type_id)
-        )
-        product_type = result.scalar_one_or_none()
-
-    type_name = product_type.name if product_type else "Неизвестная категория"
+    catalog = await get_catalog()
+    type_name = catalog.type_name(type_id) or "Неизвестная категория"
 
     edited_msg = await query.edit_message_text(
         f"Отличный выбор! Ищем мёд сорта <b>{type_name}</b>:",
@@ -127,15 +112,8 @@ async def handle_product_type_selection(update: Update, context: ContextTypes.DE
 async def show_filtered_products(update: Update, context: ContextTypes.DEFAULT_TYPE):
     type_id = context.user_data.get("product_type_id")
 
-    async with get_async_session() as session:
-        result = await session.execute(
-        select(Product).where(
-        Product.type_id == type_id,
-        Product.is_active.is_(True),
-        Product.is_draft.is_(False)
-        )
-    )
-        products = result.scalars().all()
+    catalog = await get_catalog()
+    products = catalog.products_of_type(type_id)
 
     if not products:
         await update.effective_message.reply_text("❌ Похоже, мед этого сорта закончился.")
@@ -144,8 +122,9 @@ async def show_filtered_products(update: Update, context: ContextTypes.DEFAULT_T
     context.user_data["product_messages"] = []  # сбрасываем перед показом
 
     for product in products:
-        # Получаем размеры и клавиатуру
-        sizes, keyboard_markup, image_file_id = await get_product_sizes_keyboard(product.id)
+        # Размеры, клавиатура и фото — из снимка каталога
+        keyboard_markup = build_product_sizes_keyboard(product.sizes)
+        image_file_id = product.image_file_id
 
         caption = f"<b>{product.name}</b>\n{product.description or 'Без описания'}"
 
@@ -172,7 +151,7 @@ async def handle_size_selection(update: Update, context: ContextTypes.DEFAULT_TY
     await query.answer()
 
     data = query.data if query else None
-    print(f"DEBUG_размер_имеем_{data}")
+    console.debug("размер_имеем_%s", data)
         # Парсим индекс из callback_data
     if data:
         try:
@@ -266,28 +245,20 @@ async def handle_size_selection(update: Update, context: ContextTypes.DEFAULT_TY
 
             chat_id = update.effective_chat.id
 
-            for msg_id in context.user_data.get("product_messages", []):
-                try:
-                    await context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-                except Exception as e:
-                    print(f"Не удалось удалить сообщение {msg_id}: {e}")
-            # очищаем список
+            # карточки товаров и приветствие удаляются в фоне одной пачкой
+            schedule_delete_messages(
+                context, chat_id,
+                [*context.user_data.get("product_messages", []), context.user_data.get("last_menu_message_id")]
+            )
+            # очищаем списки
             context.user_data["product_messages"] = []
-
-            last_menu_msg_id = context.user_data.get("last_menu_message_id")
-            if last_menu_msg_id:
-                try:
-                    await context.bot.delete_message(chat_id=chat_id, message_id=last_menu_msg_id)
-                except Exception as e:
-                    print(f"Не удалось удалить сообщение {last_menu_msg_id}: {e}")
-            # очищаем список
             context.user_data["last_menu_message_id"] = None
             return SELECT_QUANTITY
         
 async def handle_update_quantity(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    print(f"DEBUG_quantity_data: {query.data.split("_")}")
+    console.debug("quantity_data: %s", query.data)
     try:
         _,_, action, order_id_str = query.data.split("_")
         order_id = int(order_id_str)
@@ -355,7 +326,7 @@ async def customer_comment_handler(update: Update, context: ContextTypes.DEFAULT
     """Запрашиваем у пользователя комментарий к заказу"""
     query = update.callback_query
     await query.answer()
-    print(f"DEBUG_customer_commment: {query.data.split("_")}")
+    console.debug("customer_commment: %s", query.data)
     try:
         _, _, order_id_str = query.data.split("_")  # customer_comment_<id>
         order_id = int(order_id_str)
@@ -433,7 +404,7 @@ async def save_customer_comment(update: Update, context: ContextTypes.DEFAULT_TY
                 parse_mode="HTML"
             )
         except Exception as e:
-            print(f"Не удалось обновить карточку заказа {last_msg_id}: {e}")
+            console.warning("Не удалось обновить карточку заказа %s: %s", last_msg_id, e)
             # если не нашли старое сообщение — просто шлём новое
             msg = await update.message.reply_text(caption, reply_markup=keyboard, parse_mode="HTML")
             context.user_data["last_order_message_id"] = msg.message_id
@@ -1,6 +1,8 @@
 from handlers.SelectProductConversation import *
 
 select_product_conv = ConversationHandler(
+    name="select_product",
+    persistent=True,
     entry_points=[CallbackQueryHandler(start_select_product, pattern="^honey_buy$"),
                   CommandHandler("honey_buy", start_select_product),
                   CallbackQueryHandler(handle_size_selection, pattern=r"^select_size_\d+$")],
@@ -1,6 +1,8 @@
 from handlers.UserSendProblemConversation import *
 
 problem_handler = ConversationHandler(
+    name="user_send_problem",
+    persistent=True,
     entry_points=[CommandHandler("help", start_problem)],
     states={
         SEND_PROBLEM: [
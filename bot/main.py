@@ -21,12 +21,23 @@ from handlers.ManagerOrdersHandler import manager_orders
 from handlers.ManagerProductsHandler import manager_products
 from handlers.InvitationHandler import invitation
 from db_monitor import check_db
+from utils.catalog_cache import init_catalog_cache
+from utils.delivery_zones import init_delivery_zones, refresh_zones_if_changed, DELIVERY_ZONES_REFRESH_INTERVAL
+from utils.preprocess_foto import shutdown_photo_pool
+from utils.broadcast import resume_campaigns, stop_campaigns
+from utils.db_persistence import PostgresPersistence
+from utils.webhook import BOT_MODE, BOT_ALLOWED_UPDATES, UPDATE_QUEUE_SIZE, run_webhook
+from utils.update_processor import ChatOrderedUpdateProcessor, log_update_metrics, UPDATE_METRICS_INTERVAL
+from utils.logging_config import setup_logging
 #from check_expired_orders import check_expired_order
 
 import os
+import asyncio
 from pathlib import Path
 from datetime import time
 
+import uvloop
+
 
 #from utils.call_coffe_size import init_size_map
 
@@ -65,6 +76,27 @@ async def post_init(application: Application) -> None:
     # Инициализация SIZE_MAP
     #await init_size_map()
 
+    # Прогрев кэша каталога (типы, товары, размеры, фото)
+    await init_catalog_cache()
+
+    # Полигоны зон доставки в памяти (STRtree): точка -> зона без запроса в PostGIS
+    await init_delivery_zones()
+    if DELIVERY_ZONES_REFRESH_INTERVAL > 0:
+        application.job_queue.run_repeating(
+            refresh_zones_if_changed,
+            interval=DELIVERY_ZONES_REFRESH_INTERVAL,
+            first=DELIVERY_ZONES_REFRESH_INTERVAL
+        )
+
+    # Рассылки, прерванные остановкой бота, продолжаются с места остановки
+    await resume_campaigns(application.bot)
+
+    if UPDATE_METRICS_INTERVAL > 0:
+        application.job_queue.run_repeating(
+            log_update_metrics,
+            interval=UPDATE_METRICS_INTERVAL,
+            first=UPDATE_METRICS_INTERVAL
+        )
 
 
     application.job_queue.run_repeating(
@@ -79,13 +111,38 @@ async def post_init(application: Application) -> None:
     #)
 
 
+async def post_stop(application: Application) -> None:
+    # Прерываем рассылки, пока бот ещё может отправлять: отправленное сохраняется
+    await stop_campaigns()
+
+
+async def post_shutdown(application: Application) -> None:
+    # Останавливаем процессы обработки фото
+    shutdown_photo_pool()
+
+
 def main():
     BOT_TOKEN = os.getenv("BOT_TOKEN")
     if not BOT_TOKEN:
         raise ValueError("BOT_TOKEN is not set in .env")
 
-
-    app = ApplicationBuilder().token(BOT_TOKEN).post_init(post_init).build()
+    # уровень CONSOLE_LOG_LEVEL для отладочного вывода модулей (logging.getLogger(__name__))
+    setup_logging()
+
+
+    # user_data и состояния диалогов хранятся в Postgres — рестарт не сбрасывает начатый заказ
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .persistence(PostgresPersistence())
+        .update_queue(asyncio.Queue(maxsize=UPDATE_QUEUE_SIZE))
+        # разные чаты — параллельно, один чат/пользователь — строго по порядку
+        .concurrent_updates(ChatOrderedUpdateProcessor())
+        .post_init(post_init)
+        .post_stop(post_stop)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     #глобальные обработчики
     app.add_handler(CommandHandler("info",info_command), group=0)
@@ -122,8 +179,12 @@ def main():
     #app.add_handler(CallbackQueryHandler(order_received_handler, pattern=r"^order_received_\d+"),group=1)  #обработка нажатия гостем кнопки получения заказа
 
 
-    # Без asyncio
-    app.run_polling()
+    if BOT_MODE == "webhook":
+        # апдейты приходят POST-запросами от Telegram (uvicorn + uvloop)
+        uvloop.run(run_webhook(app))
+    else:
+        # Без asyncio
+        app.run_polling(allowed_updates=BOT_ALLOWED_UPDATES)
 
 if __name__ == "__main__":
 
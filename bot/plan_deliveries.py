@@ -0,0 +1,39 @@
+"""
+Маршруты курьеров на дату: кластеры по зонам, порядок объезда и ETA.
+
+    cd bot && python plan_deliveries.py [YYYY-MM-DD] [interval_id]
+
+Без даты — завтра, без интервала — все интервалы из delivery_intervals.
+"""
+import sys
+import asyncio
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from db.db_async import get_async_session
+from db.models import DeliveryInterval
+from utils.delivery_scheduler import schedule_interval, format_route_summary
+
+
+async def plan():
+    day = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today() + timedelta(days=1)
+    if len(sys.argv) > 2:
+        interval_ids = [int(sys.argv[2])]
+    else:
+        async with get_async_session() as session:
+            interval_ids = (await session.execute(
+                select(DeliveryInterval.id).order_by(DeliveryInterval.start_interval)
+            )).scalars().all()
+
+    for interval_id in interval_ids:
+        schedule = await schedule_interval(day, interval_id)
+        if schedule is None:
+            print(f"⚠️  Интервал {interval_id} не найден")
+            continue
+        print(format_route_summary(schedule))
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(plan())
@@ -0,0 +1,10 @@
+"""
+Точка входа бота (entrypoint.sh). Процессы пула обработки фото (multiprocessing,
+forkserver) при старте заново импортируют __main__ как __mp_main__ — здесь это
+пустой модуль, а не main.py с хендлерами, движками БД и логгером бота.
+"""
+
+if __name__ == "__main__":
+    from main import main
+
+    main()
@@ -0,0 +1,309 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, func, insert, literal, select, update
+from telegram.error import BadRequest
+
+from db.db_async import get_async_session
+from db.models import BroadcastCampaign, BroadcastRecipient, Session
+from utils.broadcast_sender import SENT, BroadcastStats, Broadcaster, SendResult
+from utils.logging_config import structured_logger
+
+# Скорость и параллельность: Telegram пропускает ~30 сообщений/с от бота
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", 8))
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", 25))
+BROADCAST_MAX_ATTEMPTS = int(os.getenv("BROADCAST_MAX_ATTEMPTS", 3))
+# Результаты пишутся в БД пачками: по размеру или по времени, что наступит раньше
+BROADCAST_FLUSH_SIZE = int(os.getenv("BROADCAST_FLUSH_SIZE", 200))
+BROADCAST_FLUSH_INTERVAL = float(os.getenv("BROADCAST_FLUSH_INTERVAL", 2))
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", 10))
+BROADCAST_PAGE_SIZE = 1000
+
+INVITE_ROLE_ID = 3  # роль «дегустация»
+
+# id кампании -> задача рассылки (одна кампания не запускается дважды)
+_running: Dict[int, asyncio.Task] = {}
+
+
+async def create_invite_campaign(created_by: int, message_text: str,
+                                 event_datetime: datetime) -> Tuple[Optional[int], int]:
+    """
+    Кампания приглашений: снимок получателей (роль «дегустация», приглашение ещё не получали)
+    одной короткой транзакцией. Возвращает (id кампании, число получателей); (None, 0) — некому слать.
+    """
+    async with get_async_session() as session:
+        campaign = BroadcastCampaign(
+            kind="honey_invite",
+            message_text=message_text,
+            parse_mode="HTML",
+            params={"event_datetime": event_datetime.isoformat()},
+            created_by=created_by
+        )
+        session.add(campaign)
+        await session.flush()
+
+        result = await session.execute(
+            insert(BroadcastRecipient).from_select(
+                ["campaign_id", "tg_user_id"],
+                select(literal(campaign.id, Integer), Session.tg_user_id)
+                .where(Session.role_id == INVITE_ROLE_ID, Session.sent_message.is_(False))
+                .distinct()
+            )
+        )
+        if not result.rowcount:
+            await session.rollback()
+            return None, 0
+
+        campaign.total = result.rowcount
+        await session.commit()
+        return campaign.id, campaign.total
+
+
+async def _pending_chat_ids(campaign_id: int) -> AsyncIterator[int]:
+    """Неотправленные получатели страницами по tg_user_id; соединение не держится между страницами"""
+    last_id = None
+    while True:
+        query = select(BroadcastRecipient.tg_user_id).where(
+            BroadcastRecipient.campaign_id == campaign_id,
+            BroadcastRecipient.status.is_(None)
+        )
+        if last_id is not None:
+            query = query.where(BroadcastRecipient.tg_user_id > last_id)
+        async with get_async_session() as session:
+            chat_ids = (await session.execute(
+                query.order_by(BroadcastRecipient.tg_user_id).limit(BROADCAST_PAGE_SIZE)
+            )).scalars().all()
+        if not chat_ids:
+            return
+        for chat_id in chat_ids:
+            yield chat_id
+        last_id = chat_ids[-1]
+
+
+class _ResultWriter:
+    """
+    Копит результаты отправки и пишет их пачкой одной транзакцией:
+    статусы получателей, sent_message у доставленных, счётчики кампании.
+    Если запись не удалась, пачка возвращается в буфер и уйдёт со следующей.
+    После падения не записанные результаты (не больше пачки) будут отправлены повторно.
+    """
+
+    def __init__(self, campaign: BroadcastCampaign):
+        self.campaign_id = campaign.id
+        self.created_at = campaign.created_at
+        self.params = campaign.params
+        self._buffer: List[SendResult] = []
+        self._lock = asyncio.Lock()
+
+    async def add(self, result: SendResult):
+        self._buffer.append(result)
+        if len(self._buffer) >= BROADCAST_FLUSH_SIZE:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            committed = False
+            try:
+                await self._write(batch)
+                committed = True
+            finally:
+                if not committed:
+                    # ошибка БД или отмена посреди записи — пачка не потеряна
+                    self._buffer[:0] = batch
+
+    async def _write(self, batch: List[SendResult]):
+        now = datetime.utcnow()
+        delivered = [r.chat_id for r in batch if r.status == SENT]
+
+        async with get_async_session() as session:
+            # UPDATE по первичному ключу — executemany одним запросом
+            await session.execute(
+                update(BroadcastRecipient),
+                [
+                    {
+                        "campaign_id": self.campaign_id,
+                        "tg_user_id": r.chat_id,
+                        "status": r.status,
+                        "attempts": r.attempts,
+                        "error": r.error[:500] if r.error else None,
+                        "sent_at": now if r.status == SENT else None
+                    }
+                    for r in batch
+                ]
+            )
+            if delivered:
+                await session.execute(
+                    update(Session)
+                    .where(
+                        Session.tg_user_id.in_(delivered),
+                        Session.role_id == INVITE_ROLE_ID,
+                        Session.sent_message.is_(False),
+                        Session.created_at <= self.created_at
+                    )
+                    .values(sent_message=True, last_action=self.params, updated_at=now)
+                )
+            await session.execute(
+                update(BroadcastCampaign)
+                .where(BroadcastCampaign.id == self.campaign_id)
+                .values(
+                    sent=BroadcastCampaign.sent + len(delivered),
+                    failed=BroadcastCampaign.failed + len(batch) - len(delivered)
+                )
+            )
+            await session.commit()
+
+
+def _format_progress(campaign_id: int, stats: BroadcastStats, finished: bool = False) -> str:
+    head = "✅ Рассылка завершена" if finished else "📣 Идёт рассылка"
+    lines = [
+        f"{head} #{campaign_id}: {stats.done} из {stats.total}",
+        f"Отправлено: {stats.sent}",
+        f"Ошибок: {stats.failed}, заблокировали бота: {stats.blocked}",
+        f"Скорость: {stats.rate():.1f} сообщ./с"
+    ]
+    eta = stats.eta()
+    if not finished and eta is not None:
+        lines.append(f"Осталось: ~{int(eta // 60)} мин {int(eta % 60):02d} с")
+    return "\n".join(lines)
+
+
+class _ProgressReporter:
+    """Одно сообщение с ходом рассылки в чате запустившего, обновляется по таймеру"""
+
+    def __init__(self, bot, chat_id: Optional[int], campaign_id: int):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.campaign_id = campaign_id
+        self._message_id = None
+
+    async def report(self, stats: BroadcastStats, finished: bool = False):
+        structured_logger.info(
+            "Broadcast completed" if finished else "Broadcast progress",
+            action="broadcast_completed" if finished else "broadcast_progress",
+            execution_time=stats.as_dict()["elapsed"],
+            context={"campaign_id": self.campaign_id, **stats.as_dict()}
+        )
+        if not self.chat_id:
+            return
+        text = _format_progress(self.campaign_id, stats, finished)
+        try:
+            if self._message_id is None:
+                message = await self.bot.send_message(chat_id=self.chat_id, text=text)
+                self._message_id = message.message_id
+            else:
+                await self.bot.edit_message_text(chat_id=self.chat_id, message_id=self._message_id, text=text)
+        except BadRequest:
+            pass  # «message is not modified» и т.п. — отчёт не важнее рассылки
+        except Exception as e:
+            structured_logger.warning(
+                "Failed to report broadcast progress",
+                action="broadcast_progress_failed",
+                context={"campaign_id": self.campaign_id, "error": str(e)}
+            )
+
+
+async def run_campaign(bot, campaign_id: int) -> Optional[BroadcastStats]:
+    """Отправляет кампанию всем ещё не обработанным получателям; годится и для возобновления"""
+    async with get_async_session() as session:
+        campaign = await session.get(BroadcastCampaign, campaign_id)
+        if campaign is None or campaign.status != "running":
+            return None
+        pending = await session.scalar(
+            select(func.count()).select_from(BroadcastRecipient).where(
+                BroadcastRecipient.campaign_id == campaign_id,
+                BroadcastRecipient.status.is_(None)
+            )
+        )
+
+    broadcaster = Broadcaster(BROADCAST_CONCURRENCY, BROADCAST_RATE, BROADCAST_MAX_ATTEMPTS)
+    writer = _ResultWriter(campaign)
+    reporter = _ProgressReporter(bot, campaign.created_by, campaign_id)
+
+    async def send(chat_id: int):
+        await bot.send_message(chat_id=chat_id, text=campaign.message_text, parse_mode=campaign.parse_mode)
+
+    async def tick():
+        since_report = 0.0
+        while True:
+            await asyncio.sleep(BROADCAST_FLUSH_INTERVAL)
+            try:
+                await writer.flush()
+            except Exception as e:
+                # пачка осталась в буфере — повторим на следующем тике
+                structured_logger.error(
+                    "Failed to save broadcast results",
+                    action="broadcast_flush_failed",
+                    context={"campaign_id": campaign_id, "error": str(e)}
+                )
+            since_report += BROADCAST_FLUSH_INTERVAL
+            if since_report >= BROADCAST_PROGRESS_INTERVAL:
+                since_report = 0.0
+                await reporter.report(broadcaster.stats)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        stats = await broadcaster.run(_pending_chat_ids(campaign_id), send, writer.add, total=pending)
+    finally:
+        ticker.cancel()
+        # при остановке бота записываем то, что уже отправлено, — иначе уйдёт повторно
+        await writer.flush()
+
+    async with get_async_session() as session:
+        await session.execute(
+            update(BroadcastCampaign)
+            .where(BroadcastCampaign.id == campaign_id)
+            .values(status="done", finished_at=datetime.utcnow())
+        )
+        await session.commit()
+
+    await reporter.report(stats, finished=True)
+    return stats
+
+
+def start_campaign(bot, campaign_id: int) -> asyncio.Task:
+    """Рассылка в фоне: обработчик не ждёт её окончания"""
+    task = _running.get(campaign_id)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(run_campaign(bot, campaign_id))
+        _running[campaign_id] = task
+        task.add_done_callback(lambda t: _on_campaign_done(campaign_id, t))
+    return task
+
+
+def _on_campaign_done(campaign_id: int, task: asyncio.Task):
+    _running.pop(campaign_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        structured_logger.error(
+            "Broadcast failed",
+            action="broadcast_failed",
+            context={"campaign_id": campaign_id, "error": str(task.exception())}
+        )
+
+
+async def resume_campaigns(bot) -> int:
+    """При старте бота: продолжить кампании, прерванные остановкой или падением"""
+    async with get_async_session() as session:
+        campaign_ids = (await session.execute(
+            select(BroadcastCampaign.id).where(BroadcastCampaign.status == "running")
+        )).scalars().all()
+    for campaign_id in campaign_ids:
+        structured_logger.info(
+            "Resuming broadcast",
+            action="broadcast_resumed",
+            context={"campaign_id": campaign_id}
+        )
+        start_campaign(bot, campaign_id)
+    return len(campaign_ids)
+
+
+async def stop_campaigns():
+    """При остановке бота: прервать рассылки (результаты сбрасываются в БД, остаток — после рестарта)"""
+    tasks = list(_running.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,154 @@
+import time
+import asyncio
+from typing import AsyncIterable, Awaitable, Callable, NamedTuple, Optional
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from utils.rate_limit import TokenBucket
+
+# Статусы получателя рассылки
+SENT = "sent"
+FAILED = "failed"
+BLOCKED = "blocked"   # бот заблокирован / пользователь удалён — повторять бессмысленно
+
+
+class SendResult(NamedTuple):
+    chat_id: int
+    status: str
+    error: Optional[str]
+    attempts: int
+
+
+class BroadcastStats:
+    """Счётчики рассылки для отчёта о ходе и логов"""
+
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retries = 0
+        self.flood_waits = 0
+        self.started = time.monotonic()
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    def rate(self) -> float:
+        """Сообщений в секунду с начала рассылки"""
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> Optional[float]:
+        """Секунд до конца при текущей скорости"""
+        rate = self.rate()
+        return max(self.total - self.done, 0) / rate if rate > 0 and self.total else None
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "rate": round(self.rate(), 1),
+            "elapsed": round(time.monotonic() - self.started, 1),
+        }
+
+
+class Broadcaster:
+    """
+    Отправка одного сообщения множеству чатов:
+      * concurrency воркеров, общий токен-бакет rate сообщений/с (лимит Telegram ~30/с на бота);
+      * каждый чат — не больше одного раза (лимит Telegram — 1 сообщение/с в чат),
+        повтор в тот же чат не раньше чем через retry_delay;
+      * RetryAfter останавливает всех воркеров на указанное Telegram время, попытка не тратится;
+      * Forbidden — BLOCKED, BadRequest — FAILED сразу, сетевые ошибки — до max_attempts попыток.
+    TimedOut — подвид NetworkError: сообщение могло дойти, повтор может его продублировать.
+    """
+
+    def __init__(self, concurrency: int = 8, rate: float = 25, max_attempts: int = 3,
+                 retry_delay: float = 1.0):
+        self.concurrency = max(concurrency, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_delay = max(retry_delay, 1.0)
+        # без запаса токенов: равномерный поток, без всплеска в первую секунду
+        self._bucket = TokenBucket(rate, 1)
+        self._resume_at = 0.0
+        self.stats = BroadcastStats()
+
+    async def _wait_turn(self):
+        # пауза после RetryAfter касается всех воркеров
+        while True:
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        await self._bucket.acquire(float("inf"))
+
+    async def _deliver(self, chat_id: int, send: Callable[[int], Awaitable]) -> SendResult:
+        attempts = 0
+        while True:
+            await self._wait_turn()
+            attempts += 1
+            try:
+                await send(chat_id)
+                return SendResult(chat_id, SENT, None, attempts)
+            except RetryAfter as e:
+                self.stats.flood_waits += 1
+                self._resume_at = max(self._resume_at, time.monotonic() + float(e.retry_after))
+                attempts -= 1
+                continue
+            except Forbidden as e:
+                return SendResult(chat_id, BLOCKED, str(e), attempts)
+            except BadRequest as e:
+                return SendResult(chat_id, FAILED, str(e), attempts)
+            except NetworkError as e:
+                if attempts >= self.max_attempts:
+                    return SendResult(chat_id, FAILED, str(e), attempts)
+            except TelegramError as e:
+                return SendResult(chat_id, FAILED, str(e), attempts)
+
+            self.stats.retries += 1
+            await asyncio.sleep(self.retry_delay * 2 ** (attempts - 1))
+
+    async def run(self, chat_ids: AsyncIterable[int], send: Callable[[int], Awaitable],
+                  on_result: Callable[[SendResult], Awaitable], total: int = 0) -> BroadcastStats:
+        """
+        Отправляет send(chat_id) по всем chat_ids (читаются потоком, по мере отправки)
+        и передаёт каждый результат в on_result. Возвращает итоговые счётчики.
+        """
+        self.stats = BroadcastStats(total)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        seen = set()
+
+        async def produce():
+            async for chat_id in chat_ids:
+                if chat_id in seen:
+                    continue
+                seen.add(chat_id)
+                await queue.put(chat_id)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work():
+            while (chat_id := await queue.get()) is not None:
+                result = await self._deliver(chat_id, send)
+                if result.status == SENT:
+                    self.stats.sent += 1
+                elif result.status == BLOCKED:
+                    self.stats.blocked += 1
+                else:
+                    self.stats.failed += 1
+                await on_result(result)
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(work()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return self.stats
@@ -0,0 +1,209 @@
+import asyncio
+import os
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from db.db_async import get_async_session
+from db.models import Image, Product, ProductSize, ProductType, Size
+from utils.logging_config import structured_logger
+
+# CATALOG_CACHE_ENABLED=false — каждый показ каталога снова идёт в БД (для сравнения/отладки)
+CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+class ProductTypeItem(NamedTuple):
+    id: int
+    name: str
+
+
+class ProductSizeItem(NamedTuple):
+    id: int            # product_sizes.id — уходит в callback_data
+    size_name: object  # Size.name (Numeric) — 0.5 / 1.0 / 1.5
+    price: object      # ProductSize.price (Numeric)
+
+
+class ProductItem(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str]
+    type_id: int
+    created_by: int
+    sizes: tuple             # tuple[ProductSizeItem, ...], по возрастанию цены
+    image_file_id: Optional[str]
+
+
+class CatalogSnapshot(NamedTuple):
+    """Неизменяемый снимок активного каталога"""
+    types: tuple                     # tuple[ProductTypeItem, ...]
+    types_by_id: Mapping             # type_id -> ProductTypeItem
+    products_by_type: Mapping        # type_id -> tuple[ProductItem, ...]
+    products_by_id: Mapping          # product_id -> ProductItem
+
+    def type_name(self, type_id: int) -> Optional[str]:
+        item = self.types_by_id.get(type_id)
+        return item.name if item else None
+
+    def products_of_type(self, type_id: int) -> tuple:
+        return self.products_by_type.get(type_id, ())
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_generation = 0
+_load_lock = asyncio.Lock()
+_stats = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+
+
+async def load_sizes_and_images(session, product_ids) -> tuple[dict, dict]:
+    """
+    Батч-загрузка для списка товаров: активные размеры и первое активное фото.
+    Два запроса независимо от длины списка (вместо двух запросов на каждый товар).
+
+    :return: ({product_id: [ProductSizeItem, ...]}, {product_id: tg_file_id})
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}, {}
+
+    size_rows = (await session.execute(
+        select(
+            ProductSize.product_id,
+            ProductSize.id,
+            Size.name,
+            ProductSize.price
+        )
+        .join(Size, Size.id == ProductSize.size_id)
+        .where(
+            ProductSize.product_id.in_(product_ids),
+            ProductSize.is_active.is_(True)
+        )
+        .order_by(ProductSize.product_id, ProductSize.price.asc())
+    )).all()
+
+    # DISTINCT ON (product_id) — первое по created_at активное фото каждого товара
+    image_rows = (await session.execute(
+        select(Image.product_id, Image.tg_file_id)
+        .distinct(Image.product_id)
+        .where(
+            Image.product_id.in_(product_ids),
+            Image.is_active.is_(True)
+        )
+        .order_by(Image.product_id, Image.created_at.asc())
+    )).all()
+
+    sizes_by_product: dict[int, list] = {}
+    for product_id, ps_id, size_name, price in size_rows:
+        sizes_by_product.setdefault(product_id, []).append(ProductSizeItem(ps_id, size_name, price))
+    images_by_product = {product_id: file_id for product_id, file_id in image_rows}
+
+    return sizes_by_product, images_by_product
+
+
+async def _load_snapshot() -> CatalogSnapshot:
+    """Читает весь активный каталог четырьмя запросами"""
+    async with get_async_session() as session:
+        types_rows = (await session.execute(
+            select(ProductType.id, ProductType.name).order_by(ProductType.id)
+        )).all()
+
+        product_rows = (await session.execute(
+            select(
+                Product.id, Product.name, Product.description,
+                Product.type_id, Product.created_by
+            )
+            .where(Product.is_active.is_(True), Product.is_draft.is_(False))
+            .order_by(Product.created_at.asc(), Product.id.asc())
+        )).all()
+
+        sizes_by_product, images_by_product = await load_sizes_and_images(
+            session, [row[0] for row in product_rows]
+        )
+
+    types = tuple(ProductTypeItem(t_id, name) for t_id, name in types_rows)
+    products_by_id = {}
+    products_by_type: dict[int, list] = {}
+    for p_id, name, description, type_id, created_by in product_rows:
+        item = ProductItem(
+            id=p_id,
+            name=name,
+            description=description,
+            type_id=type_id,
+            created_by=created_by,
+            sizes=tuple(sizes_by_product.get(p_id, ())),
+            image_file_id=images_by_product.get(p_id)
+        )
+        products_by_id[p_id] = item
+        products_by_type.setdefault(type_id, []).append(item)
+
+    return CatalogSnapshot(
+        types=types,
+        types_by_id=MappingProxyType({t.id: t for t in types}),
+        products_by_type=MappingProxyType({k: tuple(v) for k, v in products_by_type.items()}),
+        products_by_id=MappingProxyType(products_by_id)
+    )
+
+
+async def get_catalog() -> CatalogSnapshot:
+    """
+    Возвращает текущий снимок каталога.
+    При пустом/сброшенном кэше загружает его из БД (один загрузчик на всех ожидающих).
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and CATALOG_CACHE_ENABLED:
+        _stats["hits"] += 1
+        return snapshot
+
+    _stats["misses"] += 1
+    async with _load_lock:
+        # пока ждали лок, снимок мог загрузить другой обработчик
+        if _snapshot is not None and CATALOG_CACHE_ENABLED:
+            return _snapshot
+
+        generation = _generation
+        snapshot = await _load_snapshot()
+        _stats["loads"] += 1
+        # если во время загрузки пришла инвалидация — отдаём данные, но не кэшируем
+        if CATALOG_CACHE_ENABLED and generation == _generation:
+            _snapshot = snapshot
+        return snapshot
+
+
+def invalidate_catalog(reason: str = "", user_id: Optional[int] = None) -> None:
+    """Сбрасывает снимок каталога. Вызывать после commit любой записи в товары/размеры/фото."""
+    global _snapshot, _generation
+    _snapshot = None
+    _generation += 1
+    _stats["invalidations"] += 1
+    structured_logger.info(
+        "Catalog cache invalidated",
+        user_id=user_id,
+        action="catalog_cache_invalidate",
+        context={"reason": reason, "generation": _generation}
+    )
+
+
+async def init_catalog_cache() -> None:
+    """Прогрев кэша при старте бота"""
+    snapshot = await get_catalog()
+    structured_logger.info(
+        "Catalog cache loaded",
+        action="init_catalog_cache",
+        context={
+            "enabled": CATALOG_CACHE_ENABLED,
+            "types": len(snapshot.types),
+            "products": len(snapshot.products_by_id)
+        }
+    )
+
+
+def catalog_cache_stats() -> dict:
+    """Счётчики попаданий/промахов кэша каталога"""
+    total = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_ratio": round(_stats["hits"] / total, 3) if total else 0.0,
+        "generation": _generation,
+        "enabled": CATALOG_CACHE_ENABLED
+    }
@@ -0,0 +1,318 @@
+import logging
+import os
+import json
+import time
+import asyncio
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from telegram.ext import BasePersistence, PersistenceInput
+
+from db.db_async import get_async_session
+from db.models import BotConversation, BotUserData
+from utils.logging_config import structured_logger
+
+console = logging.getLogger(__name__)
+
+# Как часто Application отдаёт изменённые user_data / состояния диалогов (сек)
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv("PERSISTENCE_UPDATE_INTERVAL", 10))
+# Пауза перед записью: все изменения одного прохода Application уходят одной пачкой
+PERSISTENCE_FLUSH_DELAY = float(os.getenv("PERSISTENCE_FLUSH_DELAY", 0.5))
+PERSISTENCE_BATCH_SIZE = int(os.getenv("PERSISTENCE_BATCH_SIZE", 1000))
+
+_TAGS = {"__tuple__", "__set__", "__date__", "__datetime__", "__time__", "__decimal__", "__dict__"}
+
+
+def encode_value(value: Any) -> Any:
+    """Значение user_data -> JSON-совместимое; tuple/set/date/Decimal/нестроковые ключи с метками"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        if all(isinstance(k, str) and k not in _TAGS for k in value):
+            return {k: encode_value(v) for k, v in value.items()}
+        return {"__dict__": [[encode_value(k), encode_value(v)] for k, v in value.items()]}
+    if isinstance(value, list):
+        return [encode_value(v) for v in value]
+    if isinstance(value, tuple):
+        return {"__tuple__": [encode_value(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": [encode_value(v) for v in value]}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, dt_time):
+        return {"__time__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    raise TypeError(f"{type(value).__name__} не сохраняется в persistence")
+
+
+def decode_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1:
+        tag, payload = next(iter(value.items()))
+        if tag == "__tuple__":
+            return tuple(decode_value(v) for v in payload)
+        if tag == "__set__":
+            return {decode_value(v) for v in payload}
+        if tag == "__dict__":
+            return {decode_value(k): decode_value(v) for k, v in payload}
+        if tag == "__datetime__":
+            return datetime.fromisoformat(payload)
+        if tag == "__date__":
+            return date.fromisoformat(payload)
+        if tag == "__time__":
+            return dt_time.fromisoformat(payload)
+        if tag == "__decimal__":
+            return Decimal(payload)
+    return {k: decode_value(v) for k, v in value.items()}
+
+
+def encode_user_data(user_id: int, data: dict) -> dict:
+    """Кодирует по ключам: несохраняемое значение теряется само, а не весь user_data"""
+    encoded = {}
+    for key, value in data.items():
+        try:
+            encoded[str(key)] = encode_value(value)
+        except TypeError as e:
+            console.warning("user_data[%r] пользователя %s не сохранён: %s", key, user_id, e)
+    return encoded
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PostgresPersistence(BasePersistence):
+    """
+    Persistence для Application в Postgres (JSONB): context.user_data и состояния диалогов.
+      * user_data читается лениво — при первом апдейте пользователя после старта;
+      * изменения копятся в памяти и пишутся пачками (INSERT ... ON CONFLICT) вскоре после
+        очередного прохода Application (update_interval) и при остановке бота (flush);
+      * неизменившиеся user_data (Application отмечает каждого активного) не пишутся.
+    chat_data, bot_data и callback_data бот не использует — не сохраняются.
+    """
+
+    def __init__(self, update_interval: float = PERSISTENCE_UPDATE_INTERVAL,
+                 flush_delay: float = PERSISTENCE_FLUSH_DELAY,
+                 batch_size: int = PERSISTENCE_BATCH_SIZE):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.flush_delay = flush_delay
+        self.batch_size = max(batch_size, 1)
+        # идущие загрузки из БД и пользователи, чьи данные уже влиты в user_data Application
+        self._loads: Dict[int, asyncio.Task] = {}
+        self._merged: set = set()
+        # последнее сохранённое/загруженное содержимое (JSON) — чтобы не писать без изменений
+        self._stored: Dict[int, str] = {}
+        # грязные данные: None — удалить
+        self._dirty_users: Dict[int, Optional[dict]] = {}
+        self._dirty_conversations: Dict[Tuple[str, str], Optional[Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.metrics = {"loads": 0, "flushes": 0, "users_written": 0, "users_skipped": 0,
+                        "conversations_written": 0, "flush_errors": 0, "last_flush_ms": 0.0}
+
+    # ---------- user_data ----------
+
+    async def get_user_data(self) -> Dict[int, dict]:
+        # всё не грузим: refresh_user_data подтянет данные пользователя при его первом апдейте
+        return {}
+
+    async def _load_user(self, user_id: int) -> Optional[dict]:
+        async with get_async_session() as session:
+            data = await session.scalar(select(BotUserData.data).where(BotUserData.user_id == user_id))
+        self.metrics["loads"] += 1
+        if data is not None:
+            self._stored[user_id] = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return data
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        if user_id in self._merged:
+            return
+        task = self._loads.get(user_id)
+        if task is None:
+            task = self._loads[user_id] = asyncio.ensure_future(self._load_user(user_id))
+        try:
+            data = await asyncio.shield(task)
+        except Exception:
+            # не загрузили — апдейт падает, а не затирает сохранённые данные пустыми
+            self._loads.pop(user_id, None)
+            raise
+        if user_id not in self._merged:
+            self._merged.add(user_id)
+            self._loads.pop(user_id, None)
+            for key, value in decode_value(data or {}).items():
+                user_data.setdefault(key, value)
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        if user_id not in self._merged:
+            # данные пользователя ещё не загружены (апдейт без refresh) — не затираем их
+            return
+        self._dirty_users[user_id] = encode_user_data(user_id, data)
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._dirty_users[user_id] = None
+        self._schedule_flush()
+
+    # ---------- диалоги ----------
+
+    async def get_conversations(self, name: str) -> dict:
+        async with get_async_session() as session:
+            rows = (await session.execute(
+                select(BotConversation.key, BotConversation.state).where(BotConversation.name == name)
+            )).all()
+        return {tuple(json.loads(key)): decode_value(state) for key, state in rows}
+
+    async def update_conversation(self, name: str, key: tuple, new_state: Optional[object]) -> None:
+        self._dirty_conversations[(name, json.dumps(list(key)))] = (
+            None if new_state is None else encode_value(new_state)
+        )
+        self._schedule_flush()
+
+    # ---------- не используются ботом ----------
+
+    async def get_chat_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    # ---------- запись ----------
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_delay)
+        try:
+            await self._write()
+        except Exception:
+            pass  # уже залогировано, данные вернулись в буфер до следующего прохода
+
+    async def flush(self) -> None:
+        """Вызывается Application при остановке — записать всё, что накопилось"""
+        task = self._flush_task
+        if task is not None and not task.done():
+            if self._flush_lock.locked():
+                # запись уже идёт: отмена оборвала бы её посреди пачки — дожидаемся
+                await asyncio.wait([task])
+            else:
+                task.cancel()
+        await self._write()
+
+    async def _write(self):
+        async with self._flush_lock:
+            users, self._dirty_users = self._dirty_users, {}
+            conversations, self._dirty_conversations = self._dirty_conversations, {}
+            if not users and not conversations:
+                return
+
+            started = time.perf_counter()
+            now = datetime.utcnow()
+            upserts, dumps, deletes = [], {}, []
+            for user_id, data in users.items():
+                if data is None:
+                    deletes.append(user_id)
+                    continue
+                dumped = json.dumps(data, sort_keys=True, ensure_ascii=False)
+                if self._stored.get(user_id) == dumped:
+                    self.metrics["users_skipped"] += 1
+                    continue
+                dumps[user_id] = dumped
+                upserts.append({"user_id": user_id, "data": data, "updated_at": now})
+            conv_upserts = [
+                {"name": name, "key": key, "state": state, "updated_at": now}
+                for (name, key), state in conversations.items() if state is not None
+            ]
+            conv_deletes = [name_key for name_key, state in conversations.items() if state is None]
+
+            try:
+                async with get_async_session() as session:
+                    if upserts:
+                        stmt = pg_insert(BotUserData)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=[BotUserData.user_id],
+                            set_={"data": stmt.excluded.data, "updated_at": stmt.excluded.updated_at}
+                        )
+                        for chunk in _chunks(upserts, self.batch_size):
+                            await session.execute(stmt, chunk)
+                    for chunk in _chunks(deletes, self.batch_size):
+                        await session.execute(delete(BotUserData).where(BotUserData.user_id.in_(chunk)))
+                    if conv_upserts:
+                        stmt = pg_insert(BotConversation)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=[BotConversation.name, BotConversation.key],
+                            set_={"state": stmt.excluded.state, "updated_at": stmt.excluded.updated_at}
+                        )
+                        for chunk in _chunks(conv_upserts, self.batch_size):
+                            await session.execute(stmt, chunk)
+                    for chunk in _chunks(conv_deletes, self.batch_size):
+                        await session.execute(
+                            delete(BotConversation).where(tuple_(BotConversation.name, BotConversation.key).in_(chunk))
+                        )
+                    await session.commit()
+            except BaseException as e:
+                # возвращаем в буфер (и при отмене), не перетирая то, что успело измениться за время записи
+                for user_id, data in users.items():
+                    self._dirty_users.setdefault(user_id, data)
+                for name_key, state in conversations.items():
+                    self._dirty_conversations.setdefault(name_key, state)
+                if not isinstance(e, Exception):
+                    raise
+                self.metrics["flush_errors"] += 1
+                structured_logger.error(
+                    "Persistence flush failed",
+                    action="persistence_flush_failed",
+                    context={"users": len(users), "conversations": len(conversations), "error": str(e)}
+                )
+                raise
+
+            self._stored.update(dumps)
+            for user_id in deletes:
+                self._stored.pop(user_id, None)
+            elapsed = time.perf_counter() - started
+            self.metrics["flushes"] += 1
+            self.metrics["users_written"] += len(upserts) + len(deletes)
+            self.metrics["conversations_written"] += len(conversations)
+            self.metrics["last_flush_ms"] = round(elapsed * 1000, 1)
+            structured_logger.debug(
+                "Persistence flushed",
+                action="persistence_flush",
+                execution_time=elapsed,
+                context={"users": len(upserts), "users_deleted": len(deletes),
+                         "conversations": len(conversations)}
+            )
@@ -11,6 +11,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from utils.logging_config import log_function_call, LogExecutionTime, get_logger
+from utils.catalog_cache import invalidate_catalog
 
 # Предположим, статус 5 = "pending", статус 6 = "confirmed"
 ACTIVE_BOOKING_STATUSES = [5, 6]
@@ -54,6 +55,7 @@ async def delete_apartment(apartment_id: int, tg_user_id: int, update: Update, c
             )
         )
         await session.commit()
+        invalidate_catalog("product_deleted", user_id=tg_user_id)
 
         await update.callback_query.message.reply_text("✅ Объект успешно удалён.")
         return VIEW_OBJECTS
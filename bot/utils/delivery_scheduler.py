@@ -0,0 +1,183 @@
+import os
+import time as time_module
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+
+from db.db_async import get_async_session
+from db.models import DeliveryInterval, Order, OrderDelivery
+from utils.delivery_zones import get_zone_index, resolve_zones
+from utils.logging_config import structured_logger
+from utils.route_planner import plan_route
+
+# Точка выезда курьера — пасека (те же координаты, что и в «Показать на карте»)
+DELIVERY_DEPOT_LAT = float(os.getenv("DELIVERY_DEPOT_LAT", 43.672805))
+DELIVERY_DEPOT_LON = float(os.getenv("DELIVERY_DEPOT_LON", 40.200094))
+# Оценка времени: средняя скорость, коэффициент «дорога длиннее прямой», стоянка на точке
+DELIVERY_AVG_SPEED_KMH = float(os.getenv("DELIVERY_AVG_SPEED_KMH", 30))
+DELIVERY_ROAD_FACTOR = float(os.getenv("DELIVERY_ROAD_FACTOR", 1.4))
+DELIVERY_STOP_MINUTES = float(os.getenv("DELIVERY_STOP_MINUTES", 5))
+
+# Заказы, которые не везём: отказ, истёк, черновик
+SKIP_ORDER_STATUSES = (6, 7, 8)
+
+
+class DeliveryStop(NamedTuple):
+    delivery_id: int
+    order_id: int
+    address: str
+    lat: float
+    lon: float
+    zone_id: Optional[int]
+
+
+class ZoneRoute(NamedTuple):
+    zone_id: Optional[int]
+    zone_name: str
+    stops: tuple          # DeliveryStop в порядке объезда
+    legs_km: tuple        # перегоны: склад -> 1-я остановка, 1-я -> 2-я, ...
+    etas: tuple           # ожидаемое время прибытия на каждую остановку
+    total_km: float
+    duration: timedelta
+
+
+class IntervalSchedule(NamedTuple):
+    day: date
+    interval_id: int
+    interval_name: str
+    display_interval: str
+    routes: tuple         # ZoneRoute по зонам, дешёвые зоны первыми, «вне зон» — последней
+
+
+async def load_deliveries(day: date, interval_id: int) -> List[DeliveryStop]:
+    """Доставки на дату и интервал (без отменённых/просроченных заказов), координаты из PostGIS"""
+    start = datetime.combine(day, time.min)
+    async with get_async_session() as session:
+        rows = (await session.execute(
+            select(
+                OrderDelivery.id,
+                OrderDelivery.order_id,
+                func.coalesce(OrderDelivery.delivery_address_short, OrderDelivery.delivery_address),
+                func.ST_Y(OrderDelivery.delivery_point),
+                func.ST_X(OrderDelivery.delivery_point),
+                OrderDelivery.delivery_zone_id
+            )
+            .join(Order, Order.id == OrderDelivery.order_id)
+            .where(
+                OrderDelivery.delivery_date >= start,
+                OrderDelivery.delivery_date < start + timedelta(days=1),
+                OrderDelivery.delivery_interval_id == interval_id,
+                Order.is_active.is_(True),
+                Order.status_id.notin_(SKIP_ORDER_STATUSES)
+            )
+            .order_by(OrderDelivery.id)
+        )).all()
+    return [DeliveryStop(*row) for row in rows]
+
+
+async def _cluster_by_zone(stops: List[DeliveryStop]) -> Dict[Optional[int], List[DeliveryStop]]:
+    """Группы по зоне; зона, не сохранённая при оформлении, определяется по точке"""
+    unknown = [s for s in stops if s.zone_id is None]
+    if unknown:
+        matches = await resolve_zones([(s.lat, s.lon) for s in unknown])
+        resolved = {s.delivery_id: m.zone_id for s, m in zip(unknown, matches) if m is not None}
+        stops = [s._replace(zone_id=resolved.get(s.delivery_id)) if s.zone_id is None else s for s in stops]
+
+    clusters: Dict[Optional[int], List[DeliveryStop]] = defaultdict(list)
+    for stop in stops:
+        clusters[stop.zone_id].append(stop)
+    return clusters
+
+
+def build_zone_route(zone_id: Optional[int], zone_name: str, stops: List[DeliveryStop],
+                     start_at: datetime) -> ZoneRoute:
+    """Порядок объезда зоны и ETA по каждой остановке"""
+    plan = plan_route(
+        DELIVERY_DEPOT_LAT, DELIVERY_DEPOT_LON,
+        [s.lat for s in stops], [s.lon for s in stops]
+    )
+    ordered = tuple(stops[i] for i in plan.order)
+    etas = []
+    moment = start_at
+    for leg_km in plan.legs_km:
+        moment += timedelta(hours=leg_km * DELIVERY_ROAD_FACTOR / DELIVERY_AVG_SPEED_KMH)
+        etas.append(moment)
+        moment += timedelta(minutes=DELIVERY_STOP_MINUTES)
+    return ZoneRoute(
+        zone_id=zone_id,
+        zone_name=zone_name,
+        stops=ordered,
+        legs_km=tuple(plan.legs_km),
+        etas=tuple(etas),
+        total_km=plan.total_km,
+        duration=moment - start_at
+    )
+
+
+async def schedule_interval(day: date, interval_id: int) -> Optional[IntervalSchedule]:
+    """Все доставки интервала: кластеры по зонам и маршрут по каждой зоне"""
+    async with get_async_session() as session:
+        interval = await session.get(DeliveryInterval, interval_id)
+        if interval is None:
+            return None
+        interval_name, display_interval = interval.name, interval.display_interval
+        start_at = datetime.combine(day, interval.start_interval)
+
+    started = time_module.perf_counter()
+    stops = await load_deliveries(day, interval_id)
+    clusters = await _cluster_by_zone(stops)
+    zones = {z.zone_id: z for z in (await get_zone_index()).zones}
+
+    def zone_rank(zone_id):
+        zone = zones.get(zone_id)
+        return (zone is None, zone.cost if zone else 0, zone_id or 0)
+
+    routes = tuple(
+        build_zone_route(
+            zone_id,
+            zones[zone_id].name if zone_id in zones else "вне зон доставки",
+            clusters[zone_id],
+            start_at
+        )
+        for zone_id in sorted(clusters, key=zone_rank)
+    )
+
+    structured_logger.info(
+        "Delivery interval scheduled",
+        action="delivery_schedule",
+        execution_time=time_module.perf_counter() - started,
+        context={
+            "day": day.isoformat(),
+            "interval_id": interval_id,
+            "stops": len(stops),
+            "zones": len(routes),
+            "total_km": round(sum(r.total_km for r in routes), 1)
+        }
+    )
+    return IntervalSchedule(day, interval_id, interval_name, display_interval, routes)
+
+
+def _format_duration(duration: timedelta) -> str:
+    minutes = int(duration.total_seconds() // 60)
+    return f"{minutes // 60} ч {minutes % 60:02d} мин" if minutes >= 60 else f"{minutes} мин"
+
+
+def format_route_summary(schedule: IntervalSchedule) -> str:
+    """Сводка для курьера (обычный текст — адреса не экранируются)"""
+    lines = [f"🚚 Доставки на {schedule.day.strftime('%d.%m.%Y')}, {schedule.interval_name} ({schedule.display_interval})"]
+    if not schedule.routes:
+        lines.append("Доставок нет.")
+        return "\n".join(lines)
+
+    for route in schedule.routes:
+        lines.append("")
+        lines.append(
+            f"📍 {route.zone_name}: {len(route.stops)} адр., ~{route.total_km * DELIVERY_ROAD_FACTOR:.0f} км, "
+            f"~{_format_duration(route.duration)}"
+        )
+        for n, (stop, eta) in enumerate(zip(route.stops, route.etas), start=1):
+            lines.append(f"{n}. {eta.strftime('%H:%M')} — {stop.address} (заказ #{stop.order_id})")
+    return "\n".join(lines)
+
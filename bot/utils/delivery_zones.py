@@ -0,0 +1,123 @@
+import asyncio
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+
+from db.db_async import get_async_session
+from db.models import DeliveryZone
+from utils.logging_config import structured_logger
+from utils.zone_index import ZoneIndex, ZoneMatch
+
+# Как часто сверять отпечаток delivery_zones с загруженным (секунды); 0 — не сверять
+DELIVERY_ZONES_REFRESH_INTERVAL = int(os.getenv("DELIVERY_ZONES_REFRESH_INTERVAL", 300))
+
+# Отпечаток таблицы: меняется при любом изменении id/цены/полигона, читается без выгрузки геометрии
+_FINGERPRINT_SQL = text("""
+    SELECT md5(coalesce(string_agg(
+        id::text || ':' || cost::text || ':' || md5(ST_AsBinary(geometry)), ',' ORDER BY id
+    ), ''))
+    FROM public.delivery_zones
+""")
+
+_index: Optional[ZoneIndex] = None
+_load_lock = asyncio.Lock()
+_stats = {"loads": 0, "checks": 0, "lookups": 0, "misses": 0}
+
+
+async def _load_index() -> ZoneIndex:
+    """Все полигоны delivery_zones одним запросом (WKB) + отпечаток в той же сессии"""
+    async with get_async_session() as session:
+        rows = (await session.execute(
+            select(
+                DeliveryZone.id,
+                DeliveryZone.name,
+                DeliveryZone.cost,
+                func.ST_AsBinary(DeliveryZone.geometry)
+            )
+        )).all()
+        fingerprint = (await session.execute(_FINGERPRINT_SQL)).scalar_one()
+    return ZoneIndex(((z_id, name, cost, bytes(wkb)) for z_id, name, cost, wkb in rows), fingerprint)
+
+
+async def _replace_index(reason: str) -> ZoneIndex:
+    """Вызывается под _load_lock"""
+    global _index
+    index = await _load_index()
+    _index = index
+    _stats["loads"] += 1
+    structured_logger.info(
+        "Delivery zones loaded",
+        action="delivery_zones_load",
+        context={"reason": reason, "zones": len(index), "fingerprint": index.fingerprint}
+    )
+    return index
+
+
+async def reload_zones(reason: str = "") -> ZoneIndex:
+    """Перечитать зоны из БД и атомарно подменить индекс (текущие поиски дорабатывают по старому)"""
+    async with _load_lock:
+        return await _replace_index(reason)
+
+
+async def get_zone_index() -> ZoneIndex:
+    index = _index
+    if index is not None:
+        return index
+    async with _load_lock:
+        # пока ждали лок, индекс мог загрузить другой обработчик
+        if _index is None:
+            await _replace_index("lazy_load")
+        return _index
+
+
+async def resolve_zone(lat: float, lon: float) -> Optional[ZoneMatch]:
+    """Зона доставки и её стоимость для точки — без запроса в PostGIS"""
+    match = (await get_zone_index()).resolve(lat, lon)
+    _stats["lookups"] += 1
+    if match is None:
+        _stats["misses"] += 1
+    return match
+
+
+async def resolve_zones(points: Sequence[Tuple[float, float]]) -> List[Optional[ZoneMatch]]:
+    """Пакетный вариант resolve_zone: points — [(lat, lon), ...]"""
+    index = await get_zone_index()
+    if not points:
+        return []
+    lats, lons = zip(*points)
+    matches = index.resolve_many(lats, lons)
+    _stats["lookups"] += len(matches)
+    _stats["misses"] += sum(1 for m in matches if m is None)
+    return matches
+
+
+async def refresh_zones_if_changed(context=None) -> bool:
+    """Джоб: сверяет отпечаток таблицы и перезагружает индекс, если зоны поменялись"""
+    _stats["checks"] += 1
+    try:
+        async with get_async_session() as session:
+            fingerprint = (await session.execute(_FINGERPRINT_SQL)).scalar_one()
+    except Exception as e:
+        structured_logger.warning(
+            f"Delivery zones check failed: {e}",
+            action="delivery_zones_check_error"
+        )
+        return False
+    if _index is not None and _index.fingerprint == fingerprint:
+        return False
+    await reload_zones("zones_changed")
+    return True
+
+
+async def init_delivery_zones() -> None:
+    """Загрузка зон при старте бота"""
+    await reload_zones("startup")
+
+
+def delivery_zones_stats() -> dict:
+    return {
+        **_stats,
+        "zones": len(_index) if _index is not None else 0,
+        "fingerprint": _index.fingerprint if _index is not None else None,
+    }
@@ -0,0 +1,335 @@
+import os
+import re
+import csv
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, List, Tuple, Dict, NamedTuple
+
+from utils.logging_config import structured_logger
+
+# CSV: city,street,house,lat,lon (строка с пустым house — точка самой улицы).
+# Файл собирается из выгрузки OpenStreetMap скриптом build_gazetteer.py
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "gazetteer.csv")
+)
+GAZETTEER_ENABLED = os.getenv("GAZETTEER_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Нечёткий поиск по триграммам — только если префиксный ничего не нашёл
+TRIGRAM_MIN_LENGTH = 4
+TRIGRAM_THRESHOLD = 0.35
+# Триграммы, которые есть у большой доли улиц («ска», «ая »), кандидатов не отбирают
+TRIGRAM_MAX_SHARE = 0.05
+TRIGRAM_CANDIDATES = 50
+
+# Тип улицы (с сокращениями) не участвует в поиске по словам, но различает
+# одноимённые улицы: «Курортный проспект» и «Курортный переулок»
+_STREET_TYPES = {
+    "улица": "улица", "ул": "улица",
+    "проспект": "проспект", "пр": "проспект", "просп": "проспект", "пр-т": "проспект",
+    "переулок": "переулок", "пер": "переулок",
+    "шоссе": "шоссе", "ш": "шоссе",
+    "бульвар": "бульвар", "б-р": "бульвар", "бул": "бульвар",
+    "площадь": "площадь", "пл": "площадь",
+    "проезд": "проезд", "пр-д": "проезд",
+    "тупик": "тупик", "туп": "тупик",
+    "набережная": "набережная", "наб": "набережная",
+    "микрорайон": "микрорайон", "мкр": "микрорайон",
+}
+# Слова, которые не различают адреса: страна/регион, тип населённого пункта, «дом»
+_NOISE_WORDS = frozenset({
+    "россия", "краснодарский", "край", "г", "город", "пгт", "поселок", "пос", "п", "село", "с",
+    "д", "дом",
+})
+_STOP_WORDS = _NOISE_WORDS | frozenset(_STREET_TYPES)
+_TOKEN_RE = re.compile(r"[0-9a-zа-я/-]+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall(text.lower().replace("ё", "е")))
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in normalize(text).split() if w not in _STOP_WORDS]
+
+
+def _street_words(tokens: List[str]) -> List[str]:
+    """Слова улицы для поиска; улица из одного типа («Набережная») ищется по нему"""
+    words = [t for t in tokens if t not in _STOP_WORDS]
+    return words or [_STREET_TYPES[t] for t in tokens if t in _STREET_TYPES]
+
+
+def _street_kinds(text: str) -> frozenset:
+    return frozenset(_STREET_TYPES[w] for w in normalize(text).split() if w in _STREET_TYPES)
+
+
+def _house_key(house: str) -> str:
+    return house.lower().replace("ё", "е").replace(" ", "")
+
+
+def _natural_key(house: str):
+    digits = re.match(r"\d+", house)
+    return (int(digits.group()) if digits else 0, house)
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Address(NamedTuple):
+    label: str
+    lat: float
+    lon: float
+
+
+class Street:
+    """Улица одного населённого пункта: точка улицы и отсортированные номера домов"""
+    __slots__ = ("id", "city", "city_key", "name", "words", "key", "kind", "point", "houses", "house_keys")
+
+    def __init__(self, street_id: int, city: str, name: str):
+        self.id = street_id
+        self.city = city
+        self.city_key = " ".join(_words(city))
+        self.name = name
+        self.words = _street_words(normalize(name).split())
+        self.key = " ".join(self.words)
+        self.kind = _street_kinds(name)
+        self.point: Optional[Address] = None
+        self.houses: Dict[str, Address] = {}
+        # ключи домов по строке — для префиксного bisect по номеру
+        self.house_keys: List[str] = []
+
+    def address(self, house: str, lat: float, lon: float) -> Address:
+        label = f"Россия, {self.city}, {self.name}" + (f" {house}" if house else "")
+        return Address(label, lat, lon)
+
+
+class Gazetteer:
+    """
+    Локальный справочник адресов. Поиск без обращения к Mapbox:
+    - слова улицы — префиксы в отсортированном списке слов (bisect);
+    - номер дома — префикс в отсортированном списке домов улицы;
+    - опечатки — триграммы названий улиц, если по префиксам ничего нет.
+    """
+
+    def __init__(self):
+        self.streets: List[Street] = []
+        self._by_key: Dict[Tuple[str, str], Street] = {}
+        self._cities: Dict[Tuple[str, ...], str] = {}
+        # длинные названия первыми: «красная поляна» раньше «поляна»
+        self._city_keys: List[Tuple[str, ...]] = []
+        # (слово улицы, id улицы) по возрастанию
+        self._word_index: List[Tuple[str, int]] = []
+        self._trigram_index: Dict[str, List[int]] = defaultdict(list)
+        self._street_trigrams: List[frozenset] = []
+        self._trigram_max_df = 0
+
+    def __len__(self):
+        return sum(len(street.houses) for street in self.streets)
+
+    def add(self, city: str, street_name: str, house: str, lat: float, lon: float):
+        city_key = tuple(_words(city))
+        self._cities.setdefault(city_key, city)
+        key = (" ".join(city_key), normalize(street_name))
+        street = self._by_key.get(key)
+        if street is None:
+            street = Street(len(self.streets), city, street_name)
+            self.streets.append(street)
+            self._by_key[key] = street
+        house = house.strip()
+        if house:
+            street.houses[_house_key(house)] = street.address(house, lat, lon)
+        else:
+            street.point = street.address("", lat, lon)
+
+    def build(self):
+        """Построить индексы после загрузки всех строк"""
+        self._city_keys = sorted(self._cities, key=len, reverse=True)
+        self._trigram_max_df = max(TRIGRAM_CANDIDATES, int(len(self.streets) * TRIGRAM_MAX_SHARE))
+        self._word_index = sorted(
+            (word, street.id) for street in self.streets for word in set(street.words)
+        )
+        self._trigram_index = defaultdict(list)
+        self._street_trigrams = []
+        for street in self.streets:
+            trigrams = frozenset(_trigrams(street.key))
+            self._street_trigrams.append(trigrams)
+            for trigram in trigrams:
+                self._trigram_index[trigram].append(street.id)
+            street.house_keys = sorted(street.houses)
+            if street.point is None and street.houses:
+                # точка улицы — центр её домов
+                points = street.houses.values()
+                street.point = street.address(
+                    "",
+                    round(sum(p.lat for p in points) / len(points), 6),
+                    round(sum(p.lon for p in points) / len(points), 6),
+                )
+
+    @classmethod
+    def load(cls, path: str) -> "Gazetteer":
+        gazetteer = cls()
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                gazetteer.add(row["city"], row["street"], row.get("house") or "",
+                              float(row["lat"]), float(row["lon"]))
+        gazetteer.build()
+        return gazetteer
+
+    def _parse(self, query: str) -> Tuple[Optional[str], List[str], Optional[str], frozenset]:
+        """Запрос -> (город или None, слова улицы, номер дома или None, типы улицы)"""
+        tokens = normalize(query).split()
+        city = None
+        for city_key in self._city_keys:
+            n = len(city_key)
+            for i in range(len(tokens) - n + 1):
+                if tuple(tokens[i:i + n]) == city_key:
+                    city = " ".join(city_key)
+                    del tokens[i:i + n]
+                    break
+            if city:
+                break
+
+        tokens = [t for t in tokens if t not in _NOISE_WORDS]
+        kinds = frozenset(_STREET_TYPES[t] for t in tokens if t in _STREET_TYPES)
+        house = None
+        # «75 а», «75 к2» — литера или корпус отдельным словом
+        if len(tokens) >= 3 and tokens[-2][0].isdigit() and not tokens[-1][0].isdigit() and len(tokens[-1]) <= 2:
+            tokens[-2:] = [tokens[-2] + tokens[-1]]
+        if len(tokens) >= 2 and tokens[-1][0].isdigit():
+            house = tokens.pop()
+        return city, _street_words(tokens), house, kinds
+
+    def _prefix_streets(self, words: List[str]) -> List[int]:
+        candidates = None
+        for word in sorted(words, key=len, reverse=True):
+            found = set()
+            i = bisect_left(self._word_index, (word,))
+            index = self._word_index
+            while i < len(index) and index[i][0].startswith(word):
+                found.add(index[i][1])
+                i += 1
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return []
+        return list(candidates or ())
+
+    def _trigram_streets(self, words: List[str], limit: int) -> List[int]:
+        query = " ".join(words)
+        if len(query) < TRIGRAM_MIN_LENGTH:
+            return []
+        trigrams = _trigrams(query)
+        common = defaultdict(int)
+        for trigram in trigrams:
+            posting = self._trigram_index.get(trigram, ())
+            if len(posting) > self._trigram_max_df:
+                continue
+            for street_id in posting:
+                common[street_id] += 1
+        # кандидаты по редким триграммам, точная оценка (Жаккар) — по всем
+        candidates = sorted(common, key=common.get, reverse=True)[:TRIGRAM_CANDIDATES]
+        scored = []
+        for street_id in candidates:
+            street_trigrams = self._street_trigrams[street_id]
+            shared = len(trigrams & street_trigrams)
+            score = shared / (len(trigrams) + len(street_trigrams) - shared)
+            if score >= TRIGRAM_THRESHOLD:
+                scored.append((-score, street_id))
+        scored.sort()
+        return [street_id for _, street_id in scored[:limit]]
+
+    def _find_streets(self, city: Optional[str], words: List[str], kinds: frozenset,
+                      fuzzy: bool, limit: int) -> List[Street]:
+        if not words:
+            return []
+        ids = self._prefix_streets(words)
+        if ids:
+            streets = [self.streets[i] for i in ids]
+            # совпадение с первым словом названия выше, затем короткие названия
+            streets.sort(key=lambda s: (not s.words[0].startswith(words[0]), len(s.key), s.key, s.city))
+        elif fuzzy:
+            streets = [self.streets[i] for i in self._trigram_streets(words, limit * 4)]
+        else:
+            return []
+        if city:
+            streets = [s for s in streets if s.city_key == city]
+        if kinds:
+            # тип из запроса уточняет, но не отсекает всё (пользователь мог ошибиться в типе)
+            streets = [s for s in streets if s.kind & kinds] or streets
+        return streets
+
+    def autocomplete(self, query: str, limit: int = 3) -> List[Address]:
+        city, words, house, kinds = self._parse(query)
+        if house is not None:
+            house = _house_key(house)
+        result = []
+        for street in self._find_streets(city, words, kinds, fuzzy=True, limit=limit):
+            if house is None:
+                if street.point is not None:
+                    result.append(street.point)
+            else:
+                keys = street.house_keys
+                i = bisect_left(keys, house)
+                matched = []
+                while i < len(keys) and keys[i].startswith(house):
+                    matched.append(keys[i])
+                    i += 1
+                # точный номер первым, затем «75а», «75/2», «750»... по порядку номеров
+                matched.sort(key=lambda k: (k != house, _natural_key(k)))
+                result.extend(street.houses[k] for k in matched[:limit - len(result)])
+            if len(result) >= limit:
+                break
+        return result[:limit]
+
+    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """Точный адрес с номером дома; неоднозначность (одна улица в разных городах) — None"""
+        city, words, house, kinds = self._parse(address)
+        if house is None:
+            return None
+        house = _house_key(house)
+        found = [
+            street.houses[house]
+            for street in self._find_streets(city, words, kinds, fuzzy=False, limit=1)
+            if house in street.houses and street.words == words
+        ]
+        if len(found) != 1:
+            return None
+        return found[0].lat, found[0].lon
+
+
+_gazetteer: Optional[Gazetteer] = None
+_loaded = False
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Справочник из GAZETTEER_PATH (загружается один раз); None — файла нет или он выключен"""
+    global _gazetteer, _loaded
+    if _loaded:
+        return _gazetteer
+    _loaded = True
+    if not GAZETTEER_ENABLED:
+        return None
+    if not os.path.exists(GAZETTEER_PATH):
+        structured_logger.warning(
+            "Gazetteer file not found, geocoding uses Mapbox only",
+            action="gazetteer_missing",
+            context={"path": GAZETTEER_PATH}
+        )
+        return None
+    try:
+        _gazetteer = Gazetteer.load(GAZETTEER_PATH)
+    except (OSError, ValueError, KeyError) as e:
+        structured_logger.error(
+            f"Failed to load gazetteer: {e}",
+            action="gazetteer_load_error",
+            context={"path": GAZETTEER_PATH}
+        )
+        return None
+    structured_logger.info(
+        "Gazetteer loaded",
+        action="gazetteer_loaded",
+        context={"path": GAZETTEER_PATH, "streets": len(_gazetteer.streets), "houses": len(_gazetteer)}
+    )
+    return _gazetteer
@@ -1,13 +1,216 @@
 import os
-from typing import Optional, List, Tuple, Literal
+import re
+import time
+import asyncio
+import importlib.util
+from collections import OrderedDict
+from typing import Optional, List, Tuple, Literal, Hashable, Any, Dict
+from urllib.parse import quote
 import httpx
 
+from utils.logging_config import structured_logger
+from utils.gazetteer import get_gazetteer
+from utils.rate_limit import TokenBucket
+
 
 MAPBOX_TOKEN = os.getenv("MAPBOX_TOKEN")
 if not MAPBOX_TOKEN:
     raise ValueError("MAPBOX_TOKEN is not set in .env")
 
-MAPBOX_URL = "https://api.mapbox.com/geocoding/v5/mapbox.places"
+# MAPBOX_URL переопределяется для локального стенда (bench_geocoding.py)
+MAPBOX_URL = os.getenv("MAPBOX_URL", "https://api.mapbox.com/geocoding/v5/mapbox.places")
+
+# Общий HTTP-клиент: keep-alive пул вместо TCP+TLS на каждое нажатие клавиши
+MAPBOX_TIMEOUT = float(os.getenv("MAPBOX_TIMEOUT", 5.0))
+MAPBOX_MAX_CONNECTIONS = int(os.getenv("MAPBOX_MAX_CONNECTIONS", 20))
+MAPBOX_KEEPALIVE_CONNECTIONS = int(os.getenv("MAPBOX_KEEPALIVE_CONNECTIONS", 10))
+MAPBOX_KEEPALIVE_EXPIRY = float(os.getenv("MAPBOX_KEEPALIVE_EXPIRY", 60.0))
+# HTTP/2 требует пакет h2; без него клиент остаётся на HTTP/1.1 keep-alive
+MAPBOX_HTTP2 = os.getenv("MAPBOX_HTTP2", "true").lower() not in ("0", "false", "no")
+
+# Кэш ответов: GEOCODE_CACHE_SIZE=0 отключает кэширование
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", 5000))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", 24 * 3600))
+
+# Квота Mapbox: токен-бакет на все исходящие запросы (MAPBOX_RATE_LIMIT=0 — без ограничения).
+# Если токена нет дольше MAPBOX_RATE_WAIT секунд, запрос к Mapbox не выполняется.
+MAPBOX_RATE_LIMIT = float(os.getenv("MAPBOX_RATE_LIMIT", 10))
+MAPBOX_RATE_BURST = int(os.getenv("MAPBOX_RATE_BURST", 20))
+MAPBOX_RATE_WAIT = float(os.getenv("MAPBOX_RATE_WAIT", 1.0))
+
+AUTOCOMPLETE_LIMIT = 3
+# Переиспользование по префиксу: не короче стольких символов
+PREFIX_REUSE_MIN_LENGTH = int(os.getenv("GEOCODE_PREFIX_MIN_LENGTH", 3))
+
+
+class TTLCache:
+    """LRU-кэш с временем жизни записей; рассчитан на один event loop (без блокировок)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default=None):
+        """Как get, но без учёта в hits/misses (для поиска по префиксам)"""
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            return default
+        return item[1]
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_cache = TTLCache(GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL)
+_bucket = TokenBucket(MAPBOX_RATE_LIMIT, MAPBOX_RATE_BURST)
+_client: Optional[httpx.AsyncClient] = None
+# single-flight: ключ кэша -> задача выполняющегося запроса к Mapbox
+_inflight: Dict[Hashable, asyncio.Task] = {}
+_metrics = {
+    "requests": 0,
+    "local_hits": 0,
+    "cache_hits": 0,
+    "prefix_hits": 0,
+    "coalesced": 0,
+    "upstream_calls": 0,
+    "upstream_errors": 0,
+    "rate_limited": 0,
+}
+
+
+def _create_client() -> httpx.AsyncClient:
+    http2 = MAPBOX_HTTP2 and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=MAPBOX_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=MAPBOX_MAX_CONNECTIONS,
+            max_keepalive_connections=MAPBOX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=MAPBOX_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+async def start_http_client():
+    """Создать общий клиент (вызывается из lifespan FastAPI)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+
+
+async def close_http_client():
+    """Закрыть общий клиент и его пул соединений"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    # вне FastAPI (скрипты, бот) клиент создаётся лениво при первом запросе
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+def normalize_query(query: str) -> str:
+    """Ключ кэша: регистр и лишние пробелы не влияют на ответ Mapbox"""
+    return " ".join(query.lower().split())
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+def metrics() -> dict:
+    """Счётчики для /geocoding/metrics: сколько обращений к Mapbox удалось не делать"""
+    saved = _metrics["local_hits"] + _metrics["cache_hits"] + _metrics["prefix_hits"] + _metrics["coalesced"]
+    requests = _metrics["requests"]
+    return {
+        **_metrics,
+        "upstream_saved": saved,
+        "saved_ratio": round(saved / requests, 3) if requests else 0.0,
+        "inflight": len(_inflight),
+        "cache": _cache.stats(),
+    }
+
+
+async def _single_flight(key: Hashable, fetch):
+    """
+    Одновременные одинаковые запросы ждут один вызов fetch(). Запрос к Mapbox идёт
+    отдельной задачей: отключение клиента, который его начал, не отменяет его для остальных.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        _metrics["coalesced"] += 1
+    return await asyncio.shield(task)
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _matches_query(label: str, tokens: List[str]) -> bool:
+    """Каждое слово запроса — начало какого-то слова подсказки"""
+    words = _WORD_RE.findall(label.lower())
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+def _reuse_broader(normalized: str, language: str) -> Optional[List[dict]]:
+    """
+    Ответ для более длинного запроса из закэшированного ответа на его префикс.
+    Годится только исчерпывающий ответ: непустой и меньше AUTOCOMPLETE_LIMIT —
+    тогда все совпадения для уточнённого запроса уже в нём, остаётся отфильтровать.
+    Пустой ответ на префикс ничего не доказывает (Mapbox ищет нечётко, и уточнённый
+    запрос может найти то, чего не нашёл короткий), поэтому не переиспользуется.
+    """
+    tokens = _WORD_RE.findall(normalized)
+    if not tokens:
+        return None
+    for end in range(len(normalized) - 1, PREFIX_REUSE_MIN_LENGTH - 1, -1):
+        cached = _cache.peek(("autocomplete", normalized[:end].rstrip(), language))
+        if cached is None:
+            continue
+        suggestions, exhaustive = cached
+        if not exhaustive or not suggestions:
+            # ближайший префикс неполный — более короткие тем более
+            return None
+        matched = [dict(item) for item in suggestions if _matches_query(item["label"], tokens)]
+        # ничего не совпало (номер дома, опечатка) — пусть ответит Mapbox, а не пустой список
+        return matched or None
+    return None
 
 
 async def _query_mapbox(
@@ -15,47 +218,125 @@ async def _query_mapbox(
     limit: int = 3,
     autocomplete: bool = True,
     language: Literal["ru", "en"] = "ru"
-) -> List[dict]:
+) -> Optional[List[dict]]:
+    """Features из Mapbox; None — ошибка запроса (такой ответ не кэшируется)"""
     params = {
         "access_token": MAPBOX_TOKEN,
         "autocomplete": str(autocomplete).lower(),
         "limit": limit,
         "language": language
     }
-    url = f"{MAPBOX_URL}/{query}.json"
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("features", [])
+    url = f"{MAPBOX_URL}/{quote(query, safe='')}.json"
+    if not await _bucket.acquire(MAPBOX_RATE_WAIT):
+        _metrics["rate_limited"] += 1
+        structured_logger.warning(
+            "Mapbox rate limit reached, request skipped",
+            action="geocoding_rate_limited",
+            context={"rate": MAPBOX_RATE_LIMIT, "burst": MAPBOX_RATE_BURST}
+        )
+        return None
 
-        return []
+    _metrics["upstream_calls"] += 1
+    try:
+        response = await _get_client().get(url, params=params)
+    except httpx.HTTPError as e:
+        _metrics["upstream_errors"] += 1
+        structured_logger.warning(
+            f"Mapbox request failed: {e}",
+            action="geocoding_request_error",
+            context={"error_type": type(e).__name__}
+        )
+        return None
 
+    if response.status_code == 200:
+        data = response.json()
+        return data.get("features", [])
 
-async def geocode_address(address: str) -> Optional[Tuple[float, float]]:
-    features = await _query_mapbox(address, limit=1, autocomplete=False)
-    if features:
-        lon, lat = features[0]["center"]
-        return lat, lon
+    _metrics["upstream_errors"] += 1
+    structured_logger.warning(
+        f"Mapbox responded with {response.status_code}",
+        action="geocoding_request_error",
+        context={"status_code": response.status_code}
+    )
     return None
 
 
-async def autocomplete_address(query: str) -> List[dict]:
-    features = await _query_mapbox(query, limit=3, autocomplete=True)
-    
-    # Фильтрация только адресов, которые начинаются с "Россия"
-    filtered_features = [
-        f for f in features 
-        if f.get("place_name", "").startswith("Россия")
-    ]
-    
-    return [
-        {
-            "label": f["place_name"],
-            "lat": f["center"][1],
-            "lon": f["center"][0]
-        }
-        for f in filtered_features
-    ]
+async def geocode_address(address: str, language: Literal["ru", "en"] = "ru") -> Optional[Tuple[float, float]]:
+    _metrics["requests"] += 1
+    # локальный справочник (подписи на русском) — Mapbox только при промахе
+    gazetteer = get_gazetteer() if language == "ru" else None
+    if gazetteer is not None:
+        coords = gazetteer.geocode(address)
+        if coords is not None:
+            _metrics["local_hits"] += 1
+            return coords
+
+    key = ("geocode", normalize_query(address), language)
+    cached = _cache.get(key)
+    if cached is not None:
+        _metrics["cache_hits"] += 1
+        return cached[0]
+
+    async def fetch():
+        features = await _query_mapbox(address, limit=1, autocomplete=False, language=language)
+        if features is None:
+            return None
+        coords = None
+        if features:
+            lon, lat = features[0]["center"]
+            coords = (lat, lon)
+        # кэшируется и «не найдено» — обёртка отличает его от промаха кэша
+        _cache.set(key, (coords,))
+        return coords
+
+    return await _single_flight(key, fetch)
+
 
+async def autocomplete_address(query: str, language: Literal["ru", "en"] = "ru") -> List[dict]:
+    _metrics["requests"] += 1
+    gazetteer = get_gazetteer() if language == "ru" else None
+    if gazetteer is not None:
+        local = gazetteer.autocomplete(query, AUTOCOMPLETE_LIMIT)
+        if local:
+            _metrics["local_hits"] += 1
+            return [{"label": a.label, "lat": a.lat, "lon": a.lon} for a in local]
 
+    normalized = normalize_query(query)
+    key = ("autocomplete", normalized, language)
+    cached = _cache.get(key)
+    if cached is not None:
+        _metrics["cache_hits"] += 1
+        return [dict(item) for item in cached[0]]
+
+    reused = _reuse_broader(normalized, language)
+    if reused is not None:
+        _metrics["prefix_hits"] += 1
+        return reused
+
+    async def fetch():
+        features = await _query_mapbox(query, limit=AUTOCOMPLETE_LIMIT, autocomplete=True, language=language)
+        if features is None:
+            return None
+
+        # Фильтрация только адресов, которые начинаются с "Россия"
+        filtered_features = [
+            f for f in features
+            if f.get("place_name", "").startswith("Россия")
+        ]
+
+        suggestions = tuple(
+            {
+                "label": f["place_name"],
+                "lat": f["center"][1],
+                "lon": f["center"][0]
+            }
+            for f in filtered_features
+        )
+        # exhaustive: Mapbox вернул всё, что нашёл, и это не пусто — ответ годится для уточнений запроса
+        _cache.set(key, (suggestions, bool(suggestions) and len(features) < AUTOCOMPLETE_LIMIT))
+        return suggestions
+
+    suggestions = await _single_flight(key, fetch)
+    if suggestions is None:
+        return []
+    return [dict(item) for item in suggestions]
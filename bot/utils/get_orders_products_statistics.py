@@ -2,7 +2,7 @@ from sqlalchemy import select, func, and_
 from sqlalchemy.orm import selectinload
 from datetime import datetime, date
 from decimal import Decimal
-from db.models import Order, Product, ProductSize, Size, Session, User
+from db.models import OrderStatsDaily, Product, Session, User
 from db.db_async import get_async_session
 
 from utils.logging_config import (
@@ -33,106 +33,79 @@ ORDER_STATUS_DRAFT = 8
 DEGUSTATION_ROLE = 3
 
 
+HONEY_STATS_STATUSES = (
+    ORDER_STATUS_PAYED,
+    ORDER_STATUS_PROCESSING,
+    ORDER_STATUS_READY,
+    ORDER_STATUS_CUSTOMER_INFORMED,
+    ORDER_STATUS_CREATED,
+)
+
+
 @log_db_select(log_slow_only=True, slow_threshold=0.5)
 async def get_manager_stats_message(user_tg_id: int) -> str:
     """
     Формирует сообщение со статистикой продаж и заказов для менеджера или админа.
+    Данные берутся из дневного агрегата order_stats_daily (ведётся триггером на orders)
+    одним запросом; счётчики пользователей — вторым.
     """
     async with get_async_session() as session:
         is_admin = str(user_tg_id) == str(OWNER_ID)
 
-        # ===== 1. Продажи мёда по сортам =====
+        # ===== 1. Агрегат по товарам и статусам =====
         stmt = (
             select(
                 Product.name.label("product_name"),
-                func.sum(Order.product_count * Size.name).label("total_kg"),
-                func.sum(Order.total_price).label("total_sum")
-            )
-            .join(ProductSize, Order.product_size_id == ProductSize.id)
-            .join(Product, ProductSize.product_id == Product.id)
-            .join(Size, ProductSize.size_id == Size.id)
-            .where(Order.status_id.in_([
-                ORDER_STATUS_PAYED,
-                ORDER_STATUS_PROCESSING,
-                ORDER_STATUS_READY,
-                ORDER_STATUS_CUSTOMER_INFORMED,
-                ORDER_STATUS_CREATED
-
-            ]))
-            .group_by(Product.name)
-            .order_by(func.sum(Order.product_count * Size.name).desc())  # <-- сортировка по количеству
-        )
-
-        if not is_admin:
-            stmt = stmt.where(Product.created_by == user_tg_id)
-
-        result = await session.execute(stmt)
-        product_stats = result.all()
-
-        # ===== 2. Общие итоги по заказам =====
-        total_stmt = select(
-            func.count(Order.id),
-            func.sum(Order.total_price)
-        )
-        if not is_admin:
-            total_stmt = (
-                total_stmt.join(ProductSize, Order.product_size_id == ProductSize.id)
-                          .join(Product, ProductSize.product_id == Product.id)
-                          .where(Product.created_by == user_tg_id)
+                OrderStatsDaily.status_id,
+                func.sum(OrderStatsDaily.orders_count).label("orders_count"),
+                func.sum(OrderStatsDaily.total_kg).label("total_kg"),
+                func.sum(OrderStatsDaily.total_sum).label("total_sum")
             )
-
-        total_orders_count, total_orders_sum = (await session.execute(total_stmt)).one()
-
-        # ===== 3. Подсчёт по статусам =====
-        status_stmt = select(
-            Order.status_id,
-            func.count(Order.id),
-            func.sum(Order.total_price)
+            .join(Product, OrderStatsDaily.product_id == Product.id)
+            .group_by(Product.name, OrderStatsDaily.status_id)
         )
         if not is_admin:
-            status_stmt = (
-                status_stmt.join(ProductSize, Order.product_size_id == ProductSize.id)
-                           .join(Product, ProductSize.product_id == Product.id)
-                           .where(Product.created_by == user_tg_id)
-            )
-        status_stmt = status_stmt.group_by(Order.status_id)
-        status_stats = {
-            row[0]: {"count": row[1], "sum": row[2]}
-            for row in (await session.execute(status_stmt)).all()
-        }
-
-        # ===== 4. Новые заказы (за сегодня) =====
-#        today = date.today()
-        new_orders_stmt = select(func.count(Order.id)).where(
-#            func.date(Order.created_at) == today,
-            Order.status_id == ORDER_STATUS_CREATED
-        )
-        if not is_admin:
-            new_orders_stmt = (
-                new_orders_stmt.join(ProductSize, Order.product_size_id == ProductSize.id)
-                               .join(Product, ProductSize.product_id == Product.id)
-                               .where(Product.created_by == user_tg_id)
-            )
+            stmt = stmt.where(OrderStatsDaily.seller_id == user_tg_id)
 
-        new_orders = (await session.execute(new_orders_stmt)).scalar() or 0
+        rows = (await session.execute(stmt)).all()
 
-        #======5.Записалось на дегустацию=====
-        result = await session.execute(
+        # ===== 2. Записалось на дегустацию и всего пользователей =====
+        counters_stmt = select(
             select(func.count(Session.tg_user_id)).where(
                 Session.role_id == DEGUSTATION_ROLE,
-                Session.sent_message == False
-            )
-        )
-        user_count2test = result.scalar_one() or 0 # извлекаем число
-
-        #=======всего пользователей =======
-        result = await session.execute(
+                Session.sent_message.is_(False)
+            ).scalar_subquery(),
             select(func.count(User.id)).where(
                 User.is_active == True
-            )
+            ).scalar_subquery()
         )
-        user_count = result.scalar_one() or 0 # извлекаем число
-    # ===== 6. Формирование текста =====
+        user_count2test, user_count = (await session.execute(counters_stmt)).one()
+        user_count2test = user_count2test or 0
+        user_count = user_count or 0
+
+    # ===== 3. Разбор агрегата =====
+    honey = {}
+    status_stats = {}
+    for name, status_id, count, kg, summ in rows:
+        bucket = status_stats.setdefault(status_id, {"count": 0, "sum": Decimal(0)})
+        bucket["count"] += count or 0
+        bucket["sum"] += summ or 0
+        if status_id in HONEY_STATS_STATUSES:
+            kg_sum = honey.setdefault(name, [Decimal(0), Decimal(0)])
+            kg_sum[0] += kg or 0
+            kg_sum[1] += summ or 0
+
+    # сортировка по количеству
+    product_stats = sorted(
+        ((name, kg, summ) for name, (kg, summ) in honey.items()),
+        key=lambda row: row[1],
+        reverse=True
+    )
+    total_orders_count = sum(s["count"] for s in status_stats.values())
+    total_orders_sum = sum(s["sum"] for s in status_stats.values())
+    new_orders = status_stats.get(ORDER_STATUS_CREATED, {}).get("count", 0)
+
+    # ===== 4. Формирование текста =====
     header = "📊 <b>Общая статистика продаж</b>\n\n"
 
     # Блок мёда
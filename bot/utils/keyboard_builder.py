@@ -1,8 +1,5 @@
 from decimal import Decimal
-from sqlalchemy import select
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from db.models import ProductSize, Size, Image
-from db.db_async import get_async_session
 import calendar
 from datetime import date, timedelta
 
@@ -93,46 +90,15 @@ def build_add_keyboard(adds, selected):
 
     return keyboard
 
-async def get_product_sizes_keyboard(product_id: int) -> tuple[list[dict], InlineKeyboardMarkup]:
+def build_product_sizes_keyboard(sizes) -> InlineKeyboardMarkup:
     """
-    Возвращает:
-    1. Список размеров (для логики) — list[dict]
-    2. InlineKeyboardMarkup с кнопками выбора размера
-
-    Кнопка: "<Размер> – <Цена>₽"
-    callback_data: "select_size_<drink_size_id>"
+    Клавиатура выбора размера по снимку каталога (utils.catalog_cache.ProductSizeItem).
+    Без обращения к БД.
     """
-    async with get_async_session() as session:
-        result = await session.execute(
-            select(
-                ProductSize.id.label("product_size_id"),
-                Size.name.label("size_name"),
-                ProductSize.price
-            )
-            .join(Size, Size.id == ProductSize.size_id)
-            .where(
-                ProductSize.product_id == product_id,
-                ProductSize.is_active == True
-            )
-            .order_by(ProductSize.price.asc())
-        )
-        sizes = result.mappings().all()
-
-                # Получаем первое активное фото
-        image_result = await session.execute(
-            select(Image.tg_file_id)
-            .where(Image.product_id == product_id, Image.is_active == True)
-            .order_by(Image.created_at.asc())
-            .limit(1)
-        )
-        image_row = image_result.first()
-        image_file_id = image_row[0] if image_row else None
-
-    # Формируем одну строку кнопок для размеров
     size_buttons = [
         InlineKeyboardButton(
-            f"{s['size_name']}кг – {float(s['price']):.0f}₽",
-            callback_data=f"select_size_{s['product_size_id']}"
+            f"{s.size_name}кг – {float(s.price):.0f}₽",
+            callback_data=f"select_size_{s.id}"
         )
         for s in sizes
     ]
@@ -140,7 +106,7 @@ async def get_product_sizes_keyboard(product_id: int) -> tuple[list[dict], Inlin
     keyboard = [size_buttons]  # все размеры в одном ряду
     keyboard.append([InlineKeyboardButton("🔙 Начать сначала", callback_data="honey_buy")])
 
-    return sizes, InlineKeyboardMarkup(keyboard), image_file_id
+    return InlineKeyboardMarkup(keyboard)
 
 
 async def build_order_keyboard(order,total_price):
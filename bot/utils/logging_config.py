@@ -3,14 +3,129 @@ import json
 import traceback
 import time
 import sys
-from datetime import datetime
+import os
+import atexit
+import queue
+import threading
+import gzip
+from collections import deque
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any
 import inspect
-from functools import wraps
+from functools import wraps, lru_cache
+
+
+def _env_number(name: str, default, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+
+# Queue between callers and the writer thread
+LOG_QUEUE_SIZE = _env_number("LOG_QUEUE_SIZE", 10000)
+LOG_BATCH_SIZE = _env_number("LOG_BATCH_SIZE", 256)
+LOG_FLUSH_INTERVAL = _env_number("LOG_FLUSH_INTERVAL", 0.5, float)
+# Enqueueing never blocks the caller. When the queue is full, other levels are dropped, and
+# ERROR/CRITICAL go to a reserve of this many lines instead (its oldest line is dropped when full)
+LOG_ERROR_RESERVE = _env_number("LOG_ERROR_RESERVE", 256)
+
+# bot_structured.log rotates by size and on a UTC day change; closed segments are gzipped
+LOG_ROTATE_MAX_BYTES = _env_number("LOG_ROTATE_MAX_BYTES", 50 * 1024 * 1024)
+LOG_ROTATE_DAILY = (os.getenv("LOG_ROTATE_DAILY") or "true").strip().lower() in ("1", "true", "yes", "on")
+# Segments are gzipped as independent members of about this many raw bytes (cut at line
+# boundaries), so a reader can decompress one block instead of the segment from its start
+LOG_GZIP_BLOCK_BYTES = _env_number("LOG_GZIP_BLOCK_BYTES", 1024 * 1024)
+# Segment retention; 0 means unlimited
+LOG_RETENTION_DAYS = _env_number("LOG_RETENTION_DAYS", 30)
+LOG_RETENTION_SEGMENTS = _env_number("LOG_RETENTION_SEGMENTS", 0)
+
+# Segment manifest: [{"name", "first_ts", "last_ts", "size", "raw_size"}], oldest first
+LOG_MANIFEST_NAME = "bot_structured.manifest.json"
+_TS_PREFIX = '{"timestamp": "'
+
+_STOP = object()
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+# Minimum level written to bot_structured.log (everything by default, as before)
+STRUCTURED_LOG_LEVEL = (os.getenv("STRUCTURED_LOG_LEVEL") or "DEBUG").upper()
+# Minimum level of the stdout module loggers (logging.getLogger(__name__) under these packages)
+CONSOLE_LOG_LEVEL = (os.getenv("CONSOLE_LOG_LEVEL") or "INFO").upper()
+CONSOLE_LOGGER_PACKAGES = ("handlers", "utils")
+
+
+def _noop(*args, **kwargs):
+    """A disabled level: no formatting, no stack frames, no write"""
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _module_name(filename: str) -> str:
+    return Path(filename).stem
+
+
+def _line_timestamp(line: str) -> Optional[str]:
+    """Timestamp of a log line; it is always the first key, so no json.loads is needed"""
+    if line.startswith(_TS_PREFIX):
+        end = line.find('"', len(_TS_PREFIX))
+        if end > 0:
+            return line[len(_TS_PREFIX):end]
+    try:
+        return json.loads(line).get('timestamp')
+    except Exception:
+        return None
+
+
+def _read_edge_timestamps(path: Path):
+    """First and last timestamp of a file (.log or .log.gz)"""
+    first = last = None
+    try:
+        if path.suffix == ".gz":
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        last = _line_timestamp(line)
+                        first = first or last
+            return first, last
+        with open(path, 'rb') as f:
+            first = _line_timestamp(f.readline().decode('utf-8', 'replace'))
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 65536, 0))
+            tail = [l for l in f.read().decode('utf-8', 'replace').splitlines() if l.strip()]
+            last = _line_timestamp(tail[-1]) if tail else first
+    except OSError:
+        pass
+    return first, last
+
+
+def _compress_segment(src_path: Path, dst_path: Path, block_bytes: int = LOG_GZIP_BLOCK_BYTES):
+    """Write src as a multi-member gzip file, one member per ~block_bytes of whole lines.
+
+    Any gzip reader still sees a single stream; the log viewer index records where
+    each member starts and seeks straight to the block holding a line.
+    """
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        while True:
+            block = src.read(block_bytes)
+            if not block:
+                break
+            if not block.endswith(b'\n'):
+                block += src.readline()
+            dst.write(gzip.compress(block, compresslevel=6, mtime=0))
+
 
 class StructuredLogger:
-    """Enhanced structured logger that handles database operations"""
+    """Enhanced structured logger that handles database operations.
+
+    log() only builds the JSON line and puts it into a bounded queue; a daemon
+    writer thread appends lines to the file in batches (by LOG_BATCH_SIZE or
+    LOG_FLUSH_INTERVAL). The caller never waits: when the queue is full, records are
+    dropped and counted, except ERROR/CRITICAL, which go to a small reserve
+    (LOG_ERROR_RESERVE lines, oldest dropped first) written with the next batch.
+
+    The writer also rotates bot_structured.log by size and by UTC day: closed
+    segments are gzipped and listed in bot_structured.manifest.json with their
+    first/last timestamps, so readers can skip segments outside a time range.
+    """
     
     def __init__(self, log_dir: str = "/app/logs"):
         self.log_dir = Path(log_dir)
@@ -26,29 +141,48 @@ class StructuredLogger:
         # Prevent duplicate handlers
         if not self.logger.handlers:
             # File handler for structured logs
-            handler = logging.FileHandler(self.structured_log_file)
+            handler = logging.FileHandler(self.structured_log_file, delay=True)
             handler.setFormatter(logging.Formatter('%(message)s'))
             self.logger.addHandler(handler)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._stats_lock = threading.Lock()
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._dropped_by_level: Dict[str, int] = {}
+        self._dropped_reported = 0
+        # (level, line) of errors that did not fit into a full queue; guarded by _stats_lock
+        self._reserve: deque = deque()
+        self._closed = False
+        self.set_level(STRUCTURED_LOG_LEVEL)
+
+        # active file state and the segment manifest (changed only under _io_lock)
+        self._io_lock = threading.Lock()
+        self.manifest_file = self.log_dir / LOG_MANIFEST_NAME
+        self._segments = self._load_manifest()
+        self._active_size = self.structured_log_file.stat().st_size if self.structured_log_file.exists() else 0
+        self._active_first_ts, self._active_last_ts = (
+            _read_edge_timestamps(self.structured_log_file) if self._active_size else (None, None)
+        )
+
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="structured-log-writer", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
     
     def _get_caller_info(self, skip_frames: int = 2) -> Dict[str, Any]:
         """Get information about the calling function"""
         try:
-            frame = inspect.currentframe()
-            for _ in range(skip_frames):
-                frame = frame.f_back
-            
-            filename = frame.f_code.co_filename
-            function_name = frame.f_code.co_name
-            line_number = frame.f_lineno
-            
-            # Extract module name from filename
-            module_name = Path(filename).stem
-            
+            # sys._getframe(n) returns the frame directly, without walking the stack via inspect
+            frame = sys._getframe(skip_frames)
+            code = frame.f_code
             return {
-                'module': module_name,
-                'function': function_name,
-                'line': line_number,
-                'filename': filename
+                'module': _module_name(code.co_filename),
+                'function': code.co_name,
+                'line': frame.f_lineno,
+                'filename': code.co_filename
             }
         except Exception:
             return {
@@ -72,7 +206,9 @@ class StructuredLogger:
         context: Optional[Dict[str, Any]] = None,
         exception: Optional[Exception] = None
     ):
-        """Log a structured message"""
+        """Log a structured message (non-blocking: the line is written by the writer thread)"""
+        if LEVELS.get(level, 50) < self._threshold:
+            return
         
         caller_info = self._get_caller_info(skip_frames=3)
         
@@ -102,14 +238,290 @@ class StructuredLogger:
             else:
                 log_entry['stack_trace'] = ''.join(traceback.format_stack())
         
-        # Write to structured log file
+        # Serialize in the caller: context may be mutated after the call returns
+        try:
+            line = json.dumps(log_entry) + '\n'
+        except Exception as e:
+            print(f"Failed to serialize log entry: {e}", file=sys.stderr)
+            return
+
+        self._enqueue(level, line)
+
+    def _enqueue(self, level: str, line: str):
+        if self._closed or not self._writer.is_alive():
+            # after close() or a writer crash, write synchronously so the record is not lost
+            self._write_lines([line])
+            return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            with self._stats_lock:
+                if level in ('ERROR', 'CRITICAL') and LOG_ERROR_RESERVE > 0:
+                    if len(self._reserve) >= LOG_ERROR_RESERVE:
+                        self._count_drop(self._reserve.popleft()[0])
+                        self._enqueued -= 1
+                    self._reserve.append((level, line))
+                    self._enqueued += 1
+                else:
+                    self._count_drop(level)
+            return
+        with self._stats_lock:
+            self._enqueued += 1
+
+    def _count_drop(self, level: str):
+        """Called under _stats_lock"""
+        self._dropped += 1
+        self._dropped_by_level[level] = self._dropped_by_level.get(level, 0) + 1
+
+    def _take_reserve(self) -> list:
+        """Reserved error lines; they are written with the next batch, so they can land
+        slightly after lines logged later"""
+        with self._stats_lock:
+            lines = [line for _, line in self._reserve]
+            self._reserve.clear()
+        return lines
+
+    def _write_lines(self, lines):
+        with self._io_lock:
+            try:
+                self._maybe_rotate(_line_timestamp(lines[0]))
+            except Exception as e:
+                print(f"Failed to rotate log file: {e}", file=sys.stderr)
+
+            data = ''.join(lines).encode('utf-8')
+            try:
+                with open(self.structured_log_file, 'ab') as f:
+                    f.write(data)
+            except Exception as e:
+                # Fallback to stderr if log file write fails
+                print(f"Failed to write to log file: {e}", file=sys.stderr)
+                return
+            self._active_size += len(data)
+            if self._active_first_ts is None:
+                self._active_first_ts = _line_timestamp(lines[0])
+            self._active_last_ts = _line_timestamp(lines[-1]) or self._active_last_ts
+        with self._stats_lock:
+            self._written += len(lines)
+
+    # ---------- rotation ----------
+
+    def _load_manifest(self) -> list:
+        segments = []
+        try:
+            if self.manifest_file.exists():
+                segments = json.loads(self.manifest_file.read_text(encoding='utf-8')).get('segments', [])
+        except Exception as e:
+            print(f"Failed to read log manifest: {e}", file=sys.stderr)
+
+        # segments missing from the manifest (e.g. a crash during rotation)
+        known = {seg['name'] for seg in segments}
+        for path in sorted(self.log_dir.glob("bot_structured.*.log*")):
+            if path.name not in known:
+                first, last = _read_edge_timestamps(path)
+                segments.append({'name': path.name, 'first_ts': first, 'last_ts': last,
+                                 'size': path.stat().st_size, 'raw_size': None})
+        segments = [seg for seg in segments if (self.log_dir / seg['name']).exists()]
+        return sorted(segments, key=lambda seg: seg.get('first_ts') or '')
+
+    def _save_manifest(self):
+        tmp = self.manifest_file.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'segments': self._segments}, ensure_ascii=False, indent=1), encoding='utf-8')
+        os.replace(tmp, self.manifest_file)
+
+    def _maybe_rotate(self, next_ts: Optional[str]):
+        if not self._active_size or not self._active_first_ts:
+            return
+        new_day = (
+            LOG_ROTATE_DAILY and next_ts is not None
+            and next_ts[:10] != self._active_first_ts[:10]
+        )
+        if self._active_size >= LOG_ROTATE_MAX_BYTES or new_day:
+            self._rotate()
+
+    def _rotate(self):
+        """Close the current bot_structured.log into a compressed segment and update the manifest.
+
+        Called by the writer thread under _io_lock.
+        """
+        if not self.structured_log_file.exists():
+            return
+        first_ts = self._active_first_ts
+        last_ts = self._active_last_ts
+        if not (first_ts and last_ts):
+            first_ts, last_ts = _read_edge_timestamps(self.structured_log_file)
+        stamp = (first_ts or datetime.utcnow().isoformat())[:19].replace('-', '').replace(':', '').replace('T', '-')
+
+        rolled = self.log_dir / f"bot_structured.{stamp}.log"
+        suffix = 1
+        while rolled.exists() or rolled.with_name(rolled.name + '.gz').exists():
+            rolled = self.log_dir / f"bot_structured.{stamp}.{suffix}.log"
+            suffix += 1
+
+        os.replace(self.structured_log_file, rolled)
+        raw_size = rolled.stat().st_size
+        self._active_size = 0
+        self._active_first_ts = self._active_last_ts = None
+
+        segment = rolled
         try:
-            with open(self.structured_log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry) + '\n')
+            compressed = rolled.with_name(rolled.name + '.gz')
+            _compress_segment(rolled, compressed)
+            os.remove(rolled)
+            segment = compressed
         except Exception as e:
-            # Fallback to stderr if log file write fails
-            print(f"Failed to write to log file: {e}", file=sys.stderr)
+            # the segment stays uncompressed but still goes into the manifest
+            print(f"Failed to compress log segment {rolled.name}: {e}", file=sys.stderr)
+
+        self._segments.append({
+            'name': segment.name,
+            'first_ts': first_ts,
+            'last_ts': last_ts,
+            'size': segment.stat().st_size,
+            'raw_size': raw_size,
+        })
+        self._apply_retention()
+        self._save_manifest()
+
+    def _apply_retention(self):
+        expired = []
+        if LOG_RETENTION_DAYS > 0:
+            border = (datetime.utcnow() - timedelta(days=LOG_RETENTION_DAYS)).isoformat()
+            expired = [seg for seg in self._segments if (seg.get('last_ts') or '') < border]
+        keep = [seg for seg in self._segments if seg not in expired]
+        if LOG_RETENTION_SEGMENTS > 0 and len(keep) > LOG_RETENTION_SEGMENTS:
+            expired += keep[:-LOG_RETENTION_SEGMENTS]
+            keep = keep[-LOG_RETENTION_SEGMENTS:]
+        for seg in expired:
+            try:
+                (self.log_dir / seg['name']).unlink()
+            except FileNotFoundError:
+                pass
+        self._segments = keep
+
+    def segments(self) -> list:
+        """Closed segments from the manifest, oldest first"""
+        with self._io_lock:
+            return [dict(seg) for seg in self._segments]
+
+    def _drop_report_line(self) -> Optional[str]:
+        """Service record about lines dropped since the previous report"""
+        with self._stats_lock:
+            lost = self._dropped - self._dropped_reported
+            if not lost:
+                return None
+            self._dropped_reported = self._dropped
+            by_level = dict(self._dropped_by_level)
+        return json.dumps({
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'level': 'WARNING',
+            'message': f"Log queue overflow: dropped {lost} records",
+            'action': 'log_queue_overflow',
+            'module': 'logging_config',
+            'function': '_writer_loop',
+            'line': 0,
+            'context': {'dropped_total': self._dropped, 'dropped_by_level': by_level}
+        }) + '\n'
+
+    def _writer_loop(self):
+        batch = []
+        waiters = []
+        stopping = False
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+
+        while not stopping:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if stopping or waiters or len(batch) >= LOG_BATCH_SIZE:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+
+            if not (stopping or waiters or len(batch) >= LOG_BATCH_SIZE
+                    or time.monotonic() >= deadline):
+                continue
+
+            batch.extend(self._take_reserve())
+            report = self._drop_report_line()
+            if report:
+                batch.append(report)
+            if batch:
+                self._write_lines(batch)
+                batch = []
+            for event in waiters:
+                event.set()
+            waiters = []
+            deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything already queued is written"""
+        if self._closed or not self._writer.is_alive():
+            return True
+        event = threading.Event()
+        try:
+            self._queue.put(event, timeout=timeout)
+        except queue.Full:
+            return False
+        return event.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Drain the queue and stop the writer thread (also called via atexit)"""
+        if self._closed:
+            return
+        if self._writer.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                self._writer.join(timeout)
+            except queue.Full:
+                pass
+        self._closed = True
+        # whatever is left (e.g. the writer did not get to it) is written synchronously
+        leftover = self._take_reserve()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, str):
+                leftover.append(item)
+        if leftover:
+            self._write_lines(leftover)
+
+    def stats(self) -> Dict[str, Any]:
+        """Log queue counters"""
+        with self._stats_lock:
+            return {
+                'enqueued': self._enqueued,
+                'written': self._written,
+                'dropped': self._dropped,
+                'dropped_by_level': dict(self._dropped_by_level),
+                'queue_size': self._queue.qsize(),
+                'queue_max': LOG_QUEUE_SIZE,
+                'reserved': len(self._reserve),
+            }
     
+    def set_level(self, level: str):
+        """Levels below the threshold are replaced with _noop on the instance itself"""
+        self._threshold = LEVELS[level.upper()]
+        for name, number in LEVELS.items():
+            method = name.lower()
+            if number < self._threshold:
+                setattr(self, method, _noop)
+            else:
+                # an enabled level goes back to the class method (which also keeps the caller frame right)
+                self.__dict__.pop(method, None)
+
+    def is_enabled_for(self, level: str) -> bool:
+        return LEVELS.get(level, 50) >= self._threshold
+
     def debug(self, message: str, **kwargs):
         self.log('DEBUG', message, **kwargs)
     
@@ -128,6 +540,7 @@ class StructuredLogger:
 # Global logger instance
 structured_logger = StructuredLogger()
 
+
 # Database operation logging decorators
 def log_database_operation(
     operation_type: str = "database", 
@@ -596,7 +1009,8 @@ class LoggingContext:
 def setup_logging(
     log_dir: str = "/app/logs",
     log_level: str = "INFO",
-    enable_console: bool = True
+    enable_console: bool = True,
+    console_level: str = CONSOLE_LOG_LEVEL
 ):
     """
     Setup application logging configuration
@@ -605,9 +1019,13 @@ def setup_logging(
         log_dir: Directory for log files
         log_level: Minimum log level
         enable_console: Whether to also log to console
+        console_level: Minimum level of the module loggers writing to stdout
     """
     global structured_logger
-    structured_logger = StructuredLogger(log_dir)
+    # modules have already imported structured_logger; recreate it (with a second writer
+    # thread) only when the log directory changes
+    if structured_logger.log_dir != Path(log_dir):
+        structured_logger = StructuredLogger(log_dir)
     
     # Setup console logging if requested
     if enable_console:
@@ -621,6 +1039,17 @@ def setup_logging(
     
     # Set log level
     structured_logger.logger.setLevel(getattr(logging, log_level.upper()))
+
+    # Module loggers (console = logging.getLogger(__name__)) print debug output to stdout;
+    # below console_level a call is a single isEnabledFor check with lazy %-args
+    for package in CONSOLE_LOGGER_PACKAGES:
+        package_logger = logging.getLogger(package)
+        package_logger.setLevel(console_level.upper())
+        package_logger.propagate = False
+        if not package_logger.handlers:
+            stdout_handler = logging.StreamHandler(sys.stdout)
+            stdout_handler.setFormatter(logging.Formatter('%(levelname)s %(name)s: %(message)s'))
+            package_logger.addHandler(stdout_handler)
     
     structured_logger.info(
         "Logging system initialized",
@@ -628,6 +1057,7 @@ def setup_logging(
         context={
             'log_dir': log_dir,
             'log_level': log_level,
-            'console_enabled': enable_console
+            'console_enabled': enable_console,
+            'console_level': console_level
         }
     )
\ No newline at end of file
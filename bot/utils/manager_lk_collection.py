@@ -1,5 +1,5 @@
-from db.models import Order, Product, ProductSize, Size, Image
-from datetime import timedelta
+from db.models import Order, Product, ProductSize
+from datetime import datetime, timedelta
 from telegram import (
     Update,
     InlineKeyboardButton,
@@ -7,8 +7,9 @@ from telegram import (
     InputMediaPhoto
 )
 from db.db_async import get_async_session
-from sqlalchemy import select
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.orm import selectinload
+from utils.catalog_cache import load_sizes_and_images
 
 from utils.logging_config import (
     structured_logger, 
@@ -36,7 +37,27 @@ ORDER_STATUS_DECLINED = 6
 ORDER_STATUS_EXPIRED = 7
 ORDER_STATUS_DRAFT = 8
 
-def prepare_owner_orders_cards(current_order: Order, current_index: int, total: int, status_filters: list = None) -> tuple[str, str | None, InlineKeyboardMarkup]:
+CURSOR_EPOCH = datetime(1970, 1, 1)
+
+def encode_order_cursor(order) -> str:
+    """Курсор keyset‑пагинации: '<created_at в микросекундах>_<id>'"""
+    micros = (order.created_at - CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{order.id}"
+
+
+def decode_order_cursor(cursor: str) -> tuple[datetime, int]:
+    micros, order_id = cursor.split("_")
+    return CURSOR_EPOCH + timedelta(microseconds=int(micros)), int(order_id)
+
+
+def prepare_owner_orders_cards(
+    current_order: Order,
+    current_index: int,
+    total: int,
+    status_filters: dict = None,
+    prev_cursor: str | None = None,
+    next_cursor: str | None = None
+) -> tuple[str, InlineKeyboardMarkup]:
     """Возвращает текст и клавиатуру для карточки."""
 
     created_local = current_order.created_at + timedelta(hours=3)
@@ -59,15 +80,15 @@ def prepare_owner_orders_cards(current_order: Order, current_index: int, total:
             # кнопки навигации
     buttons = []
 
-    # --- навигация ---
+    # --- навигация: в callback уходит позиция и курсор соседней карточки ---
     nav_buttons = []
-    if current_index > 0:
+    if prev_cursor:
         nav_buttons.append(
-            InlineKeyboardButton("⬅️ Предыдущий", callback_data=f"owner_order_prev_{current_index-1}")
+            InlineKeyboardButton("⬅️ Предыдущий", callback_data=f"owner_order_prev_{max(current_index-1, 0)}_{prev_cursor}")
         )
-    if current_index < total - 1:
+    if next_cursor:
         nav_buttons.append(
-            InlineKeyboardButton("➡️ Следующий", callback_data=f"owner_order_next_{current_index+1}")
+            InlineKeyboardButton("➡️ Следующий", callback_data=f"owner_order_next_{current_index+1}_{next_cursor}")
         )
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -133,46 +154,15 @@ async def fetch_seller_products(user_tg_id: int, is_admin: bool):
         return products
 
 
-async def get_manager_product_sizes_keyboard(product_id: int) -> tuple[list[dict], InlineKeyboardMarkup]:
+def build_manager_product_sizes_keyboard(product_id: int, sizes) -> InlineKeyboardMarkup:
     """
-    Возвращает:
-    1. Список размеров (для логики) — list[dict]
-    2. InlineKeyboardMarkup с кнопками выбора размера
-
     Кнопка: "<Размер> – <Цена>₽"
-    callback_data: "select_size_<drink_size_id>"
+    callback_data: "edit_sizeprice_<product_size_id>"
     """
-    async with get_async_session() as session:
-        result = await session.execute(
-            select(
-                ProductSize.id.label("product_size_id"),
-                Size.name.label("size_name"),
-                ProductSize.price
-            )
-            .join(Size, Size.id == ProductSize.size_id)
-            .where(
-                ProductSize.product_id == product_id,
-                ProductSize.is_active == True
-            )
-            .order_by(ProductSize.price.asc())
-        )
-        sizes = result.mappings().all()
-
-                # Получаем первое активное фото
-        image_result = await session.execute(
-            select(Image.tg_file_id)
-            .where(Image.product_id == product_id, Image.is_active == True)
-            .order_by(Image.created_at.asc())
-            .limit(1)
-        )
-        image_row = image_result.first()
-        image_file_id = image_row[0] if image_row else None
-
-    # Формируем одну строку кнопок для размеров
     size_buttons = [
         InlineKeyboardButton(
-            f"{s['size_name']}кг – {float(s['price']):.0f}₽",
-            callback_data=f"edit_sizeprice_{s['product_size_id']}"
+            f"{s.size_name}кг – {float(s.price):.0f}₽",
+            callback_data=f"edit_sizeprice_{s.id}"
         )
         for s in sizes
     ]
@@ -180,37 +170,106 @@ async def get_manager_product_sizes_keyboard(product_id: int) -> tuple[list[dict
     keyboard = [size_buttons]  # все размеры в одном ряду
     keyboard.append([InlineKeyboardButton("🚫 Снять с продажи", callback_data=f"product_delete_{product_id}")])
 
-    return sizes, InlineKeyboardMarkup(keyboard), image_file_id
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def get_manager_products_sizes_keyboards(product_ids) -> dict[int, tuple[tuple, InlineKeyboardMarkup, str | None]]:
+    """
+    Батч-версия для кабинета менеджера: два запроса и одна сессия на весь список товаров.
+
+    Возвращает {product_id: (размеры, InlineKeyboardMarkup, tg_file_id первого фото)}
+    """
+    async with get_async_session() as session:
+        sizes_by_product, images_by_product = await load_sizes_and_images(session, product_ids)
+
+    result = {}
+    for product_id in product_ids:
+        sizes = tuple(sizes_by_product.get(product_id, ()))
+        result[product_id] = (
+            sizes,
+            build_manager_product_sizes_keyboard(product_id, sizes),
+            images_by_product.get(product_id)
+        )
+    return result
+
+
+def _order_card_select():
+    """SELECT заказа со всем, что нужно карточке"""
+    return select(Order).options(
+        selectinload(Order.product_size).selectinload(ProductSize.product),
+        selectinload(Order.product_size).selectinload(ProductSize.sizes),
+        selectinload(Order.user),
+        selectinload(Order.status)
+    )
+
+
+def _seller_orders_scope(stmt, user_tg_id: int, status_filter: list = None):
+    """Общие условия ленты заказов: статусы и (для не‑админа) товары продавца"""
+    # created_at входит в ключ курсора, но колонка nullable (default только в ORM):
+    # для NULL сравнение (created_at, id) с курсором не истинно, и такой заказ
+    # нельзя ни закодировать в курсор, ни долистать — в ленту он не попадает
+    stmt = stmt.where(Order.created_at.isnot(None))
+    if status_filter:
+        stmt = stmt.where(Order.status_id.in_(status_filter))
+
+    if str(user_tg_id) != str(OWNER_ID):
+        stmt = stmt.join(ProductSize, Order.product_size_id == ProductSize.id)\
+                .join(Product, ProductSize.product_id == Product.id)\
+                .where(Product.created_by == user_tg_id)
+    return stmt
 
 
 @log_db_select(log_slow_only=True, slow_threshold=0.5)
-async def fetch_seller_orders(user_tg_id: int, is_admin: bool, status_filter: list = None):
+async def fetch_seller_orders_page(user_tg_id: int, is_admin: bool, status_filter: list = None, cursor: str | None = None):
     """
-    Возвращает заказы продавца с возможностью фильтрации по статусу.
-    
-    :param user_tg_id: ID продавца
-    :param is_admin: True, если админ, False — обычный продавец
-    :param status_filter: список статусов для фильтрации. Если None — возвращаем все.
+    Keyset‑лента заказов продавца по (created_at, id).
+    Загружает одну карточку (первую с ключом >= cursor, без курсора — самую раннюю),
+    ключи соседних карточек и общее количество.
+
+    :return: dict(order, cursor, prev_cursor, next_cursor, total) или None, если заказов нет
     """
+    key = tuple_(Order.created_at, Order.id)
+
     async with get_async_session() as session:
-        is_admin = str(user_tg_id) == str(OWNER_ID)
-        stmt = select(Order).options(
-            selectinload(Order.product_size).selectinload(ProductSize.product),
-            selectinload(Order.product_size).selectinload(ProductSize.sizes),
-            selectinload(Order.user),
-            selectinload(Order.status)
-        ).order_by(Order.created_at.asc())
-
-        # фильтр по статусу
-        if status_filter:
-            stmt = stmt.where(Order.status_id.in_(status_filter))
-        
-        # фильтр по продавцу, если это не админ
-        if not is_admin:
-            stmt = stmt.join(ProductSize, Order.product_size_id == ProductSize.id)\
-                    .join(Product, ProductSize.product_id == Product.id)\
-                    .where(Product.created_by == user_tg_id)
+        stmt = _seller_orders_scope(_order_card_select(), user_tg_id, status_filter)
+        if cursor:
+            stmt = stmt.where(key >= decode_order_cursor(cursor))
+        stmt = stmt.order_by(Order.created_at.asc(), Order.id.asc()).limit(1)
+        order = (await session.execute(stmt)).scalars().first()
 
-        result = await session.execute(stmt)
-        orders = result.scalars().all()
-        return orders
\ No newline at end of file
+        if order is None and cursor:
+            # карточка ушла из фильтра (сменился статус) — показываем последнюю
+            stmt = _seller_orders_scope(_order_card_select(), user_tg_id, status_filter)\
+                .order_by(Order.created_at.desc(), Order.id.desc()).limit(1)
+            order = (await session.execute(stmt)).scalars().first()
+
+        if order is None:
+            return None
+
+        current_key = (order.created_at, order.id)
+
+        prev_row = (await session.execute(
+            _seller_orders_scope(select(Order.created_at, Order.id), user_tg_id, status_filter)
+            .where(key < current_key)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(1)
+        )).first()
+
+        next_row = (await session.execute(
+            _seller_orders_scope(select(Order.created_at, Order.id), user_tg_id, status_filter)
+            .where(key > current_key)
+            .order_by(Order.created_at.asc(), Order.id.asc())
+            .limit(1)
+        )).first()
+
+        total = (await session.execute(
+            _seller_orders_scope(select(func.count(Order.id)), user_tg_id, status_filter)
+        )).scalar_one()
+
+    return {
+        "order": order,
+        "cursor": encode_order_cursor(order),
+        "prev_cursor": encode_order_cursor(prev_row) if prev_row else None,
+        "next_cursor": encode_order_cursor(next_row) if next_row else None,
+        "total": total
+    }
@@ -1,8 +1,22 @@
+import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
 
+import os
 import re
+import asyncio
+from collections import defaultdict
+from typing import Iterable, Optional
+
+
+console = logging.getLogger(__name__)
+
+# Сколько запросов на удаление идёт к Telegram одновременно (на весь бот)
+CLEANUP_CONCURRENCY = int(os.getenv("CLEANUP_CONCURRENCY", 8))
+BULK_DELETE_LIMIT = 100  # deleteMessages принимает до 100 id за вызов
+
+_cleanup_slots: Optional[asyncio.Semaphore] = None
 
 async def send_and_pin_message(bot, chat_id: int, text: str, reply_markup=None):
     """
@@ -37,23 +51,77 @@ async def send_message(update: Update, text: str, reply_markup=None, **kwargs):
     elif update.callback_query:
         return await update.callback_query.message.reply_text(text, reply_markup=reply_markup, **kwargs)
 
+def _slots() -> asyncio.Semaphore:
+    global _cleanup_slots
+    if _cleanup_slots is None:
+        _cleanup_slots = asyncio.Semaphore(CLEANUP_CONCURRENCY)
+    return _cleanup_slots
+
+
+async def delete_messages(bot, chat_id: int, message_ids: Iterable[int]) -> int:
+    """
+    Удаляет сообщения одного чата и возвращает число удалённых.
+    Если бот умеет deleteMessages (PTB >= 20.8) — пачками по 100 id за вызов,
+    иначе по одному, параллельно, не больше CLEANUP_CONCURRENCY запросов на весь бот.
+    Уже удалённые и недоступные сообщения (BadRequest) просто пропускаются.
+    """
+    ids = sorted({msg_id for msg_id in message_ids if msg_id})
+    if not ids:
+        return 0
+    slots = _slots()
+
+    bulk_delete = getattr(bot, "delete_messages", None)
+    if bulk_delete is not None:
+        deleted = 0
+        for start in range(0, len(ids), BULK_DELETE_LIMIT):
+            chunk = ids[start:start + BULK_DELETE_LIMIT]
+            async with slots:
+                try:
+                    # несуществующие id Telegram пропускает сам
+                    await bulk_delete(chat_id, chunk)
+                    deleted += len(chunk)
+                except BadRequest:
+                    pass
+        return deleted
+
+    async def delete_one(msg_id: int) -> int:
+        async with slots:
+            try:
+                await bot.delete_message(chat_id, msg_id)
+                return 1
+            except BadRequest:
+                # сообщение уже удалено или недоступно
+                return 0
+
+    results = await asyncio.gather(*(delete_one(msg_id) for msg_id in ids), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        console.warning("Не удалось удалить %s сообщений в чате %s: %s", len(errors), chat_id, errors[0])
+    return sum(r for r in results if isinstance(r, int))
+
+
+def schedule_delete_messages(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_ids: Iterable[int]):
+    """Удаление в фоне: обработчик сразу показывает следующий экран, не дожидаясь Telegram"""
+    message_ids = [msg_id for msg_id in message_ids if msg_id]
+    if message_ids:
+        context.application.create_task(delete_messages(context.bot, chat_id, message_ids))
+
+
 async def cleanup_messages(context: ContextTypes.DEFAULT_TYPE):
     """
     Удаляет все сообщения, сохранённые в context.user_data["messages_to_delete"].
-    После очистки список сбрасывается.
+    Список сбрасывается сразу, удаление идёт в фоне — по чатам.
     """
     messages = context.user_data.get("messages_to_delete", [])
     if not messages:
         return
+    context.user_data["messages_to_delete"] = []
 
+    by_chat = defaultdict(list)
     for chat_id, msg_id in messages:
-        try:
-            await context.bot.delete_message(chat_id, msg_id)
-        except BadRequest:
-            # сообщение уже удалено или недоступно
-            pass
-
-    context.user_data["messages_to_delete"] = []
+        by_chat[chat_id].append(msg_id)
+    for chat_id, message_ids in by_chat.items():
+        schedule_delete_messages(context, chat_id, message_ids)
 
 
 async def add_message_to_cleanup(context: ContextTypes.DEFAULT_TYPE, chat_id: int, msg_id: int):
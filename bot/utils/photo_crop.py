@@ -0,0 +1,31 @@
+from io import BytesIO
+
+from PIL import Image as PILImage
+
+# Код, который выполняется в процессах пула обработки фото (utils/preprocess_foto.py).
+# Только Pillow: без telegram, logging_config и БД — воркеры остаются лёгкими.
+
+TARGET_SIZE = 512  # размер стороны квадрата в пикселях
+
+
+def crop_center_square(data: bytes, size: int = TARGET_SIZE, quality: int = 90) -> bytes:
+    """
+    Квадратный кроп по центру + масштаб до size x size, результат — JPEG.
+    Выполняется в процессе пула: только bytes на входе и выходе.
+    """
+    img = PILImage.open(BytesIO(data))
+    if img.format == "JPEG":
+        # JPEG декодируется сразу в уменьшенном масштабе (1/2, 1/4, 1/8), но не меньше size
+        img.draft("RGB", (size, size))
+    img = img.convert("RGB")
+    width, height = img.size
+    min_dim = min(width, height)
+
+    # Кроп по центру и масштаб одним resize (без промежуточной копии)
+    left = (width - min_dim) // 2
+    top = (height - min_dim) // 2
+    img = img.resize((size, size), PILImage.LANCZOS, box=(left, top, left + min_dim, top + min_dim))
+
+    output = BytesIO()
+    img.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
@@ -1,41 +1,88 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
-from PIL import Image as PILImage
+from typing import Optional
+
 from telegram import InputFile, Update
 
-TARGET_SIZE = 512  # размер стороны квадрата в пикселях
+from utils.logging_config import structured_logger
+from utils.photo_crop import TARGET_SIZE, crop_center_square
+
+# Обработка фото идёт в отдельных процессах, чтобы не блокировать event loop.
+# PHOTO_WORKERS=0 — в потоке (без пула процессов), по умолчанию — по числу ядер
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", os.cpu_count() or 1))
+PHOTO_JPEG_QUALITY = int(os.getenv("PHOTO_JPEG_QUALITY", 90))
+# Сколько фото одновременно скачивается/обрабатывается/отправляется (память и CPU под контролем)
+PHOTO_MAX_IN_FLIGHT = int(os.getenv("PHOTO_MAX_IN_FLIGHT", max(PHOTO_WORKERS, 1) * 2))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_in_flight: Optional[asyncio.Semaphore] = None
+
+
+def get_photo_pool() -> Optional[ProcessPoolExecutor]:
+    """Пул процессов (создаётся при первом фото); None при PHOTO_WORKERS=0"""
+    global _pool
+    if PHOTO_WORKERS <= 0:
+        return None
+    if _pool is None:
+        # forkserver: воркеры форкаются от чистого однопоточного процесса, а не от бота
+        # с его потоками; предзагружен только utils.photo_crop (Pillow). Каждый воркер ещё
+        # импортирует __main__ как __mp_main__ — поэтому бот запускается через run_bot.py
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["utils.photo_crop"])
+        _pool = ProcessPoolExecutor(max_workers=PHOTO_WORKERS, mp_context=context)
+    return _pool
+
+
+def shutdown_photo_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def process_photo_bytes(data: bytes, size: int = TARGET_SIZE, quality: int = PHOTO_JPEG_QUALITY) -> bytes:
+    """crop_center_square вне event loop: в пуле процессов (или в потоке при PHOTO_WORKERS=0)"""
+    global _pool
+    loop = asyncio.get_running_loop()
+    pool = get_photo_pool()
+    try:
+        return await loop.run_in_executor(pool, crop_center_square, data, size, quality)
+    except BrokenProcessPool:
+        # воркер упал (OOM на огромном фото и т.п.) — пересоздаём пул и пробуем ещё раз.
+        # Пересоздаёт только первый заметивший: остальные фото того же пула берут новый
+        if _pool is pool:
+            structured_logger.warning("Photo process pool broken, restarting", action="photo_pool_restart")
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        return await loop.run_in_executor(get_photo_pool(), crop_center_square, data, size, quality)
+
+
+def _in_flight_limit() -> asyncio.Semaphore:
+    global _in_flight
+    if _in_flight is None:
+        _in_flight = asyncio.Semaphore(PHOTO_MAX_IN_FLIGHT)
+    return _in_flight
+
 
 async def preprocess_photo_crop_center(file_id: str, bot, chat_id: int) -> str:
     """
     Скачивает фото из Telegram, делает квадратный кроп по центру,
     масштабирует до TARGET_SIZE x TARGET_SIZE и возвращает новый file_id.
     """
-    # Скачиваем исходный файл
-    tg_file = await bot.get_file(file_id)
-    file_bytes = BytesIO()
-    await tg_file.download_to_memory(out=file_bytes)
-    file_bytes.seek(0)
-
-    # Открываем изображение
-    img = PILImage.open(file_bytes).convert("RGB")
-    width, height = img.size
-    min_dim = min(width, height)
-
-    # Кроп по центру
-    left = (width - min_dim) // 2
-    top = (height - min_dim) // 2
-    right = left + min_dim
-    bottom = top + min_dim
-    img_cropped = img.crop((left, top, right, bottom))
-
-    # Масштабируем до TARGET_SIZE x TARGET_SIZE
-    img_cropped = img_cropped.resize((TARGET_SIZE, TARGET_SIZE), PILImage.LANCZOS)
-
-    # Сохраняем в буфер
-    output = BytesIO()
-    img_cropped.save(output, format="JPEG", quality=90)
-    output.seek(0)
-
-    # Отправляем обратно в Telegram (например, в тестовый чат)
-    sent = await bot.send_photo(chat_id=chat_id, photo=InputFile(output))
-    
+    async with _in_flight_limit():
+        # Скачиваем исходный файл
+        tg_file = await bot.get_file(file_id)
+        file_bytes = BytesIO()
+        await tg_file.download_to_memory(out=file_bytes)
+
+        # Декодирование, кроп, ресайз и JPEG — вне event loop
+        output = BytesIO(await process_photo_bytes(file_bytes.getvalue()))
+
+        # Отправляем обратно в Telegram (например, в тестовый чат)
+        sent = await bot.send_photo(chat_id=chat_id, photo=InputFile(output))
+
     return sent.photo[-1].file_id
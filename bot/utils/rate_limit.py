@@ -0,0 +1,31 @@
+import time
+import asyncio
+
+
+class TokenBucket:
+    """Токен-бакет: rate токенов в секунду, не больше capacity про запас"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Взять токен, подождав не дольше max_wait; False — квота исчерпана"""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        wait = (1 - self._tokens) / self.rate
+        if wait > max_wait:
+            return False
+        # токен резервируется сразу — следующие вызовы ждут дольше
+        self._tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
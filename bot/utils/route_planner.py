@@ -0,0 +1,87 @@
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# 2-opt: улучшение меньше 1 м считаем шумом округления
+TWO_OPT_EPS = 1e-3
+
+
+class RoutePlan(NamedTuple):
+    order: List[int]        # индексы остановок в порядке объезда (без склада)
+    legs_km: List[float]    # длина каждого перегона: склад -> 1-я, 1-я -> 2-я, ...
+    total_km: float
+
+
+def haversine_matrix(lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+    """Матрица расстояний по прямой (км) между всеми парами точек"""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbour(dist: np.ndarray, start: int = 0) -> List[int]:
+    """Жадный маршрут из start: каждый раз к ближайшей непосещённой точке"""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    route = [start]
+    visited[start] = True
+    current = start
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[current])
+        current = int(row.argmin())
+        visited[current] = True
+        route.append(current)
+    return route
+
+
+def two_opt(route: List[int], dist: np.ndarray, max_passes: int = 50) -> List[int]:
+    """
+    2-opt для пути с закреплёнными концами (route[0] и route[-1] не двигаются).
+    Для каждого i все кандидаты j оцениваются одним векторным выражением,
+    применяется лучший разворот отрезка route[i..j].
+    """
+    route = np.asarray(route)
+    n = len(route)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 2):
+            a, b = route[i - 1], route[i]
+            c, d = route[i + 1:n - 1], route[i + 2:n]
+            # выигрыш от замены рёбер (a,b)+(c,d) на (a,c)+(b,d)
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            k = int(delta.argmin())
+            if delta[k] < -TWO_OPT_EPS:
+                j = i + 1 + k
+                route[i:j + 1] = route[i:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return route.tolist()
+
+
+def plan_route(depot_lat: float, depot_lon: float,
+               lats: Sequence[float], lons: Sequence[float]) -> RoutePlan:
+    """
+    Порядок объезда точек от склада (без возврата): ближайший сосед + 2-opt
+    по расстояниям haversine.
+    """
+    n = len(lats)
+    if n == 0:
+        return RoutePlan([], [], 0.0)
+
+    # 0 — склад, 1..n — остановки, n+1 — фиктивный финиш на нулевом расстоянии от всех:
+    # путь «склад -> ... -> последняя остановка» становится путём с закреплёнными концами
+    dist = np.zeros((n + 2, n + 2))
+    dist[:n + 1, :n + 1] = haversine_matrix([depot_lat, *lats], [depot_lon, *lons])
+
+    route = nearest_neighbour(dist[:n + 1, :n + 1], start=0) + [n + 1]
+    route = two_opt(route, dist)
+
+    stops = route[1:-1]
+    path = [0] + stops
+    legs = dist[path[:-1], path[1:]]
+    return RoutePlan([s - 1 for s in stops], legs.round(3).tolist(), round(float(legs.sum()), 3))
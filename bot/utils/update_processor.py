@@ -0,0 +1,136 @@
+import os
+import time
+import asyncio
+from typing import Any, Awaitable, Dict, Hashable, Tuple
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor, ContextTypes
+
+from utils.logging_config import structured_logger
+
+# Сколько апдейтов обрабатывается одновременно (на весь бот)
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", 16))
+# Сколько апдейтов принято в обработку (выполняются + ждут своей очереди)
+UPDATE_MAX_PENDING = int(os.getenv("UPDATE_MAX_PENDING", 1000))
+# Как часто писать метрики обработки в лог (сек); 0 — не писать
+UPDATE_METRICS_INTERVAL = float(os.getenv("UPDATE_METRICS_INTERVAL", 300))
+
+
+def lane_keys(update: object) -> Tuple[Hashable, ...]:
+    """Очереди, в которых апдейт должен дождаться предыдущих: его чат и его пользователь"""
+    if not isinstance(update, Update):
+        return ()
+    keys = []
+    if update.effective_chat is not None:
+        keys.append(("chat", update.effective_chat.id))
+    if update.effective_user is not None:
+        keys.append(("user", update.effective_user.id))
+    return tuple(keys)
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Параллельная обработка апдейтов с сохранением порядка внутри чата и пользователя.
+      * апдейты разных чатов и пользователей идут параллельно, не больше concurrency сразу;
+      * апдейт с тем же чатом или пользователем начинается только после завершения
+        предыдущих — ConversationHandler и user_data видят их строго по очереди;
+      * ожидание своей очереди не занимает слот: десяток нажатий в одном чате
+        или долгий отчёт менеджера не задерживают остальных.
+    max_pending передаётся в BaseUpdateProcessor: столько апдейтов может быть принято,
+    следующие ждут там в порядке поступления.
+    """
+
+    def __init__(self, concurrency: int = UPDATE_CONCURRENCY, max_pending: int = UPDATE_MAX_PENDING):
+        super().__init__(max_concurrent_updates=max(max_pending, concurrency, 2))
+        self.concurrency = concurrency
+        self._slots = asyncio.Semaphore(concurrency)
+        # последний принятый апдейт каждой очереди (future завершения) и сколько в ней апдейтов
+        self._tails: Dict[Hashable, asyncio.Future] = {}
+        self._depth: Dict[Hashable, int] = {}
+        self.pending = 0
+        self.running = 0
+        self._counters = {"processed": 0, "lane_waits": 0, "lane_wait_max_ms": 0.0,
+                          "slot_waits": 0, "slot_wait_max_ms": 0.0}
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            "pending": self.pending,
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "lanes": len(self._depth),
+            "busiest_lane": max(self._depth.values(), default=0),
+            **self._counters
+        }
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        # очередь занимается синхронно, до первого await: порядок = порядок поступления
+        keys = lane_keys(update)
+        done = asyncio.get_running_loop().create_future()
+        previous = set()
+        for key in keys:
+            tail = self._tails.get(key)
+            if tail is not None:
+                previous.add(tail)
+            self._tails[key] = done
+            self._depth[key] = self._depth.get(key, 0) + 1
+        self.pending += 1
+        started = False
+        try:
+            if previous:
+                waited = time.perf_counter()
+                await asyncio.wait(previous)
+                self._observe("lane", time.perf_counter() - waited)
+            if self._slots.locked():
+                waited = time.perf_counter()
+                await self._slots.acquire()
+                self._observe("slot", time.perf_counter() - waited)
+            else:
+                await self._slots.acquire()
+            try:
+                self.running += 1
+                started = True
+                await coroutine
+            finally:
+                self.running -= 1
+                self._slots.release()
+        finally:
+            if not started:
+                # отменён в ожидании — корутина так и не запускалась
+                coroutine.close()
+            self.pending -= 1
+            self._counters["processed"] += 1
+            done.set_result(None)
+            for key in keys:
+                if self._tails.get(key) is done:
+                    del self._tails[key]
+                depth = self._depth[key] - 1
+                if depth:
+                    self._depth[key] = depth
+                else:
+                    del self._depth[key]
+
+    def _observe(self, kind: str, elapsed: float):
+        self._counters[f"{kind}_waits"] += 1
+        elapsed_ms = round(elapsed * 1000, 1)
+        if elapsed_ms > self._counters[f"{kind}_wait_max_ms"]:
+            self._counters[f"{kind}_wait_max_ms"] = elapsed_ms
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        # Application.stop уже дождался всех апдейтов
+        pass
+
+
+async def log_update_metrics(context: ContextTypes.DEFAULT_TYPE):
+    """Периодическая запись метрик обработки апдейтов (job_queue)"""
+    processor = context.application.update_processor
+    if not isinstance(processor, ChatOrderedUpdateProcessor):
+        return
+    structured_logger.info(
+        "Update processing metrics",
+        action="update_processor_metrics",
+        context={"queue": context.application.update_queue.qsize(), **processor.metrics}
+    )
@@ -1,3 +1,4 @@
+import logging
 from sqlalchemy import select, update, desc
 from sqlalchemy.orm import joinedload
 
@@ -14,6 +15,8 @@ from db.models.order_statuses import OrderStatus
 from db.models.product_sizes import  ProductSize
 from utils.logging_config import log_db_select, log_db_insert
 
+console = logging.getLogger(__name__)
+
 EXCEPT_STATUSES = [6,7,8,9]
 
 """
@@ -28,13 +31,13 @@ async def get_user_by_tg_id(tg_user_id: int):
 @log_db_select(log_slow_only=True, slow_threshold=0.5)
 async def get_user_by_tg_id(user_id: int):
     async with get_async_session() as session:
-        print("DEBUG-session-created")
+        console.debug("session-created")
         result = await session.execute(
             select(User).where(User.tg_user_id == user_id)
         )
-        print("DEBUG-query-executed")
+        console.debug("query-executed")
         user = result.scalar_one_or_none()
-        print(f"DEBUG-user-found: {user}")
+        console.debug("user-found: %s", user)
         return user
 
 
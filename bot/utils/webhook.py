@@ -0,0 +1,163 @@
+import os
+import hmac
+import asyncio
+import contextlib
+from typing import List
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from telegram import Update
+from telegram.ext import Application
+
+from utils.logging_config import structured_logger
+
+# polling (по умолчанию) | webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+# Публичный https-адрес бота (без пути) — его Telegram получит в setWebhook
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8443))
+# Сколько одновременных соединений Telegram открывает к вебхуку (1..100)
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", 40))
+# Очередь апдейтов Application: при переполнении вебхук отвечает 503 и Telegram повторит позже
+UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", 1000))
+# Типы апдейтов, которые бот обрабатывает; остальные Telegram не присылает
+BOT_ALLOWED_UPDATES: List[str] = [
+    u.strip() for u in os.getenv("BOT_ALLOWED_UPDATES", "message,callback_query").split(",") if u.strip()
+]
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _backlog(application: Application) -> int:
+    """Апдейты в очереди и уже принятые обработчиком, но не обработанные"""
+    return application.update_queue.qsize() + getattr(application.update_processor, "pending", 0)
+
+
+def build_webhook_app(application: Application, path: str = WEBHOOK_PATH, secret: str = WEBHOOK_SECRET,
+                      allowed_updates: List[str] = BOT_ALLOWED_UPDATES) -> Starlette:
+    """
+    ASGI-приложение вебхука: проверка секретного заголовка, фильтр типов апдейтов,
+    постановка в update_queue без ожидания (полная очередь — 503, Telegram повторит).
+    """
+    secret_bytes = secret.encode()
+    allowed = frozenset(allowed_updates)
+    metrics = {"accepted": 0, "forbidden": 0, "bad_request": 0, "filtered": 0, "queue_full": 0, "draining": 0}
+
+    async def telegram_update(request: Request) -> Response:
+        token = request.headers.get(SECRET_HEADER, "").encode()
+        if not hmac.compare_digest(token, secret_bytes):
+            metrics["forbidden"] += 1
+            return Response(status_code=403)
+        if not application.running:
+            # останавливаемся: пусть Telegram доставит апдейт следующему экземпляру
+            metrics["draining"] += 1
+            return Response(status_code=503)
+        try:
+            data = await request.json()
+            if allowed and not allowed.intersection(data):
+                metrics["filtered"] += 1
+                return Response()
+            update = Update.de_json(data, application.bot)
+        except Exception:
+            metrics["bad_request"] += 1
+            return Response(status_code=400)
+        try:
+            # при параллельной обработке очередь сразу разбирается в задачи — считаем и их
+            if 0 < application.update_queue.maxsize <= _backlog(application):
+                raise asyncio.QueueFull
+            application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            metrics["queue_full"] += 1
+            return Response(status_code=503, headers={"Retry-After": "1"})
+        metrics["accepted"] += 1
+        return Response()
+
+    async def healthz(request: Request) -> JSONResponse:
+        queue = application.update_queue
+        return JSONResponse({
+            "running": application.running,
+            "queue": queue.qsize(),
+            "queue_max": queue.maxsize,
+            "backlog": _backlog(application),
+            "processor": getattr(application.update_processor, "metrics", None),
+            **metrics
+        })
+
+    app = Starlette(routes=[
+        Route(path, telegram_update, methods=["POST"]),
+        Route("/healthz", healthz, methods=["GET"]),
+    ])
+    app.state.metrics = metrics
+    return app
+
+
+class _DrainingServer(uvicorn.Server):
+    """
+    uvicorn после остановки по сигналу повторно поднимает SIGINT/SIGTERM — процесс
+    завершился бы, не дождавшись очереди. Здесь сигнал только останавливает приём запросов.
+    """
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        with super().capture_signals():
+            yield
+            self._captured_signals.clear()
+
+
+async def run_webhook(application: Application):
+    """
+    Аналог run_webhook из PTB на uvicorn: initialize -> post_init -> setWebhook -> start ->
+    сервер до SIGINT/SIGTERM -> stop (дорабатывает очередь) -> post_stop -> shutdown -> post_shutdown.
+    Вебхук при остановке не удаляется: апдейты копятся у Telegram до следующего запуска.
+    """
+    if not WEBHOOK_URL or not WEBHOOK_SECRET:
+        raise ValueError("WEBHOOK_URL and WEBHOOK_SECRET must be set for BOT_MODE=webhook")
+
+    server = _DrainingServer(uvicorn.Config(
+        build_webhook_app(application),
+        host=WEBHOOK_HOST,
+        port=WEBHOOK_PORT,
+        lifespan="off",
+        access_log=False,
+        log_level="warning"
+    ))
+
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.bot.set_webhook(
+            url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=BOT_ALLOWED_UPDATES,
+            max_connections=WEBHOOK_MAX_CONNECTIONS
+        )
+        await application.start()
+        structured_logger.info(
+            "Webhook server started",
+            action="webhook_started",
+            context={"host": WEBHOOK_HOST, "port": WEBHOOK_PORT, "path": WEBHOOK_PATH,
+                     "allowed_updates": BOT_ALLOWED_UPDATES, "queue_size": UPDATE_QUEUE_SIZE}
+        )
+        await server.serve()
+    finally:
+        # приём уже закрыт; stop() обрабатывает всё, что осталось в очереди
+        pending = application.update_queue.qsize()
+        if application.running:
+            await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        structured_logger.info(
+            "Webhook server stopped",
+            action="webhook_stopped",
+            context={"drained_updates": pending}
+        )
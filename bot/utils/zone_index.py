@@ -0,0 +1,60 @@
+from decimal import Decimal
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+
+class ZoneMatch(NamedTuple):
+    zone_id: int
+    name: str
+    cost: Decimal
+
+
+class ZoneIndex:
+    """
+    Зоны доставки в памяти: подготовленные полигоны + STRtree по их рамкам.
+    Точка на границе зоны в неё не входит — как у ST_Within в PostGIS.
+    Если точка попала в несколько зон, берётся самая дешёвая (при равной цене — меньший id).
+    """
+
+    def __init__(self, zones: Iterable[Tuple[int, str, Decimal, object]], fingerprint: Optional[str] = None):
+        """zones: (id, name, cost, geometry) — geometry как shapely-объект или WKB"""
+        zones = sorted(zones, key=lambda z: (z[2], z[0]))
+        self.fingerprint = fingerprint
+        self.zones: Tuple[ZoneMatch, ...] = tuple(ZoneMatch(z[0], z[1], z[2]) for z in zones)
+        geometries = [z[3] if isinstance(z[3], shapely.Geometry) else shapely.from_wkb(z[3]) for z in zones]
+        self._geometries = np.array(geometries, dtype=object)
+        # prepare: повторные contains по одному полигону идут через его индекс рёбер
+        shapely.prepare(self._geometries)
+        self._tree = STRtree(self._geometries)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def resolve(self, lat: float, lon: float) -> Optional[ZoneMatch]:
+        """Зона точки или None, если точка вне всех зон"""
+        hits = self._tree.query(shapely.Point(lon, lat), predicate="within")
+        if not len(hits):
+            return None
+        # индексы растут вместе с ценой, поэтому минимальный — самая дешёвая зона
+        return self.zones[hits.min()]
+
+    def resolve_many(self, lats: Sequence[float], lons: Sequence[float]) -> List[Optional[ZoneMatch]]:
+        """Векторизованный resolve для массива точек"""
+        points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        result: List[Optional[ZoneMatch]] = [None] * len(points)
+        if not len(points) or not len(self.zones):
+            return result
+
+        point_idx, zone_idx = self._tree.query(points)
+        inside = shapely.contains(self._geometries[zone_idx], points[point_idx])
+        point_idx, zone_idx = point_idx[inside], zone_idx[inside]
+        # для каждой точки — минимальный индекс зоны (самая дешёвая)
+        order = np.lexsort((zone_idx, point_idx))
+        point_idx, zone_idx = point_idx[order], zone_idx[order]
+        first = np.unique(point_idx, return_index=True)[1]
+        for p, z in zip(point_idx[first].tolist(), zone_idx[first].tolist()):
+            result[p] = self.zones[z]
+        return result
@@ -0,0 +1,147 @@
+import os
+import sys
+import math
+import time
+import random
+from pathlib import Path
+
+import psycopg2
+from dotenv import load_dotenv
+
+# ZoneIndex из бота (utils/zone_index.py зависит только от shapely/numpy)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "bot"))
+from utils.zone_index import ZoneIndex  # noqa: E402
+
+# Загружаем переменные из .env
+load_dotenv()
+
+DB_HOST = os.getenv("SERVER_IP", "127.0.0.1")
+DB_PORT = os.getenv("POSTGRES_PORT", "5335")
+DB_NAME = os.getenv("POSTGRES_DB")
+DB_USER = os.getenv("POSTGRES_USER")
+DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
+
+# Аргументы: число тестовых зон и точек
+BENCH_ZONES = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+BENCH_POINTS = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+# по одному запросу на точку — только на части точек, иначе ждать долго
+ROUND_TRIP_POINTS = min(BENCH_POINTS, 1_000)
+
+# Большой Сочи: от Лазаревского до Красной Поляны
+BBOX = (39.0, 43.35, 40.35, 44.05)
+
+# Прежний путь: запрос в PostGIS на каждую точку
+ST_WITHIN_ONE = """
+    SELECT id, cost FROM public.delivery_zones
+    WHERE ST_Within(ST_SetSRID(ST_MakePoint(%s, %s), 4326), geometry)
+    ORDER BY cost, id LIMIT 1
+"""
+
+# Тот же ответ пачкой: все точки одним запросом
+ST_WITHIN_BATCH = """
+    SELECT DISTINCT ON (p.n) p.n, z.id
+    FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(lon, lat, n)
+    JOIN public.delivery_zones z
+      ON ST_Within(ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326), z.geometry)
+    ORDER BY p.n, z.cost, z.id
+"""
+
+
+def zone_wkt(rnd: random.Random) -> str:
+    """Звездообразный полигон на 64 вершины вокруг случайного центра"""
+    cx = rnd.uniform(BBOX[0] + 0.1, BBOX[2] - 0.1)
+    cy = rnd.uniform(BBOX[1] + 0.1, BBOX[3] - 0.1)
+    base = rnd.uniform(0.03, 0.15)
+    ring = []
+    for k in range(64):
+        angle = 2 * math.pi * k / 64
+        r = base * rnd.uniform(0.6, 1.0)
+        ring.append(f"{cx + r * math.cos(angle):.6f} {cy + r * 0.7 * math.sin(angle):.6f}")
+    ring.append(ring[0])
+    return f"POLYGON(({', '.join(ring)}))"
+
+
+def timed(title: str, func, count: int):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {title:<46} {elapsed * 1000:9.1f} мс  ({elapsed / count * 1e6:8.1f} мкс/точка)")
+    return result
+
+
+def bench_delivery_zones():
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+    cur = conn.cursor()
+    rnd = random.Random(7)
+
+    try:
+        print(f"🌱 Добавляем {BENCH_ZONES} тестовых зон (будет ROLLBACK)...")
+        for n in range(BENCH_ZONES):
+            cur.execute(
+                "INSERT INTO public.delivery_zones (name, geometry, cost) "
+                "VALUES (%s, ST_GeomFromText(%s, 4326), %s)",
+                (f"bench_zone_{n}", zone_wkt(rnd), rnd.choice([0, 150, 300, 450, 600]))
+            )
+
+        points = [(rnd.uniform(BBOX[1], BBOX[3]), rnd.uniform(BBOX[0], BBOX[2])) for _ in range(BENCH_POINTS)]
+        lats = [p[0] for p in points]
+        lons = [p[1] for p in points]
+
+        print("\n🐘 PostGIS ST_Within:")
+
+        def one_by_one():
+            found = []
+            for lat, lon in points[:ROUND_TRIP_POINTS]:
+                cur.execute(ST_WITHIN_ONE, (lon, lat))
+                row = cur.fetchone()
+                found.append(row[0] if row else None)
+            return found
+
+        postgis_one = timed(f"запрос на точку ({ROUND_TRIP_POINTS} точек)", one_by_one, ROUND_TRIP_POINTS)
+
+        def batch():
+            cur.execute(ST_WITHIN_BATCH, (lons, lats))
+            found = [None] * BENCH_POINTS
+            for n, zone_id in cur.fetchall():
+                found[n - 1] = zone_id
+            return found
+
+        postgis_batch = timed(f"один запрос на все ({BENCH_POINTS} точек)", batch, BENCH_POINTS)
+
+        print("\n🧭 ZoneIndex (STRtree + prepared):")
+
+        def load():
+            cur.execute("SELECT id, name, cost, ST_AsBinary(geometry) FROM public.delivery_zones")
+            return ZoneIndex((z_id, name, cost, bytes(wkb)) for z_id, name, cost, wkb in cur.fetchall())
+
+        index = timed(f"загрузка и построение ({BENCH_ZONES}+ зон)", load, 1)
+
+        def resolve_loop():
+            return [m.zone_id if m else None for m in (index.resolve(lat, lon) for lat, lon in points)]
+
+        local_one = timed(f"resolve по одной ({BENCH_POINTS} точек)", resolve_loop, BENCH_POINTS)
+        local_many = timed(
+            f"resolve_many ({BENCH_POINTS} точек)",
+            lambda: [m.zone_id if m else None for m in index.resolve_many(lats, lons)],
+            BENCH_POINTS
+        )
+
+        mismatches = sum(a != b for a, b in zip(postgis_one, local_one))
+        mismatches += sum(a != b for a, b in zip(postgis_batch, local_many))
+        inside = sum(z is not None for z in local_many)
+        print(f"\n✅ точек в зонах: {inside}/{BENCH_POINTS}, расхождений с PostGIS: {mismatches}")
+    finally:
+        # тестовые зоны не должны попасть в базу
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    bench_delivery_zones()
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import psycopg2
+from dotenv import load_dotenv
+
+from explain_hot_queries import seed
+
+# Загружаем переменные из .env
+load_dotenv()
+
+DB_HOST = os.getenv("SERVER_IP", "127.0.0.1")
+DB_PORT = os.getenv("POSTGRES_PORT", "5335")
+DB_NAME = os.getenv("POSTGRES_DB")
+DB_USER = os.getenv("POSTGRES_USER")
+DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
+
+BENCH_ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+BENCH_REPEATS = 20
+
+SELLER_SCOPE = """
+    JOIN public.product_sizes ps ON o.product_size_id = ps.id
+    JOIN public.products p ON ps.product_id = p.id
+    WHERE p.created_by = %(seller_id)s
+"""
+
+# Прежний вариант get_manager_stats_message: шесть запросов по orders
+OLD_QUERIES = [
+    """
+    SELECT p.name, sum(o.product_count * sz.name), sum(o.total_price)
+    FROM public.orders o
+    JOIN public.product_sizes ps ON o.product_size_id = ps.id
+    JOIN public.products p ON ps.product_id = p.id
+    JOIN public.sizes sz ON ps.size_id = sz.id
+    WHERE o.status_id IN (5, 3, 4, 2, 1) AND p.created_by = %(seller_id)s
+    GROUP BY p.name ORDER BY 2 DESC
+    """,
+    "SELECT count(o.id), sum(o.total_price) FROM public.orders o" + SELLER_SCOPE,
+    "SELECT o.status_id, count(o.id), sum(o.total_price) FROM public.orders o"
+    + SELLER_SCOPE + " GROUP BY o.status_id",
+    "SELECT count(o.id) FROM public.orders o" + SELLER_SCOPE + " AND o.status_id = 1",
+    "SELECT count(tg_user_id) FROM public.sessions WHERE role_id = 3 AND sent_message IS FALSE",
+    "SELECT count(id) FROM public.users WHERE is_active",
+]
+
+# Новый вариант: агрегат order_stats_daily + счётчики пользователей
+NEW_QUERIES = [
+    """
+    SELECT p.name, s.status_id, sum(s.orders_count), sum(s.total_kg), sum(s.total_sum)
+    FROM public.order_stats_daily s
+    JOIN public.products p ON s.product_id = p.id
+    WHERE s.seller_id = %(seller_id)s
+    GROUP BY p.name, s.status_id
+    """,
+    """
+    SELECT (SELECT count(tg_user_id) FROM public.sessions WHERE role_id = 3 AND sent_message IS FALSE),
+           (SELECT count(id) FROM public.users WHERE is_active)
+    """,
+]
+
+
+def run(cur, queries, params) -> float:
+    """Среднее время (мс) выполнения набора запросов"""
+    start = time.perf_counter()
+    for _ in range(BENCH_REPEATS):
+        for query in queries:
+            cur.execute(query, params)
+            cur.fetchall()
+    return (time.perf_counter() - start) / BENCH_REPEATS * 1000
+
+
+def bench_manager_stats():
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+    cur = conn.cursor()
+
+    try:
+        cur.execute("SELECT ps.id, p.created_by FROM public.product_sizes ps "
+                    "JOIN public.products p ON p.id = ps.product_id LIMIT 1")
+        row = cur.fetchone()
+        if not row:
+            print("⚠️  В product_sizes нет строк — нечего привязать к тестовым заказам.")
+            return
+        product_size_id, seller_id = row
+
+        print(f"🌱 Засеваем {BENCH_ORDERS} заказов (триггер обновляет order_stats_daily, будет ROLLBACK)...")
+        seed(cur, product_size_id, orders=BENCH_ORDERS)
+
+        params = {"seller_id": seller_id}
+        old_ms = run(cur, OLD_QUERIES, params)
+        new_ms = run(cur, NEW_QUERIES, params)
+
+        print(f"📊 Старый вариант (6 запросов по orders): {old_ms:.1f} мс")
+        print(f"📊 Агрегат order_stats_daily (2 запроса): {new_ms:.1f} мс")
+        print(f"🚀 Ускорение: x{old_ms / new_ms:.1f}" if new_ms else "")
+    finally:
+        # тестовые данные не должны попасть в базу
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    bench_manager_stats()
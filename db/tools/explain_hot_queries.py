@@ -0,0 +1,149 @@
+import os
+import sys
+import psycopg2
+from dotenv import load_dotenv
+
+# Загружаем переменные из .env
+load_dotenv()
+
+# Подключение — как в serial_actualization.py
+DB_HOST = os.getenv("SERVER_IP", "127.0.0.1")
+DB_PORT = os.getenv("POSTGRES_PORT", "5335")
+DB_NAME = os.getenv("POSTGRES_DB")
+DB_USER = os.getenv("POSTGRES_USER")
+DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
+
+# Объём тестовых данных (можно переопределить аргументами: orders users)
+SEED_ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+SEED_USERS = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+SEED_TG_BASE = 9_000_000_000  # диапазон tg_user_id, не пересекающийся с реальными
+
+# Горячие запросы бота (параметры подставляются из засеянных данных)
+HOT_QUERIES = {
+    "get_last_order (user_session_lastorder)": """
+        SELECT o.* FROM public.orders o
+        WHERE o.tg_user_id = %(tg_user_id)s AND o.is_active
+          AND o.status_id NOT IN (6, 7, 8, 9)
+        ORDER BY o.created_at DESC LIMIT 1
+    """,
+    "manager feed: first card by status (keyset)": """
+        SELECT o.id FROM public.orders o
+        WHERE o.status_id IN (1)
+        ORDER BY o.created_at, o.id LIMIT 1
+    """,
+    "manager feed: next card after cursor (keyset)": """
+        SELECT o.created_at, o.id FROM public.orders o
+        WHERE o.status_id IN (4, 2, 6, 7, 5)
+          AND (o.created_at, o.id) > (now() - interval '30 days', 0)
+        ORDER BY o.created_at, o.id LIMIT 1
+    """,
+    "manager feed: seller scope (products.created_by)": """
+        SELECT count(o.id) FROM public.orders o
+        JOIN public.product_sizes ps ON o.product_size_id = ps.id
+        JOIN public.products p ON ps.product_id = p.id
+        WHERE o.status_id IN (3) AND p.created_by = %(seller_id)s
+    """,
+    "expired drafts (check_expired_orders)": """
+        SELECT o.id FROM public.orders o
+        WHERE o.status_id = 8 AND o.is_active
+          AND o.updated_at < now() - interval '10 minutes'
+    """,
+    "get_actual_session_by_tg_id": """
+        SELECT s.id FROM public.sessions s
+        WHERE s.tg_user_id = %(tg_user_id)s AND s.role_id = 3 AND s.sent_message IS FALSE
+    """,
+    "invitation recipients (InvitationConversation)": """
+        SELECT s.id, s.tg_user_id FROM public.sessions s
+        WHERE s.role_id = 3 AND s.sent_message IS FALSE
+    """,
+    "catalog: first active image per product": """
+        SELECT DISTINCT ON (i.product_id) i.product_id, i.tg_file_id
+        FROM public.images i
+        WHERE i.product_id = ANY(%(product_ids)s) AND i.is_active IS TRUE
+        ORDER BY i.product_id, i.created_at
+    """,
+}
+
+
+def seed(cur, product_size_id: int, orders: int = SEED_ORDERS, users: int = SEED_USERS):
+    """Тестовые пользователи, сессии и заказы — живут только внутри транзакции"""
+    cur.execute(
+        """
+        INSERT INTO public.users (tg_user_id, username, is_active, is_bot, created_at)
+        SELECT %(base)s + g, 'seed_' || g, true, false, now()
+        FROM generate_series(1, %(users)s) g
+        """,
+        {"base": SEED_TG_BASE, "users": users},
+    )
+    cur.execute(
+        """
+        INSERT INTO public.sessions (tg_user_id, role_id, sent_message, is_active, created_at)
+        SELECT %(base)s + 1 + (g %% %(users)s), CASE WHEN g %% 4 = 0 THEN 3 ELSE 2 END,
+               g %% 8 = 0, true, now() - (g || ' minutes')::interval
+        FROM generate_series(1, %(users)s * 4) g
+        """,
+        {"base": SEED_TG_BASE, "users": users},
+    )
+    cur.execute(
+        """
+        INSERT INTO public.orders (tg_user_id, product_size_id, status_id, product_count,
+                                   total_price, created_at, updated_at, is_active, session_id)
+        SELECT %(base)s + 1 + (g %% %(users)s), %(ps)s, 1 + (g %% 8), 1 + (g %% 3),
+               1000, now() - (g || ' minutes')::interval, now() - (g || ' minutes')::interval,
+               g %% 10 <> 0,
+               (SELECT min(id) FROM public.sessions WHERE tg_user_id >= %(base)s)
+        FROM generate_series(1, %(orders)s) g
+        """,
+        {"base": SEED_TG_BASE, "users": users, "orders": orders, "ps": product_size_id},
+    )
+    for table in ("users", "sessions", "orders", "product_sizes", "products", "images", "order_stats_daily"):
+        cur.execute(f"ANALYZE public.{table}")
+
+
+def explain_hot_queries():
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+    cur = conn.cursor()
+
+    try:
+        cur.execute("SELECT ps.id, p.created_by FROM public.product_sizes ps "
+                    "JOIN public.products p ON p.id = ps.product_id LIMIT 1")
+        row = cur.fetchone()
+        if not row:
+            print("⚠️  В product_sizes нет строк — нечего привязать к тестовым заказам.")
+            return
+        product_size_id, seller_id = row
+
+        print(f"🌱 Засеваем {SEED_ORDERS} заказов / {SEED_USERS} пользователей (будет ROLLBACK)...")
+        seed(cur, product_size_id)
+
+        cur.execute("SELECT coalesce(array_agg(id), '{}') FROM public.products")
+        product_ids = cur.fetchone()[0]
+
+        params = {
+            "tg_user_id": SEED_TG_BASE + SEED_USERS // 2,
+            "seller_id": seller_id,
+            "product_ids": product_ids,
+        }
+
+        for title, query in HOT_QUERIES.items():
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) " + query, params)
+            plan = "\n".join(line[0] for line in cur.fetchall())
+            uses_index = "Index" in plan
+            print(f"\n{'✅' if uses_index else '⚠️ '} {title}\n{plan}")
+    finally:
+        # тестовые данные не должны попасть в базу
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+    print("\n🎯 EXPLAIN ANALYZE завершён, тестовые данные откатены.")
+
+
+if __name__ == "__main__":
+    explain_hot_queries()
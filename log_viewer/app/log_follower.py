@@ -0,0 +1,162 @@
+import os
+import logging
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional
+
+logger = logging.getLogger("log_follower")
+
+LOG_FOLLOW_INTERVAL = float(os.getenv("LOG_FOLLOW_INTERVAL", 0.5))
+READ_CHUNK_SIZE = 1024 * 1024
+# Как часто обновлять список файлов каталога (для /health) помимо ротаций, сек
+LOG_FILES_REFRESH_INTERVAL = float(os.getenv("LOG_FILES_REFRESH_INTERVAL", 30))
+
+
+class LogFollower:
+    """
+    Один «tail -F» структурного лога на всё приложение. Держит открытый дескриптор
+    активного файла и опрашивает его на новые байты; после ротации дочитывает старый
+    дескриптор (файл уже переименован) и переходит на новый bot_structured.log.
+    Если между опросами прошло несколько ротаций, промежуточные сегменты дочитываются
+    по манифесту через reader. Новые записи (разобранный JSON) отдаются всем подписчикам пачкой.
+    Заодно держит свежим список файлов reader (после ротации и раз в LOG_FILES_REFRESH_INTERVAL).
+    """
+
+    def __init__(self, path: Path, reader=None, interval: float = LOG_FOLLOW_INTERVAL):
+        self.path = Path(path)
+        # reader — LogReader (get_segments, open_log, parse_entry) для пропущенных сегментов
+        # и get_log_files для списка файлов
+        self.reader = reader
+        self.interval = interval
+        self._last_ts: Optional[str] = None
+        self._subscribers: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._inode = None
+        self._remainder = b''
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._files_refreshed = time.monotonic()
+
+    def subscribe(self, callback: Callable[[List[Dict[str, Any]]], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def open(self, from_start: bool = True) -> Optional[str]:
+        """Открыть активный файл; возвращает timestamp первой строки (для стыковки с сегментами)"""
+        if not self.path.exists():
+            return None
+        self._file = open(self.path, 'rb')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._remainder = b''
+        first_line = self._file.readline()
+        self._file.seek(0, os.SEEK_SET if from_start else os.SEEK_END)
+        try:
+            return json.loads(first_line).get('timestamp')
+        except (ValueError, AttributeError):
+            return None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-follower", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning("Log follower error: %s", e)
+            if time.monotonic() - self._files_refreshed >= LOG_FILES_REFRESH_INTERVAL:
+                self._refresh_files()
+            self._stop.wait(self.interval)
+
+    def _refresh_files(self):
+        self._files_refreshed = time.monotonic()
+        if self.reader is None:
+            return
+        try:
+            self.reader.get_log_files()
+        except OSError as e:
+            logger.warning("Log file list refresh failed: %s", e)
+
+    def poll(self) -> int:
+        """Дочитать новые строки и раздать подписчикам; возвращает число записей"""
+        if self._file is None:
+            self.open(from_start=True)
+            if self._file is None:
+                return 0
+
+        entries = self._read_available()
+
+        # ротация: путь указывает на другой файл — старый дескриптор уже дочитан
+        try:
+            rotated = os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            rotated = False
+        if rotated:
+            entries += self._read_available()
+            self._file.close()
+            self._file = None
+            new_first_ts = self.open(from_start=True)
+            last_ts = entries[-1].get('timestamp') if entries else self._last_ts
+            entries += self._read_skipped_segments(last_ts, new_first_ts)
+            if self._file is not None:
+                entries += self._read_available()
+            self._refresh_files()
+
+        if entries:
+            self._last_ts = entries[-1].get('timestamp') or self._last_ts
+
+        if entries:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                try:
+                    callback(entries)
+                except Exception as e:
+                    logger.warning("Log follower subscriber error: %s", e)
+        return len(entries)
+
+    def _read_skipped_segments(self, after_ts: Optional[str], before_ts: Optional[str]) -> List[Dict[str, Any]]:
+        """Сегменты, целиком появившиеся и ротированные между двумя опросами"""
+        if self.reader is None or after_ts is None:
+            return []
+        entries = []
+        for seg in self.reader.get_segments():
+            first_ts = seg.get('first_ts')
+            if not first_ts or first_ts <= after_ts or (before_ts and first_ts >= before_ts):
+                continue
+            with self.reader.open_log(self.reader.log_dir / seg['name']) as f:
+                for line in f:
+                    entry = self.reader.parse_entry(line)
+                    if entry is not None:
+                        entries.append(entry)
+        return entries
+
+    def _read_available(self) -> List[Dict[str, Any]]:
+        entries = []
+        while True:
+            chunk = self._file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            lines = (self._remainder + chunk).split(b'\n')
+            # недописанная строка ждёт следующего опроса
+            self._remainder = lines.pop()
+            for raw in lines:
+                if raw.strip():
+                    try:
+                        entries.append(json.loads(raw))
+                    except ValueError:
+                        pass
+        return entries
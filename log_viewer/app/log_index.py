@@ -0,0 +1,485 @@
+import os
+import logging
+import json
+import gzip
+import zlib
+import sqlite3
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+
+logger = logging.getLogger("log_index")
+
+# Индекс лежит отдельно от логов: каталог логов смонтирован только на чтение
+LOG_INDEX_PATH = os.getenv("LOG_INDEX_PATH", "/app/index/log_index.sqlite")
+LOG_INDEX_ENABLED = (os.getenv("LOG_INDEX_ENABLED") or "true").strip().lower() in ("1", "true", "yes", "on")
+LOG_INDEX_INTERVAL = float(os.getenv("LOG_INDEX_INTERVAL", 2))
+
+ACTIVE_LOG_NAME = "bot_structured.log"
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+INSERT_BATCH_SIZE = 5000
+
+# Индекс — производные данные: при смене SCHEMA_VERSION он строится заново из логов
+SCHEMA_VERSION = 2
+# Частые уровни находятся обходом lines по времени — индекс по уровню только для остальных
+CHATTY_LEVELS_SQL = "level NOT IN ('DEBUG', 'INFO')"
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    inode INTEGER,
+    first_ts TEXT,
+    offset INTEGER NOT NULL DEFAULT 0,
+    min_ts INTEGER,
+    max_ts INTEGER
+);
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS lines (
+    ts INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    level TEXT,
+    action_id INTEGER,
+    user_id INTEGER,
+    exec_us INTEGER,
+    PRIMARY KEY (ts, file_id, offset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_lines_level_ts ON lines (level, ts) WHERE {CHATTY_LEVELS_SQL};
+CREATE INDEX IF NOT EXISTS ix_lines_user_ts ON lines (user_id, ts) WHERE user_id IS NOT NULL;
+CREATE TABLE IF NOT EXISTS blocks (
+    file_id INTEGER NOT NULL,
+    raw_offset INTEGER NOT NULL,
+    gz_offset INTEGER NOT NULL,
+    PRIMARY KEY (file_id, raw_offset)
+) WITHOUT ROWID;
+"""
+EPOCH = datetime(1970, 1, 1)
+
+
+def _parse_ts(timestamp_str: Optional[str]) -> Optional[datetime]:
+    """ISO timestamp лога -> naive UTC datetime"""
+    if not timestamp_str:
+        return None
+    try:
+        log_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return log_time.replace(tzinfo=None)
+
+
+def _normalize_ts(timestamp_str: Optional[str]) -> Optional[str]:
+    """ISO timestamp лога -> naive UTC ISO (строки сравниваются лексикографически)"""
+    log_time = _parse_ts(timestamp_str)
+    return log_time.isoformat() if log_time else None
+
+
+def _ts_key(log_time: Optional[datetime]) -> int:
+    """naive UTC datetime -> микросекунды от эпохи (строки без времени — 0, самые старые)"""
+    if log_time is None:
+        return 0
+    return (log_time - EPOCH) // timedelta(microseconds=1)
+
+
+def _gzip_members(f):
+    """Распакованные куски gzip-файла: (смещение их члена в файле, байты) по порядку"""
+    buffer = b''
+    position = 0  # смещение buffer[0] в файле
+    while True:
+        if not buffer:
+            buffer = f.read(READ_CHUNK_SIZE)
+            if not buffer:
+                return
+        start = position
+        decompressor = zlib.decompressobj(wbits=31)
+        while True:
+            yield start, decompressor.decompress(buffer)
+            if decompressor.eof:
+                position += len(buffer) - len(decompressor.unused_data)
+                buffer = decompressor.unused_data
+                break
+            position += len(buffer)
+            buffer = f.read(READ_CHUNK_SIZE)
+            if not buffer:
+                return  # недописанный член: отдано всё, что распаковалось
+
+
+class LogIndex:
+    """
+    Инкрементальный SQLite‑индекс структурного лога: (файл, смещение, длина) строки
+    по времени, уровню, action и user_id. Обновляется дочитыванием новых байт активного
+    файла; при ротации запись активного файла в files переименовывается в сжатый
+    сегмент (смещения в нём — в распакованном потоке). Бот сжимает сегменты отдельными
+    gzip-членами (~1 МБ); их начала хранятся в blocks, и чтение строки распаковывает
+    один блок, а не сегмент с начала. Запросы с фильтрами декодируют только
+    подходящие строки.
+
+    Строка индекса — около 40 байт: lines хранится в порядке ключа (ts, file_id, offset),
+    поэтому отдельный индекс по времени не нужен; файл и action — ссылки на files и
+    actions, время — целые микросекунды. Вторичные индексы — только под фильтры
+    запросов (уровень, user_id); строки файла удаляются по диапазону его ts.
+    """
+
+    def __init__(self, reader, index_path: str = LOG_INDEX_PATH):
+        # reader — LogReader: log_dir, get_segments()
+        self.reader = reader
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # индекс старой схемы пересобирается с нуля
+            for table in ("lines", "blocks", "files", "actions"):
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._actions: Dict[str, int] = dict(self._conn.execute("SELECT name, id FROM actions"))
+        # до первого полного прохода запросы идут полным сканированием
+        self.ready = False
+
+    # ---------- обновление ----------
+
+    def update(self) -> int:
+        """Проиндексировать новые строки; возвращает число добавленных"""
+        with self._lock:
+            added = self._sync_segments()
+            added += self._index_active()
+            self._conn.commit()
+            self.ready = True
+            return added
+
+    def _file_state(self, name: str):
+        row = self._conn.execute(
+            "SELECT inode, first_ts, offset FROM files WHERE name = ?", (name,)
+        ).fetchone()
+        return row
+
+    def _file_id(self, name: str) -> int:
+        self._conn.execute("INSERT OR IGNORE INTO files (name) VALUES (?)", (name,))
+        return self._conn.execute("SELECT id FROM files WHERE name = ?", (name,)).fetchone()[0]
+
+    def _delete_lines(self, name: str):
+        """Строки файла: они лежат в его диапазоне ts, так что удаление не сканирует таблицу"""
+        row = self._conn.execute("SELECT id, min_ts, max_ts FROM files WHERE name = ?", (name,)).fetchone()
+        if row and row[1] is not None:
+            self._conn.execute("DELETE FROM lines WHERE ts BETWEEN ? AND ? AND file_id = ?",
+                               (row[1], row[2], row[0]))
+            self._conn.execute("UPDATE files SET min_ts = NULL, max_ts = NULL WHERE id = ?", (row[0],))
+
+    def _drop_file(self, name: str):
+        self._delete_lines(name)
+        self._conn.execute("DELETE FROM blocks WHERE file_id IN (SELECT id FROM files WHERE name = ?)", (name,))
+        self._conn.execute("DELETE FROM files WHERE name = ?", (name,))
+
+    def _set_file_state(self, name: str, inode, first_ts, offset: int):
+        self._conn.execute(
+            "INSERT INTO files (name, inode, first_ts, offset) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET inode = excluded.inode, "
+            "first_ts = excluded.first_ts, offset = excluded.offset",
+            (name, inode, first_ts, offset),
+        )
+
+    def _sync_segments(self) -> int:
+        """Сегменты из манифеста: перенос строк после ротации, дочитывание и удаление по retention"""
+        added = 0
+        segments = self.reader.get_segments()
+        names = {seg['name'] for seg in segments}
+
+        # активный файл был ротирован: его строки теперь в сегменте с тем же first_ts
+        active = self._file_state(ACTIVE_LOG_NAME)
+        active_path = self.reader.log_dir / ACTIVE_LOG_NAME
+        if active and active[1]:
+            current_first = None
+            if active_path.exists():
+                with open(active_path, 'rb') as f:
+                    current_first = self._line_ts(f.readline())
+            if current_first != active[1]:
+                target = next((seg['name'] for seg in segments
+                               if _normalize_ts(seg.get('first_ts')) == active[1]), None)
+                if target:
+                    # строки остаются на месте — меняется только имя файла, на который они ссылаются
+                    self._drop_file(target)
+                    self._conn.execute("UPDATE files SET name = ?, inode = NULL WHERE name = ?",
+                                       (target, ACTIVE_LOG_NAME))
+                else:
+                    self._drop_file(ACTIVE_LOG_NAME)
+
+        # удалённые по retention сегменты
+        for (name,) in self._conn.execute("SELECT name FROM files").fetchall():
+            if name != ACTIVE_LOG_NAME and name not in names:
+                self._drop_file(name)
+
+        # сегменты, которые ещё не проиндексированы полностью (история или хвост до ротации)
+        for seg in segments:
+            name = seg['name']
+            state = self._file_state(name)
+            offset = state[2] if state else 0
+            path = self.reader.log_dir / name
+            gz = name.endswith('.gz')
+            if state and state[0] == -1:
+                continue  # уже дочитан до конца
+            file_id = self._file_id(name)
+            with open(path, 'rb') as f:
+                if gz:
+                    added += self._index_chunks(file_id, self._gzip_chunks(file_id, f, offset), offset)
+                else:
+                    f.seek(offset)
+                    added += self._index_chunks(file_id, iter(partial(f.read, READ_CHUNK_SIZE), b''), offset)
+            # сегменты не меняются — помечаем как дочитанные
+            self._set_file_state(name, -1, _normalize_ts(seg.get('first_ts')), offset)
+        return added
+
+    def _gzip_chunks(self, file_id: int, f, offset):
+        """Распакованные данные сегмента начиная с offset; попутно записывает начала gzip-членов"""
+        blocks = []
+        raw_offset = 0
+        for gz_offset, data in _gzip_members(f):
+            if not blocks or blocks[-1][2] != gz_offset:
+                blocks.append((file_id, raw_offset, gz_offset))
+            end = raw_offset + len(data)
+            if end > offset:
+                yield data[max(offset - raw_offset, 0):]
+            raw_offset = end
+        self._conn.execute("DELETE FROM blocks WHERE file_id = ?", (file_id,))
+        self._conn.executemany("INSERT INTO blocks (file_id, raw_offset, gz_offset) VALUES (?, ?, ?)",
+                               blocks or [(file_id, 0, 0)])
+
+    def _index_active(self) -> int:
+        path = self.reader.log_dir / ACTIVE_LOG_NAME
+        if not path.exists():
+            return 0
+        stat = path.stat()
+        state = self._file_state(ACTIVE_LOG_NAME)
+        offset = state[2] if state and state[0] == stat.st_ino and stat.st_size >= state[2] else 0
+        if offset == 0 and state:
+            self._delete_lines(ACTIVE_LOG_NAME)
+
+        file_id = self._file_id(ACTIVE_LOG_NAME)
+        with open(path, 'rb') as f:
+            first_ts = self._line_ts(f.readline())
+            f.seek(offset)
+            added = self._index_chunks(file_id, iter(partial(f.read, READ_CHUNK_SIZE), b''), offset)
+            offset = f.tell() - self._last_partial
+        self._set_file_state(ACTIVE_LOG_NAME, stat.st_ino, first_ts, offset)
+        return added
+
+    @staticmethod
+    def _line_ts(raw: bytes) -> Optional[str]:
+        try:
+            return _normalize_ts(json.loads(raw).get('timestamp'))
+        except (ValueError, AttributeError):
+            return None
+
+    def _action_id(self, action) -> Optional[int]:
+        if not action:
+            return None
+        action_id = self._actions.get(action)
+        if action_id is None:
+            action_id = self._conn.execute("INSERT INTO actions (name) VALUES (?)", (str(action),)).lastrowid
+            self._actions[action] = action_id
+        return action_id
+
+    def _index_chunks(self, file_id: int, chunks, offset: int) -> int:
+        """Разобрать полные строки начиная с offset; недописанный хвост не индексируется"""
+        added = 0
+        rows = []
+        remainder = b''
+        position = offset
+        for chunk in chunks:
+            data = remainder + chunk
+            lines = data.split(b'\n')
+            remainder = lines.pop()
+            for raw in lines:
+                length = len(raw) + 1
+                if raw.strip():
+                    try:
+                        entry = json.loads(raw)
+                        exec_time = entry.get('execution_time')
+                        rows.append((
+                            _ts_key(_parse_ts(entry.get('timestamp'))),
+                            file_id, position, length - 1,
+                            entry.get('level'),
+                            self._action_id(entry.get('action')),
+                            entry.get('user_id') if isinstance(entry.get('user_id'), int) else None,
+                            round(exec_time * 1_000_000) if isinstance(exec_time, (int, float)) else None,
+                        ))
+                    except (ValueError, AttributeError):
+                        pass
+                position += length
+            if len(rows) >= INSERT_BATCH_SIZE:
+                added += self._insert(rows)
+                rows = []
+        added += self._insert(rows)
+        self._last_partial = len(remainder)
+        return added
+
+    def _insert(self, rows) -> int:
+        if rows:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO lines (ts, file_id, offset, length, level, action_id, user_id, exec_us) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            # диапазон ts файла — по нему удаляются его строки
+            min_ts = min(row[0] for row in rows)
+            max_ts = max(row[0] for row in rows)
+            self._conn.execute(
+                "UPDATE files SET min_ts = min(coalesce(min_ts, ?), ?), max_ts = max(coalesce(max_ts, ?), ?) "
+                "WHERE id = ?",
+                (min_ts, min_ts, max_ts, max_ts, rows[0][1]),
+            )
+        return len(rows)
+
+    # ---------- запросы ----------
+
+    @staticmethod
+    def _where(
+        level: Optional[str],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        user_id: Optional[int],
+        action: Optional[str]
+    ):
+        clauses, params = [], []
+        if level:
+            clauses.append("level = ?")
+            params.append(level)
+            if level not in ('DEBUG', 'INFO'):
+                # то же условие, что у частичного ix_lines_level_ts, — иначе SQLite его не выберет
+                clauses.append(CHATTY_LEVELS_SQL)
+        if start_time:
+            clauses.append("ts >= ?")
+            params.append(_ts_key(start_time))
+        if end_time:
+            clauses.append("ts <= ?")
+            params.append(_ts_key(end_time))
+        if user_id:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if action:
+            # LIKE в SQLite регистронезависим для ASCII — как action.lower() in ... в сканере
+            clauses.append("action_id IN (SELECT id FROM actions WHERE name LIKE ?)")
+            params.append(f"%{action}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(
+        self,
+        limit: int = 100,
+        level: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        user_id: Optional[int] = None,
+        action: Optional[str] = None,
+        search_query: Optional[str] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> List[Dict[str, Any]]:
+        """Записи лога от новых к старым; JSON декодируется только у кандидатов из индекса"""
+        where, params = self._where(level, start_time, end_time, user_id, action)
+        # порядок ключа lines и вторичных индексов — без сортировки
+        sql = f"SELECT file_id, offset, length FROM lines{where} ORDER BY ts DESC, file_id DESC, offset DESC"
+        if not search_query:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        logs = []
+        with self._lock:
+            files = dict(self._conn.execute("SELECT id, name FROM files"))
+            cursor = self._conn.execute(sql, params)
+            while len(logs) < limit and not (cancel is not None and cancel.is_set()):
+                candidates = cursor.fetchmany(max(limit - len(logs), 256))
+                if not candidates:
+                    break
+                for entry in self._load_entries(files, candidates):
+                    if search_query:
+                        search_text = f"{entry.get('message', '')} {entry.get('action', '')}".lower()
+                        if search_query.lower() not in search_text:
+                            continue
+                    logs.append(entry)
+                    if len(logs) >= limit:
+                        break
+        return logs
+
+    def _load_entries(self, files: Dict[int, str], candidates) -> List[Dict[str, Any]]:
+        """Прочитать строки по (файл, смещение, длина) в порядке кандидатов"""
+        by_file: Dict[int, list] = {}
+        for position, (file_id, offset, length) in enumerate(candidates):
+            by_file.setdefault(file_id, []).append((offset, length, position))
+
+        entries: List[Optional[Dict[str, Any]]] = [None] * len(candidates)
+        for file_id, spans in by_file.items():
+            name = files.get(file_id)
+            if name is None:
+                continue
+            try:
+                for position, raw in self._read_spans(file_id, name, sorted(spans)):
+                    try:
+                        entries[position] = json.loads(raw)
+                    except ValueError:
+                        pass
+            except (OSError, EOFError, zlib.error) as e:
+                logger.warning("Error reading indexed log %s: %s", name, e)
+        return [entry for entry in entries if entry is not None]
+
+    def _read_spans(self, file_id: int, name: str, spans):
+        """(позиция, байты строки) для отсортированных по смещению (offset, length, position)"""
+        path = self.reader.log_dir / name
+        with open(path, 'rb') as f:
+            if not name.endswith('.gz'):
+                for offset, length, position in spans:
+                    f.seek(offset)
+                    yield position, f.read(length)
+                return
+            # gzip читается от начала блока, в котором лежит строка; внутри блока — seek вперёд
+            blocks = self._conn.execute(
+                "SELECT raw_offset, gz_offset FROM blocks WHERE file_id = ? ORDER BY raw_offset", (file_id,)
+            ).fetchall() or [(0, 0)]
+            starts = [raw_offset for raw_offset, _ in blocks]
+            current, stream = None, None
+            for offset, length, position in spans:
+                block = bisect_right(starts, offset) - 1
+                if block != current:
+                    current = block
+                    f.seek(blocks[block][1])
+                    stream = gzip.GzipFile(fileobj=f, mode='rb')
+                stream.seek(offset - blocks[block][0])
+                yield position, stream.read(length)
+
+    def stats(self, start_time: datetime) -> Dict[str, Any]:
+        """Статистика за окно одним проходом по индексу, без чтения самих логов"""
+        start = _ts_key(start_time)
+        with self._lock:
+            total, errors, users, avg_exec = self._conn.execute(
+                "SELECT count(*), sum(level = 'ERROR'), count(DISTINCT user_id), avg(exec_us) / 1e6 "
+                "FROM lines WHERE ts >= ?", (start,)
+            ).fetchone()
+            levels = self._conn.execute(
+                "SELECT level, count(*) FROM lines WHERE ts >= ? GROUP BY level", (start,)
+            ).fetchall()
+            actions = self._conn.execute(
+                "SELECT a.name, l.cnt FROM (SELECT action_id, count(*) AS cnt FROM lines "
+                "WHERE ts >= ? AND action_id IS NOT NULL GROUP BY action_id) l "
+                "JOIN actions a ON a.id = l.action_id ORDER BY l.cnt DESC LIMIT 10", (start,)
+            ).fetchall()
+        return {
+            'total_logs': total or 0,
+            'level_distribution': dict(levels),
+            'top_actions': dict(actions),
+            'error_count': errors or 0,
+            'unique_users': users or 0,
+            'avg_execution_time': round(avg_exec or 0, 3),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
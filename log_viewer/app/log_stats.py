@@ -0,0 +1,152 @@
+import os
+import threading
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+# Сколько часов держать поминутные и почасовые агрегаты (/api/stats принимает hours до 168)
+LOG_STATS_WINDOW_HOURS = int(os.getenv("LOG_STATS_WINDOW_HOURS", 168))
+
+# Границы корзин гистограммы execution_time, сек
+EXEC_TIME_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+
+class Rollup:
+    """Агрегат записей лога за минуту или час"""
+    __slots__ = ('total', 'levels', 'actions', 'users', 'exec_count', 'exec_sum', 'exec_hist')
+
+    def __init__(self):
+        self.total = 0
+        self.levels = Counter()
+        self.actions = Counter()
+        self.users = set()
+        self.exec_count = 0
+        self.exec_sum = 0.0
+        self.exec_hist = [0] * (len(EXEC_TIME_BUCKETS) + 1)
+
+    def add(self, entry: Dict[str, Any]):
+        self.total += 1
+        self.levels[entry.get('level')] += 1
+        if entry.get('action'):
+            self.actions[entry['action']] += 1
+        if entry.get('user_id'):
+            self.users.add(entry['user_id'])
+        exec_time = entry.get('execution_time')
+        if exec_time:
+            self.exec_count += 1
+            self.exec_sum += exec_time
+            self.exec_hist[bisect_left(EXEC_TIME_BUCKETS, exec_time)] += 1
+
+    def merge(self, other: "Rollup"):
+        self.total += other.total
+        self.levels.update(other.levels)
+        self.actions.update(other.actions)
+        self.users |= other.users
+        self.exec_count += other.exec_count
+        self.exec_sum += other.exec_sum
+        for i, count in enumerate(other.exec_hist):
+            self.exec_hist[i] += count
+
+
+class StatsAggregator:
+    """
+    Скользящие агрегаты для /api/stats: поминутные и почасовые Rollup за окно
+    LOG_STATS_WINDOW_HOURS. Получает записи от LogFollower; ответ за hours часов —
+    это ровно последние hours*60 минут: полные часы после стартового плюс минуты
+    стартового часа, т.е. не больше window часовых и 60 минутных агрегатов.
+    """
+
+    def __init__(self, window_hours: int = LOG_STATS_WINDOW_HOURS):
+        self.window_hours = window_hours
+        self._lock = threading.Lock()
+        # ключи — префиксы ISO timestamp 'YYYY-MM-DDTHH'; минуты часа — список из 60 ячеек
+        self._hours: Dict[str, Rollup] = {}
+        self._minutes: Dict[str, List[Optional[Rollup]]] = {}
+        # готов после загрузки истории за окно
+        self.ready = False
+
+    def add_entries(self, entries: List[Dict[str, Any]]):
+        border = (datetime.utcnow() - timedelta(hours=self.window_hours)).isoformat()[:16]
+        with self._lock:
+            for entry in entries:
+                timestamp = entry.get('timestamp') or ''
+                minute = timestamp[:16]
+                if len(minute) < 16 or minute < border or not minute[14:16].isdigit():
+                    continue
+                hour = minute[:13]
+                hour_rollup = self._hours.get(hour)
+                if hour_rollup is None:
+                    hour_rollup = self._hours[hour] = Rollup()
+                    self._minutes[hour] = [None] * 60
+                hour_rollup.add(entry)
+                slots = self._minutes[hour]
+                rollup = slots[int(minute[14:16])]
+                if rollup is None:
+                    rollup = slots[int(minute[14:16])] = Rollup()
+                rollup.add(entry)
+
+    def evict(self):
+        """Убрать агрегаты старше окна"""
+        border = (datetime.utcnow() - timedelta(hours=self.window_hours)).isoformat()
+        border_hour, border_minute = border[:13], int(border[14:16])
+        with self._lock:
+            for key in [k for k in self._hours if k < border_hour]:
+                del self._hours[key]
+                del self._minutes[key]
+            # час на границе окна в ответ идёт только поминутно: минуты до границы не нужны
+            slots = self._minutes.get(border_hour)
+            if slots is not None:
+                slots[:border_minute] = [None] * border_minute
+
+    def stats(self, hours: int = 24) -> Dict[str, Any]:
+        """Статистика за последние `hours` часов (не больше окна)"""
+        hours = min(hours, self.window_hours)
+        self.evict()
+        start = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+        start_hour, start_minute = start[:13], int(start[14:16])
+
+        total = Rollup()
+        with self._lock:
+            # полные часы после стартового (включая текущий неполный) + минуты
+            # стартового часа начиная со стартовой
+            for key, rollup in self._hours.items():
+                if key > start_hour:
+                    total.merge(rollup)
+            for rollup in self._minutes.get(start_hour, ())[start_minute:]:
+                if rollup is not None:
+                    total.merge(rollup)
+
+        bounds = [f"<={b}s" for b in EXEC_TIME_BUCKETS] + [f">{EXEC_TIME_BUCKETS[-1]}s"]
+        return {
+            'total_logs': total.total,
+            'level_distribution': dict(total.levels),
+            'top_actions': dict(total.actions.most_common(10)),
+            'error_count': total.levels.get('ERROR', 0),
+            'unique_users': len(total.users),
+            'avg_execution_time': round(total.exec_sum / total.exec_count, 3) if total.exec_count else 0,
+            'execution_time_histogram': dict(zip(bounds, total.exec_hist)),
+            'timeframe_hours': hours
+        }
+
+    def backfill(self, reader, before_ts: Optional[str] = None):
+        """Загрузить историю окна из закрытых сегментов (активный файл дочитает LogFollower)"""
+        start_time = datetime.utcnow() - timedelta(hours=self.window_hours)
+        for path in reader.iter_structured_files(start_time):
+            if path.name == "bot_structured.log":
+                continue
+            seg_first = next((seg.get('first_ts') for seg in reader.get_segments()
+                              if seg['name'] == path.name), None)
+            # сегмент, ротированный уже после открытия активного файла, придёт от LogFollower
+            if before_ts and seg_first and seg_first >= before_ts:
+                continue
+            batch = []
+            with reader.open_log(path) as f:
+                for line in f:
+                    entry = reader.parse_entry(line)
+                    if entry is not None:
+                        batch.append(entry)
+                    if len(batch) >= 5000:
+                        self.add_entries(batch)
+                        batch = []
+            self.add_entries(batch)
@@ -1,32 +1,229 @@
 import os
+import logging
+import asyncio
 from fastapi import FastAPI, Request, Query, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import StreamingResponse
 import json
+import gzip
+import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from log_index import LogIndex, LOG_INDEX_ENABLED, LOG_INDEX_INTERVAL
+from log_follower import LogFollower
+from log_stats import StatsAggregator
+
+logger = logging.getLogger("log_viewer")
+
+# Манифест сегментов, который ведёт StructuredLogger бота при ротации bot_structured.log
+MANIFEST_NAME = "bot_structured.manifest.json"
+ACTIVE_LOG_NAME = "bot_structured.log"
+
+
+def parse_log_timestamp(timestamp_str: str) -> datetime:
+    """ISO timestamp из лога -> naive UTC datetime"""
+    if timestamp_str.endswith('Z'):
+        log_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+    else:
+        log_time = datetime.fromisoformat(timestamp_str)
+    if log_time.tzinfo is not None:
+        log_time = log_time.replace(tzinfo=None)
+    return log_time
+
+
+# Блок обратного чтения и допуск на неупорядоченность строк (бот и API пишут в один каталог)
+REVERSE_BLOCK_SIZE = 64 * 1024
+TIME_ORDER_GRACE = timedelta(seconds=5)
+_TS_PREFIX = '{"timestamp": "'
+
+
+def line_timestamp(line: str) -> Optional[datetime]:
+    """Timestamp строки без полного json.loads — он всегда первый ключ"""
+    if line.startswith(_TS_PREFIX):
+        end = line.find('"', len(_TS_PREFIX))
+        if end > 0:
+            try:
+                return parse_log_timestamp(line[len(_TS_PREFIX):end])
+            except ValueError:
+                return None
+    return None
+
+
+def reverse_lines(path: Path, block_size: int = REVERSE_BLOCK_SIZE):
+    """Строки файла от последней к первой; читает блоками с конца, память — O(блок + строка)"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b'\n')
+            # первая часть может быть хвостом строки из предыдущего блока
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line.decode('utf-8', 'replace')
+        if remainder.strip():
+            yield remainder.decode('utf-8', 'replace')
+
 
 class LogReader:
     def __init__(self, log_dir: str = "/app/logs"):
         self.log_dir = Path(log_dir)
+        # LogIndex и StatsAggregator подключаются при старте приложения;
+        # пока они не готовы — полное сканирование
+        self.index: Optional[LogIndex] = None
+        self.aggregator: Optional[StatsAggregator] = None
+        # последний список файлов для /health — обновляют get_log_files и log_follower
+        self.files_summary: Dict[str, Any] = {"log_dir_exists": False, "log_files_count": 0, "log_files": []}
+
+    def _ready_index(self) -> Optional[LogIndex]:
+        # индекс дочитывает фоновый поток раз в LOG_INDEX_INTERVAL — запрос его не обновляет
+        if self.index is None or not self.index.ready:
+            return None
+        return self.index
+
+    def get_segments(self) -> List[Dict[str, Any]]:
+        """Закрытые сегменты из манифеста (от старых к новым), только существующие файлы"""
+        manifest_file = self.log_dir / MANIFEST_NAME
+        if not manifest_file.exists():
+            return []
+        try:
+            segments = json.loads(manifest_file.read_text(encoding='utf-8')).get('segments', [])
+        except (OSError, ValueError):
+            return []
+        return [seg for seg in segments if (self.log_dir / seg['name']).exists()]
+
+    def iter_structured_files(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[Path]:
+        """Файлы структурного лога, пересекающиеся с интервалом, в хронологическом порядке"""
+        files = []
+        for seg in self.get_segments():
+            try:
+                if start_time and seg.get('last_ts') and parse_log_timestamp(seg['last_ts']) < start_time:
+                    continue
+                if end_time and seg.get('first_ts') and parse_log_timestamp(seg['first_ts']) > end_time:
+                    continue
+            except (ValueError, TypeError):
+                pass
+            files.append(self.log_dir / seg['name'])
+        active = self.log_dir / ACTIVE_LOG_NAME
+        if active.exists():
+            files.append(active)
+        return files
+
+    @staticmethod
+    def parse_entry(line) -> Optional[Dict[str, Any]]:
+        if not line.strip():
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def open_log(path: Path, binary: bool = False):
+        if path.suffix == '.gz':
+            return gzip.open(path, 'rb') if binary else gzip.open(path, 'rt', encoding='utf-8')
+        return open(path, 'rb') if binary else open(path, 'r', encoding='utf-8')
     
     def get_log_files(self) -> List[Dict[str, Any]]:
-        """Get list of available log files"""
+        """Get list of available log files (segments carry first/last timestamps from the manifest)"""
         log_files = []
-        if self.log_dir.exists():
+        log_dir_exists = self.log_dir.exists()
+        if log_dir_exists:
+            segments = {seg['name']: seg for seg in self.get_segments()}
             for file_path in self.log_dir.glob("*.log*"):
                 stat = file_path.stat()
+                seg = segments.get(file_path.name, {})
                 log_files.append({
                     'name': file_path.name,
                     'path': str(file_path),
                     'size': stat.st_size,
-                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    'compressed': file_path.suffix == '.gz',
+                    'first_ts': seg.get('first_ts'),
+                    'last_ts': seg.get('last_ts'),
+                    'raw_size': seg.get('raw_size'),
                 })
-        return sorted(log_files, key=lambda x: x['modified'], reverse=True)
+        log_files = sorted(log_files, key=lambda x: x['modified'], reverse=True)
+        self.files_summary = {
+            "log_dir_exists": log_dir_exists,
+            "log_files_count": len(log_files),
+            "log_files": [f['name'] for f in log_files[:5]],  # Show first 5 files for debugging
+        }
+        return log_files
     
+    @staticmethod
+    def _matches(
+        log_entry: Dict[str, Any],
+        level: Optional[str],
+        user_id: Optional[int],
+        action: Optional[str],
+        search_query: Optional[str]
+    ) -> bool:
+        if level and log_entry.get('level') != level:
+            return False
+        if user_id and log_entry.get('user_id') != user_id:
+            return False
+        if action and action.lower() not in (log_entry.get('action') or '').lower():
+            return False
+        if search_query:
+            search_text = f"{log_entry.get('message', '')} {log_entry.get('action', '')}".lower()
+            if search_query.lower() not in search_text:
+                return False
+        return True
+
+    def _parse_line(
+        self,
+        line: str,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        filters: Dict[str, Any]
+    ):
+        """
+        (запись или None, старше окна?) — время проверяется по префиксу строки до разбора JSON.
+        Второй флаг говорит, что строка старше start_time с запасом и дальше назад читать нет смысла.
+        """
+        log_time = line_timestamp(line)
+        if log_time is not None:
+            if end_time and log_time > end_time:
+                return None, False
+            if start_time and log_time < start_time:
+                return None, log_time < start_time - TIME_ORDER_GRACE
+        
+        try:
+            log_entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.debug("Error parsing JSON log line: %s", e)
+            return None, False
+        
+        if log_time is None and (start_time or end_time):
+            try:
+                log_time = parse_log_timestamp(log_entry.get('timestamp', ''))
+            except (ValueError, TypeError):
+                return None, False
+            if (start_time and log_time < start_time) or (end_time and log_time > end_time):
+                return None, False
+        
+        if not self._matches(log_entry, **filters):
+            return None, False
+        return log_entry, False
+
     def read_structured_logs(
         self,
         limit: int = 100,
@@ -35,88 +232,82 @@ class LogReader:
         end_time: Optional[datetime] = None,
         user_id: Optional[int] = None,
         action: Optional[str] = None,
-        search_query: Optional[str] = None
+        search_query: Optional[str] = None,
+        cancel: Optional[threading.Event] = None
     ) -> List[Dict[str, Any]]:
-        """Read and filter structured logs"""
+        """Read and filter structured logs, most recent first.
+
+        The active file is read backwards in blocks, so the scan stops as soon as
+        `limit` entries are collected or lines get older than `start_time`.
+        Compressed segments outside the time range are skipped via the manifest.
+        When `cancel` is set (timeout or client disconnect) the partial result is returned.
+        """
         logs = []
-        structured_log_file = self.log_dir / "bot_structured.log"
-        
-        print(f"Looking for log file: {structured_log_file}")
-        print(f"File exists: {structured_log_file.exists()}")
-        print(f"Log directory exists: {self.log_dir.exists()}")
-        if self.log_dir.exists():
-            print(f"Files in log dir: {list(self.log_dir.glob('*'))}")
-        
-        if not structured_log_file.exists():
+        if not self.log_dir.exists():
             return logs
         
-        try:
-            with open(structured_log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                print(f"Read {len(lines)} lines from log file")
-                
-                for line_num, line in enumerate(lines):
-                    if not line.strip():
-                        continue
-                    
-                    try:
-                        log_entry = json.loads(line.strip())
-                        
-                        # Apply filters
-                        if level and log_entry.get('level') != level:
-                            continue
-                        
-                        if user_id and log_entry.get('user_id') != user_id:
-                            continue
-                        
-                        if action and action.lower() not in log_entry.get('action', '').lower():
-                            continue
-                        
-                        if search_query:
-                            search_text = f"{log_entry.get('message', '')} {log_entry.get('action', '')}".lower()
-                            if search_query.lower() not in search_text:
-                                continue
-                        
-                        # Time filtering
-                        if start_time or end_time:
-                            try:
-                                timestamp_str = log_entry.get('timestamp', '')
-                                if timestamp_str.endswith('Z'):
-                                    log_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                                else:
-                                    log_time = datetime.fromisoformat(timestamp_str)
-                                
-                                # Make log_time timezone-naive for comparison
-                                if log_time.tzinfo is not None:
-                                    log_time = log_time.replace(tzinfo=None)
-                                
-                                if start_time and log_time < start_time:
-                                    continue
-                                if end_time and log_time > end_time:
-                                    continue
-                            except (ValueError, TypeError) as e:
-                                print(f"Error parsing timestamp: {timestamp_str}, error: {e}")
-                                continue
-                        
-                        logs.append(log_entry)
-                        
-                        if len(logs) >= limit:
-                            break
-                    
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing JSON on line {line_num}: {e}")
-                        continue
+        index = self._ready_index()
+        if index is not None:
+            try:
+                return index.query(
+                    limit=limit, level=level, start_time=start_time, end_time=end_time,
+                    user_id=user_id, action=action, search_query=search_query, cancel=cancel
+                )
+            except sqlite3.Error as e:
+                logger.warning("Log index query failed, falling back to scan: %s", e)
         
-        except Exception as e:
-            print(f"Error reading logs: {e}")
+        filters = dict(level=level, user_id=user_id, action=action, search_query=search_query)
         
-        print(f"Returning {len(logs)} logs after filtering")
-        return list(reversed(logs))  # Most recent first
-    
-    def get_log_stats(self, hours: int = 24) -> Dict[str, Any]:
+        # файлы от новых к старым
+        for path in reversed(self.iter_structured_files(start_time, end_time)):
+            try:
+                if path.suffix == '.gz':
+                    # gzip не читается назад: проходим сегмент вперёд и держим только
+                    # последние `limit - len(logs)` совпадений
+                    matched = deque(maxlen=limit - len(logs))
+                    with self.open_log(path) as f:
+                        for line in f:
+                            if cancel is not None and cancel.is_set():
+                                return logs
+                            if line.strip():
+                                log_entry, _ = self._parse_line(line.rstrip('\n'), start_time, end_time, filters)
+                                if log_entry is not None:
+                                    matched.append(log_entry)
+                    logs.extend(reversed(matched))
+                else:
+                    for line in reverse_lines(path):
+                        if cancel is not None and cancel.is_set():
+                            return logs
+                        log_entry, too_old = self._parse_line(line, start_time, end_time, filters)
+                        if too_old:
+                            return logs
+                        if log_entry is not None:
+                            logs.append(log_entry)
+                            if len(logs) >= limit:
+                                break
+            except Exception as e:
+                logger.warning("Error reading logs from %s: %s", path.name, e)
+            
+            if len(logs) >= limit:
+                break
+        
+        return logs
+
+    def get_log_stats(self, hours: int = 24, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
         """Get logging statistics for the last N hours"""
+        if self.aggregator is not None and self.aggregator.ready:
+            return self.aggregator.stats(hours)
+        
         start_time = datetime.utcnow() - timedelta(hours=hours)
-        logs = self.read_structured_logs(limit=10000, start_time=start_time)
+        
+        index = self._ready_index()
+        if index is not None:
+            try:
+                return {**index.stats(start_time), 'timeframe_hours': hours}
+            except sqlite3.Error as e:
+                logger.warning("Log index stats failed, falling back to scan: %s", e)
+        
+        logs = self.read_structured_logs(limit=10000, start_time=start_time, cancel=cancel)
         
         if not logs:
             return {
@@ -156,6 +347,102 @@ templates = Jinja2Templates(directory="app/templates")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 log_reader = LogReader()
+# один follower активного файла на всё приложение
+log_follower = LogFollower(log_reader.log_dir / ACTIVE_LOG_NAME, reader=log_reader)
+
+
+def _start_stats_aggregator():
+    """История окна из сегментов, затем активный файл и новые строки — через log_follower"""
+    aggregator = StatsAggregator()
+    try:
+        active_first_ts = log_follower.open(from_start=True)
+        aggregator.backfill(log_reader, before_ts=active_first_ts)
+        log_follower.subscribe(aggregator.add_entries)
+        log_follower.poll()
+    except Exception as e:
+        logger.warning("Stats aggregator disabled: %s", e)
+        log_follower.unsubscribe(aggregator.add_entries)
+    else:
+        aggregator.ready = True
+        log_reader.aggregator = aggregator
+    # follower нужен и /api/logs/stream, поэтому запускается в любом случае
+    log_follower.start()
+
+
+def _index_updater():
+    """Фоновое дочитывание логов в индекс (первый проход индексирует всю историю)"""
+    while True:
+        try:
+            log_reader.index.update()
+        except Exception as e:
+            logger.warning("Log index update failed: %s", e)
+        time.sleep(LOG_INDEX_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_stats_aggregator():
+    log_reader.get_log_files()
+    threading.Thread(target=_start_stats_aggregator, name="stats-backfill", daemon=True).start()
+
+
+@app.on_event("startup")
+async def start_log_index():
+    if not LOG_INDEX_ENABLED:
+        return
+    try:
+        log_reader.index = LogIndex(log_reader)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Log index disabled: %s", e)
+        return
+    threading.Thread(target=_index_updater, name="log-index-updater", daemon=True).start()
+
+# Чтение логов и JSON идут в ограниченном пуле потоков, а не в цикле событий
+LOG_READER_WORKERS = int(os.getenv("LOG_READER_WORKERS", 4))
+LOG_REQUEST_TIMEOUT = float(os.getenv("LOG_REQUEST_TIMEOUT", 20))
+DISCONNECT_POLL_INTERVAL = 0.5
+
+reader_pool = ThreadPoolExecutor(max_workers=LOG_READER_WORKERS, thread_name_prefix="log-reader")
+# не больше LOG_READER_WORKERS задач в пуле; остальные ждут в цикле событий и отменяются вместе с запросом
+_reader_slots = asyncio.Semaphore(LOG_READER_WORKERS)
+
+
+async def _wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def _run_in_reader_pool(func, cancel: threading.Event, kwargs):
+    async with _reader_slots:
+        if cancel.is_set():
+            raise asyncio.CancelledError()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(reader_pool, partial(func, cancel=cancel, **kwargs))
+
+
+async def run_reader(request: Request, func, **kwargs):
+    """
+    Выполнить func(cancel=..., **kwargs) в пуле чтения с таймаутом LOG_REQUEST_TIMEOUT.
+    При таймауте или отключении клиента выставляется cancel — сканирование в потоке
+    прерывается и освобождает слот пула.
+    """
+    cancel = threading.Event()
+    work = asyncio.ensure_future(_run_in_reader_pool(func, cancel, kwargs))
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {work, disconnect}, timeout=LOG_REQUEST_TIMEOUT, return_when=asyncio.FIRST_COMPLETED
+        )
+        if work in done:
+            return work.result()
+        cancel.set()
+        work.cancel()
+        if disconnect in done:
+            # клиент ушёл — ответ никто не прочтёт
+            raise HTTPException(status_code=499, detail="Client closed request")
+        raise HTTPException(status_code=504, detail="Log query timed out")
+    finally:
+        disconnect.cancel()
+
 
 @app.get("/")
 async def dashboard(request: Request):
@@ -164,6 +451,7 @@ async def dashboard(request: Request):
 
 @app.get("/api/logs")
 async def get_logs(
+    request: Request,
     limit: int = Query(100, ge=1, le=1000),
     level: Optional[str] = Query(None),
     hours: Optional[int] = Query(24, ge=1, le=168),
@@ -174,7 +462,9 @@ async def get_logs(
     """API endpoint to get filtered logs"""
     start_time = datetime.utcnow() - timedelta(hours=hours) if hours else None
     
-    logs = log_reader.read_structured_logs(
+    logs = await run_reader(
+        request,
+        log_reader.read_structured_logs,
         limit=limit,
         level=level,
         start_time=start_time,
@@ -197,14 +487,79 @@ async def get_logs(
     }
 
 @app.get("/api/stats")
-async def get_stats(hours: int = Query(24, ge=1, le=168)):
+async def get_stats(request: Request, hours: int = Query(24, ge=1, le=168)):
     """API endpoint to get logging statistics"""
-    return log_reader.get_log_stats(hours=hours)
+    return await run_reader(request, log_reader.get_log_stats, hours=hours)
+
+# SSE: очередь клиента ограничена, при переполнении пачки отбрасываются (клиент получает событие dropped)
+SSE_QUEUE_SIZE = int(os.getenv("LOG_SSE_QUEUE_SIZE", 100))
+SSE_HEARTBEAT = 15.0
+# записи, попавшие в файл чуть раньше подключения, ещё могут прийти в первом опросе
+SSE_BACKLOG_GRACE = timedelta(seconds=2)
+
+
+@app.get("/api/logs/stream")
+async def stream_logs(
+    request: Request,
+    level: Optional[str] = Query(None),
+    user_id: Optional[int] = Query(None),
+    action: Optional[str] = Query(None),
+    search: Optional[str] = Query(None)
+):
+    """Server-Sent Events: новые записи лога, прошедшие фильтры, от общего log_follower"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+    filters = dict(level=level, user_id=user_id, action=action, search_query=search)
+    since = (datetime.utcnow() - SSE_BACKLOG_GRACE).isoformat() + 'Z'
+    dropped = 0
+
+    def offer(batch):
+        nonlocal dropped
+        try:
+            queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            dropped += len(batch)
+
+    def on_entries(entries):
+        # вызывается в потоке follower: фильтруем там же, в цикл событий передаём только совпадения
+        matched = [
+            entry for entry in entries
+            if (entry.get('timestamp') or '') >= since and LogReader._matches(entry, **filters)
+        ]
+        if matched:
+            loop.call_soon_threadsafe(offer, matched)
+
+    log_follower.subscribe(on_entries)
+
+    async def events():
+        nonlocal dropped
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    batch = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if dropped:
+                    yield f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n"
+                    dropped = 0
+                for entry in batch:
+                    yield f"data: {json.dumps(entry)}\n\n"
+        finally:
+            log_follower.unsubscribe(on_entries)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/files")
-async def get_log_files():
+async def get_log_files(request: Request):
     """API endpoint to get list of log files"""
-    return {"files": log_reader.get_log_files()}
+    files = await run_reader(request, lambda cancel: log_reader.get_log_files())
+    return {"files": files}
 
 @app.get("/logs")
 async def logs_page(request: Request):
@@ -213,16 +568,15 @@ async def logs_page(request: Request):
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    log_dir_exists = log_reader.log_dir.exists()
-    log_files = log_reader.get_log_files()
-    
+    """Health check endpoint (healthcheck контейнера)"""
+    # только состояние в памяти: без обращений к диску и пулу чтения, чтобы проверка
+    # не ждала за тяжёлыми запросами; список файлов — из кэша, его обновляет log_follower
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "log_dir_exists": log_dir_exists,
-        "log_files_count": len(log_files),
-        "log_files": [f['name'] for f in log_files[:5]]  # Show first 5 files for debugging
+        **log_reader.files_summary,
+        "index_ready": log_reader.index is not None and log_reader.index.ready,
+        "stats_ready": log_reader.aggregator is not None and log_reader.aggregator.ready,
     }
 
 if __name__ == "__main__":
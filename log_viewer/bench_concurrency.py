@@ -0,0 +1,94 @@
+"""
+Бенчмарк конкурентности лог-вьюера: латентность /health, пока идут тяжёлые запросы.
+
+    python bench_concurrency.py [base_url] [секунд] [тяжёлых_клиентов]
+
+По умолчанию: http://localhost:8080, 30 секунд, 8 клиентов, которые без пауз дёргают
+/api/stats?hours=168 и /api/logs с полнотекстовым поиском. Параллельно /health опрашивается
+каждые 50 мс; в конце печатаются p50/p95/p99/max для /health и статусы тяжёлых запросов.
+Запускайте дважды — до и после изменения — на одном и том же логе.
+"""
+import sys
+import time
+import threading
+import urllib.request
+import urllib.error
+from collections import Counter
+
+BASE_URL = sys.argv[1].rstrip("/") if len(sys.argv) > 1 else "http://localhost:8080"
+DURATION = float(sys.argv[2]) if len(sys.argv) > 2 else 30.0
+HEAVY_CLIENTS = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+HEALTH_INTERVAL = 0.05
+
+HEAVY_PATHS = [
+    "/api/stats?hours=168",
+    "/api/logs?hours=168&limit=1000&search=zzz_no_match",
+]
+
+
+def fetch(path: str, timeout: float = 60.0):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(BASE_URL + path, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = "error"
+    return status, time.perf_counter() - start
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def bench():
+    stop = threading.Event()
+    heavy_statuses = Counter()
+    heavy_times = []
+    health_times = []
+    lock = threading.Lock()
+
+    def heavy_client(n: int):
+        i = n
+        while not stop.is_set():
+            status, elapsed = fetch(HEAVY_PATHS[i % len(HEAVY_PATHS)])
+            with lock:
+                heavy_statuses[status] += 1
+                heavy_times.append(elapsed)
+            i += 1
+
+    def health_probe():
+        while not stop.is_set():
+            status, elapsed = fetch("/health", timeout=30.0)
+            with lock:
+                health_times.append(elapsed if status == 200 else float("inf"))
+            time.sleep(HEALTH_INTERVAL)
+
+    threads = [threading.Thread(target=heavy_client, args=(n,), daemon=True) for n in range(HEAVY_CLIENTS)]
+    threads.append(threading.Thread(target=health_probe, daemon=True))
+
+    print(f"🚀 {BASE_URL}: {HEAVY_CLIENTS} тяжёлых клиентов, {DURATION:.0f} с...")
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=65)
+
+    ms = lambda seconds: f"{seconds * 1000:.1f} мс"
+    print(f"\n❤️  /health: {len(health_times)} запросов")
+    for title, p in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        print(f"  {title}: {ms(percentile(health_times, p))}")
+    print(f"  max: {ms(max(health_times, default=0))}")
+
+    print(f"\n🏋️  тяжёлые запросы: {len(heavy_times)}, статусы {dict(heavy_statuses)}")
+    print(f"  p50: {ms(percentile(heavy_times, 0.50))}, p99: {ms(percentile(heavy_times, 0.99))}")
+
+
+if __name__ == "__main__":
+    bench()
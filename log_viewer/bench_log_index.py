@@ -0,0 +1,178 @@
+"""
+Бенчмарк индекса логов: полное сканирование против LogIndex на синтетическом логе.
+
+    python bench_log_index.py [размер_ГБ] [каталог]
+
+Генерирует лог нужного размера (по умолчанию 2 ГБ во временном каталоге) так, как его
+оставляет бот: сжатые сегменты по LOG_ROTATE_MAX_BYTES с манифестом и активный
+bot_structured.log. Сегменты пишутся дважды — gzip-членами по LOG_GZIP_BLOCK_BYTES
+(как сейчас) и одним членом (как раньше), — индекс строится с нуля для обоих
+вариантов, время фильтрованных запросов сравнивается со сканированием.
+"""
+import gzip
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent / "app"
+sys.path.insert(0, str(APP_DIR))
+# log_viewer монтирует app/static и app/templates относительно рабочего каталога
+os.chdir(APP_DIR.parent)
+
+from log_viewer import LogReader  # noqa: E402
+from log_index import LogIndex  # noqa: E402
+
+SIZE_GB = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+LOG_DIR = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(tempfile.mkdtemp(prefix="bench_logs_"))
+
+ACTIONS = ["db_select_get_user", "db_insert_create_order", "http_request_complete",
+           "operation_checkout_success", "performance_warning", "api_call_geocode"]
+LEVELS = ["DEBUG"] * 30 + ["INFO"] * 60 + ["WARNING"] * 8 + ["ERROR"] * 2
+SEGMENT_BYTES = 50 * 1024 * 1024  # LOG_ROTATE_MAX_BYTES бота
+BLOCK_BYTES = 1024 * 1024  # LOG_GZIP_BLOCK_BYTES бота
+ACTIVE_BYTES = 20 * 1024 * 1024
+
+
+def generate_lines(size_bytes: int):
+    """Строки в формате StructuredLogger; время равномерно растёт за последние 7 дней"""
+    rnd = random.Random(42)
+    start = datetime.utcnow() - timedelta(days=7)
+    written = 0
+    approx_line = 420
+    total_lines = max(size_bytes // approx_line, 1)
+    step = timedelta(days=7) / total_lines
+    i = 0
+    while written < size_bytes:
+        entry = {
+            "timestamp": (start + step * i).isoformat() + "Z",
+            "level": rnd.choice(LEVELS),
+            "message": f"Synthetic message {i} " + "x" * rnd.randint(20, 120),
+            "user_id": rnd.randint(1, 5000),
+            "session_id": None, "order_id": rnd.randint(1, 100000),
+            "comment": None,
+            "action": rnd.choice(ACTIONS),
+            "product_name": None,
+            "execution_time": round(rnd.random(), 3),
+            "module": "bench", "function": "generate", "line": i % 1000,
+            "context": {"i": i},
+        }
+        line = (json.dumps(entry) + "\n").encode()
+        written += len(line)
+        i += 1
+        yield entry["timestamp"], line
+
+
+def write_segment(dirs: dict, lines: list, segments: dict):
+    """Сегмент в каждый каталог: блоками (как _compress_segment бота) и одним gzip-членом"""
+    first_ts, last_ts = lines[0][0], lines[-1][0]
+    name = f"bot_structured.{first_ts[:19].replace('-', '').replace(':', '').replace('T', '-')}.log.gz"
+    raw = b"".join(line for _, line in lines)
+    for kind, log_dir in dirs.items():
+        path = log_dir / name
+        with open(path, "wb") as f:
+            if kind == "blocks":
+                # блоки режутся по границам строк, как в боте
+                position = 0
+                while position < len(raw):
+                    end = raw.find(b"\n", position + BLOCK_BYTES - 1)
+                    end = len(raw) if end == -1 else end + 1
+                    f.write(gzip.compress(raw[position:end], compresslevel=6, mtime=0))
+                    position = end
+            else:
+                f.write(gzip.compress(raw, compresslevel=6, mtime=0))
+        segments[kind].append({"name": name, "first_ts": first_ts, "last_ts": last_ts,
+                               "size": path.stat().st_size, "raw_size": len(raw)})
+
+
+def generate(dirs: dict, size_bytes: int) -> int:
+    """Сегменты по SEGMENT_BYTES, манифест и активный файл с последними ACTIVE_BYTES"""
+    segments = {kind: [] for kind in dirs}
+    batch, batch_bytes, written, total = [], 0, 0, 0
+    for ts, line in generate_lines(size_bytes):
+        batch.append((ts, line))
+        batch_bytes += len(line)
+        written += len(line)
+        total += 1
+        # последние ACTIVE_BYTES остаются в активном файле
+        if batch_bytes >= SEGMENT_BYTES and written < size_bytes - ACTIVE_BYTES:
+            write_segment(dirs, batch, segments)
+            batch, batch_bytes = [], 0
+    for kind, log_dir in dirs.items():
+        (log_dir / "bot_structured.log").write_bytes(b"".join(line for _, line in batch))
+        (log_dir / "bot_structured.manifest.json").write_text(json.dumps({"segments": segments[kind]}))
+    return total
+
+
+def timed(title: str, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {title}: {elapsed * 1000:.1f} мс")
+    return result
+
+
+def build_index(reader: LogReader, title: str):
+    index_path = reader.log_dir / "bench_index.sqlite"
+    if index_path.exists():
+        index_path.unlink()
+    reader.index = LogIndex(reader, str(index_path))
+    print(f"\n🗂  Построение индекса ({title}):")
+    added = timed("первичная индексация", reader.index.update)
+    log_bytes = sum(seg.get("raw_size") or 0 for seg in reader.get_segments())
+    log_bytes += (reader.log_dir / "bot_structured.log").stat().st_size
+    index_bytes = index_path.stat().st_size
+    print(f"  строк в индексе: {added}, размер: {index_bytes / 1024 ** 2:.0f} МБ "
+          f"({index_bytes / log_bytes:.0%} несжатого лога, {index_bytes / max(added, 1):.0f} байт на строку)")
+
+
+def bench():
+    dirs = {"blocks": LOG_DIR / "blocks", "single": LOG_DIR / "single"}
+    if not (dirs["blocks"] / "bot_structured.log").exists():
+        for log_dir in dirs.values():
+            log_dir.mkdir(parents=True, exist_ok=True)
+        print(f"🌱 Генерируем {SIZE_GB} ГБ синтетического лога в {LOG_DIR}...")
+        lines = generate(dirs, int(SIZE_GB * 1024 ** 3))
+        print(f"   {lines} строк")
+    for kind, log_dir in dirs.items():
+        files = list(log_dir.glob("bot_structured.*.log.gz"))
+        print(f"   {kind}: {len(files)} сегментов, {sum(f.stat().st_size for f in files) / 1024 ** 2:.0f} МБ сжато")
+
+    reader = LogReader(str(dirs["blocks"]))
+    now = datetime.utcnow()
+    queries = {
+        "последние 100 без фильтров": dict(limit=100),
+        "ERROR за 7 дней": dict(limit=500, level="ERROR", start_time=now - timedelta(days=7)),
+        "user_id за 7 дней": dict(limit=100, user_id=4242, start_time=now - timedelta(days=7)),
+        "action + WARNING за 3 дня": dict(limit=200, level="WARNING", action="geocode",
+                                           start_time=now - timedelta(days=3)),
+        "окно из прошлого (5–6 дней назад)": dict(limit=100, start_time=now - timedelta(days=6),
+                                                   end_time=now - timedelta(days=5)),
+    }
+
+    print("\n📄 Полное сканирование (без индекса):")
+    scanned = {title: timed(title, lambda q=q: reader.read_structured_logs(**q))
+               for title, q in queries.items()}
+
+    for kind, title in (("single", "сегменты одним gzip-членом"), ("blocks", "сегменты gzip-блоками")):
+        indexed = LogReader(str(dirs[kind]))
+        build_index(indexed, title)
+        print(f"\n⚡ Запросы через индекс ({title}):")
+        for query, q in queries.items():
+            result = timed(query, lambda q=q: indexed.read_structured_logs(**q))
+            if [e.get("timestamp") for e in result] != [e.get("timestamp") for e in scanned[query]]:
+                print(f"  ⚠️  результат отличается от сканирования: {query}")
+    reader.index = indexed.index
+
+    print("\n📊 /api/stats за 24 часа:")
+    timed("через индекс", lambda: reader.get_log_stats(hours=24))
+    reader.index = None
+    timed("сканированием (лимит 10000)", lambda: reader.get_log_stats(hours=24))
+
+
+if __name__ == "__main__":
+    bench()